@@ -7,7 +7,7 @@ from collections import defaultdict
 from contextlib import contextmanager
 import copy
 import enum
-from itertools import chain
+from itertools import chain, count
 import logging
 from logging import Logger
 import time
@@ -20,6 +20,7 @@ from sortedcontainers import SortedKeyList
 import wx
 import os
 import math
+import numpy as np
 
 from ..config import get_setting, get_theme, pop_settings_err
 from ..events import (
@@ -27,6 +28,7 @@ from ..events import (
     DidCommitDragEvent, DidDeleteEvent, DidMoveNodesEvent,
     DidPaintCanvasEvent,
     SelectionDidUpdateEvent,
+    batch_events,
     bind_handler,
     post_event,
 )
@@ -42,6 +44,7 @@ from .geometry import (
     pt_in_rect,
 )
 from .overlays import CanvasOverlay, Minimap
+from .spatial import SpatialGrid
 from .state import InputMode, cstate
 from .utils import Observer, SetSubject, default_handle_positions
 from .utils import draw_rect, get_nodes_by_idx
@@ -69,6 +72,26 @@ class Alignment(enum.Enum):
 
 
 DBL_CLICK_TIMER = 123
+
+
+def _same_node(old: Optional[Node], new: Node) -> bool:
+    """Whether the node shown on the canvas is the same as the new one from the model."""
+    return old is not None and vars(old) == vars(new)
+
+
+def _same_reaction(old: Optional[Reaction], new: Reaction) -> bool:
+    """Whether the reaction shown on the canvas is the same as the new one from the model.
+
+    The handles are compared by their tips, except for the tip of the dest centroid handle, which
+    is computed by the canvas.
+    """
+    def key(rxn: Reaction):
+        return (rxn.id, rxn.net_index, rxn.center_pos, rxn.fill_color, rxn.rate_law, rxn.sources,
+                rxn.targets, rxn.thickness, rxn.bezierCurves, rxn.modifiers,
+                rxn.modifier_tip_style, rxn.src_c_handle.tip, [h.tip for h in rxn.handles])
+    return old is not None and key(old) == key(new)
+
+
 # Don't use ScrolledPanel since Canvas does not scroll conventionally.
 class Canvas(wx.ScrolledWindow):
     """The main window onto which nodes, reactions, etc. will be drawn.
@@ -102,6 +125,8 @@ class Canvas(wx.ScrolledWindow):
     SELECT_BOX_LAYER = 10
     HANDLE_LAYER = 11
     MILLIS_PER_REFRESH = 16  # serves as framerate cap
+    TILE_SIZE = 256  #: Width and height, in device pixels, of the cached tiles of the static canvas.
+    MAX_CACHED_TILES = 256  #: Number of tiles kept across all zoom levels.
     KEY_MOVE_STRIDE: int = 1  #: Number of pixels to move when the user presses an arrow key.
     #: Larger move stride for convenience; used when SHIFT is pressed.
     KEY_MOVE_LONG_STRIDE: int = 10
@@ -138,6 +163,12 @@ class Canvas(wx.ScrolledWindow):
     _minimap: Minimap  #: The minimap overlay.
     _overlays: List[CanvasOverlay]  #: The list of overlays. Used when processing click events.
     _drag_selecting: bool  #: If currently dragging the selection rectangle.
+    #: Grid of the model elements by their hit rectangles, used for hit-testing.
+    _spatial_index: SpatialGrid[CanvasElement]
+    #: Order in which the elements were added to their layer; breaks ties between equal layers.
+    _elt_order: Dict[CanvasElement, int]
+    #: Rendered tiles of the static (i.e. not dynamic) elements, by zoom level and tile position.
+    _tile_cache: Dict[int, Dict[Tuple[int, int], wx.Bitmap]]
     _drag_select_start: Vec2  #: The (logical) mouse position when the user started drag selecting.
     _drag_rect: Rect  #: The current drag-selection rectangle.
     _reverse_status: Dict[str, int]  #: Maps status string in .config.settings to its index.
@@ -190,6 +221,9 @@ class Canvas(wx.ScrolledWindow):
         self._model_elements = SortedKeyList(key=lambda e: e.layers)
         self._widget_elements = SortedKeyList(key=lambda e: e.layers)
         self._plugin_elements = set()
+        self._spatial_index = SpatialGrid()
+        self._elt_order = dict()
+        self._elt_counter = count()
         self.hovered_element = None
         self.dragged_element = None
         self.node_to_rxn = defaultdict(set)
@@ -230,6 +264,8 @@ class Canvas(wx.ScrolledWindow):
         bounds = Rect(BOUNDS_EPS_VEC, self.realsize - BOUNDS_EPS_VEC)
         self._select_box = SelectBox(self, [], [], bounds, self.controller, self._net_index,
                                      Canvas.SELECT_BOX_LAYER)
+        self._widget_elements.add(self._select_box)
+        self._elt_order[self._select_box] = next(self._elt_counter)
         self.sel_nodes_idx = SetSubject()
         self.sel_reactions_idx = SetSubject()
         self.sel_compartments_idx = SetSubject()
@@ -248,6 +284,7 @@ class Canvas(wx.ScrolledWindow):
         # Set a placeholder value for position; we will set it later in SetOverlayPositions().
         self._minimap = Minimap(pos=Vec2(), device_pos=Vec2(), width=200, realsize=self.realsize,
                                 window_size=Vec2(self.GetSize()), pos_callback=self.SetOriginPos)
+        self._minimap.elements = self._model_elements
 
         self._overlays = [self._minimap]
 
@@ -290,15 +327,13 @@ class Canvas(wx.ScrolledWindow):
         self.drawing_drag = False
 
         self._dynamic_elements = set()
-        self._static_bitmap = None
+        self._tile_cache = dict()
         self._dirty = True
 
     def OnWindowDestroy(self, evt):
         evt.Skip()
 
     def OnIdle(self, evt):
-        # if self._static_bitmap is None:
-        #     self._RedrawDynamicToBuffer()
         self.LazyRefresh()
 
     def OnChar(self, evt):
@@ -356,7 +391,7 @@ class Canvas(wx.ScrolledWindow):
         for rea_el in self._reaction_elements:
             for bz in rea_el.bezier.dest_beziers:
                 bz.arrow_tip_changed()
-        self._RedrawDynamicToBuffer()
+        self.FullRedraw()
 
     def RegisterAllChildren(self, widget):
         """Connect all descendants of this widget to relevant events.
@@ -427,91 +462,179 @@ class Canvas(wx.ScrolledWindow):
         return CompartmentElt(comp, Canvas.COMPARTMENT_LAYER, comp.index)
 
     def Reset(self, nodes: List[Node], reactions: List[Reaction], compartments: List[Compartment]):
-        """Update the list of nodes and apply the current scale."""
-        # destroy old elements
-        for elt in chain(self._model_elements, self._widget_elements):
-            if elt not in self._plugin_elements:
-                elt.destroy()
+        """Update the list of nodes and apply the current scale.
 
-        # cull removed indices
+        The given lists are compared with the current ones by index, and only the nodes, reactions
+        and compartments that were added, changed or removed have their elements re-created (see
+        PatchElements()); the elements of the rest are kept.
+        """
         node_idx = {n.index for n in nodes}
         rxn_idx = {r.index for r in reactions}
         comp_idx = {c.index for c in compartments}
-
-        self.sel_nodes_idx.set_item(self.sel_nodes_idx.item_copy() & node_idx)
-        new_sel_reactions = self.sel_reactions_idx.item_copy() & rxn_idx
+        removed_nodes = set(self.node_idx_map) - node_idx
+        removed_reactions = set(self.reaction_idx_map) - rxn_idx
+        removed_compartments = set(self.comp_idx_map) - comp_idx
+
+        nodes = [n for n in nodes if not _same_node(self.node_idx_map.get(n.index), n)]
+        reactions = [r for r in reactions
+                     if not _same_reaction(self.reaction_idx_map.get(r.index), r)]
+        compartments = [c for c in compartments if self.comp_idx_map.get(c.index) != c]
+        self.PatchElements(nodes, reactions, compartments, removed_nodes, removed_reactions,
+                           removed_compartments)
+
+    def PatchElements(self, nodes: List[Node], reactions: List[Reaction],
+                      compartments: List[Compartment], removed_nodes: Set[int],
+                      removed_reactions: Set[int], removed_compartments: Set[int]):
+        """Like Reset(), but only for the elements that changed.
+
+        The given nodes, reactions and compartments are either new or replace the ones with the
+        same indices, and the elements with the removed indices are deleted. Everything else is
+        kept as is, except for reactions that need to be re-created because their nodes changed.
+        """
+        node_elts = {e.node.index: e for e in self._node_elements}
+        rxn_elts = {e.reaction.index: e for e in self._reaction_elements}
+        comp_elts = {e.compartment.index: e for e in self._compartment_elements}
+        changed_nodes = {n.index for n in nodes} | removed_nodes
+        # reactions hold on to the Node objects they connect, so re-create those too
+        rebuilt_rxns = set().union(*(self.node_to_rxn[ni] for ni in changed_nodes))
+        rebuilt_rxns -= removed_reactions
+        reactions = [r for r in reactions if r.index not in removed_reactions]
+        rebuilt_rxns -= {r.index for r in reactions}
+        reactions += [self.reaction_idx_map[ri] for ri in rebuilt_rxns]
+
+        # old and new extents of everything that changed, to be re-rendered
+        dirty: List[Optional[Rect]] = list()
+        # reactions are not re-created when their modifiers change, but they still draw lines to
+        # them
+        modified_rxn_elts = [re for re in self._reaction_elements
+                             if not changed_nodes.isdisjoint(re.reaction.modifiers)]
+        dirty += [re.paint_rect() for re in modified_rxn_elts]
+
+        def remove_elt(elt: CanvasElement):
+            dirty.append(elt.paint_rect())
+            elt.destroy()
+            self._model_elements.remove(elt)
+            self._UnindexElement(elt)
+
+        # Replaced entries are overwritten below rather than popped, so that they keep their order
+        for ni in changed_nodes:
+            if ni in node_elts:
+                remove_elt(node_elts[ni])
+        for ri in chain(removed_reactions, (r.index for r in reactions)):
+            if ri in rxn_elts:
+                rxn_el = rxn_elts[ri]
+                remove_elt(rxn_el)
+                for widget in self._GetReactionWidgets(rxn_el):
+                    dirty.append(widget.paint_rect())
+                    self._model_elements.remove(widget)
+                    self._UnindexElement(widget)
+            if ri in self.reaction_idx_map:
+                old_rxn = self.reaction_idx_map[ri]
+                for nodei in chain(old_rxn.sources, old_rxn.targets):
+                    self.node_to_rxn[nodei].discard(ri)
+        for ci in chain(removed_compartments, (c.index for c in compartments)):
+            if ci in comp_elts:
+                remove_elt(comp_elts[ci])
+        for elts, idx_map, removed in ((node_elts, self.node_idx_map, removed_nodes),
+                                       (rxn_elts, self.reaction_idx_map, removed_reactions),
+                                       (comp_elts, self.comp_idx_map, removed_compartments)):
+            for index in removed:
+                elts.pop(index, None)
+                idx_map.pop(index, None)
+
+        self.sel_nodes_idx.set_item(self.sel_nodes_idx.item_copy() - removed_nodes)
+        new_sel_reactions = self.sel_reactions_idx.item_copy() - removed_reactions
         self.sel_reactions_idx.set_item(new_sel_reactions)
-        self.sel_compartments_idx.set_item(self.sel_compartments_idx.item_copy() & comp_idx)
-
-        self._reactant_idx &= node_idx
-        self._product_idx &= node_idx
+        self.sel_compartments_idx.set_item(self.sel_compartments_idx.item_copy() -
+                                           removed_compartments)
+        self._reactant_idx -= removed_nodes
+        self._product_idx -= removed_nodes
 
-        # Update index maps
-        self.node_idx_map = dict()
+        for comp in compartments:
+            self.comp_idx_map[comp.index] = comp
+            comp_elts[comp.index] = self.CreateCompartmentElement(comp)
+            self._model_elements.add(comp_elts[comp.index])
+            self._IndexElements([comp_elts[comp.index]])
+            dirty.append(comp_elts[comp.index].paint_rect())
         for node in nodes:
             self.node_idx_map[node.index] = node
-        self.reaction_idx_map = dict()
+            layers = Canvas.NODE_LAYER if node.comp_idx == -1 else (Canvas.COMPARTMENT_LAYER,
+                                                                   node.comp_idx, 1)
+            node_elts[node.index] = self.CreateNodeElement(node, layers)
+            self._model_elements.add(node_elts[node.index])
+            self._IndexElements([node_elts[node.index]])
+            dirty.append(node_elts[node.index].paint_rect())
         for rxn in reactions:
             self.reaction_idx_map[rxn.index] = rxn
-        self.comp_idx_map = dict()
-        for comp in compartments:
-            self.comp_idx_map[comp.index] = comp
-
-        # Update reaction map
-        self.node_to_rxn = defaultdict(set)
-        for rxn in reactions:
             for nodei in chain(rxn.sources, rxn.targets):
                 self.node_to_rxn[nodei].add(rxn.index)
-
-        self._nodes = nodes
-        self._reactions = reactions
-        self._compartments = compartments
-        # Don't clear hovered_element if it is SelectBox
+            top_layer = max(node_elts[ni].layers for ni in chain(rxn.sources, rxn.targets))
+            rxn_el = self.CreateReactionElement(rxn, layer_above(top_layer))
+            rxn_el.selected = rxn.index in new_sel_reactions
+            rxn_elts[rxn.index] = rxn_el
+            self._model_elements.add(rxn_el)
+            self._model_elements.update(self._GetReactionWidgets(rxn_el))
+            self._IndexElements(chain([rxn_el], self._GetReactionWidgets(rxn_el)))
+            dirty += [e.paint_rect() for e in chain([rxn_el], self._GetReactionWidgets(rxn_el))]
+
+        self._nodes = list(self.node_idx_map.values())
+        self._reactions = list(self.reaction_idx_map.values())
+        self._compartments = list(self.comp_idx_map.values())
+        self._node_elements = list(node_elts.values())
+        self._reaction_elements = list(rxn_elts.values())
+        self._compartment_elements = list(comp_elts.values())
         if not isinstance(self.hovered_element, SelectBox):
             self.hovered_element = None
         self.dragged_element = None
 
-        self._compartment_elements = [self.CreateCompartmentElement(c) for c in compartments]
-        # create node elements and assign the correct layers to them (accounting for compartments)
-        self._node_elements = list()
-        for node in nodes:
-            compi = self.controller.get_compartment_of_node(self.net_index, node.index)
-            layers = Canvas.NODE_LAYER if compi == -1 else (Canvas.COMPARTMENT_LAYER, compi, 1)
-            self._node_elements.append(self.CreateNodeElement(node, layers))
+        self._select_box.related_elts = self._model_elements
+        dirty += [re.paint_rect() for re in modified_rxn_elts if not re.destroyed]
+        self._ElementsDidUpdate(dirty)
 
-        # create reaction elements and assign the correct layers
-        self._reaction_elements = list()
-        for rxn in reactions:
-            related_nodes = set(chain(rxn.sources, rxn.targets))
-            top_layer = max(
-                el.layers for el in self._node_elements if el.node.index in related_nodes)
-            # Make sure reaction is displayed above its top-most node
-            self._reaction_elements.append(self.CreateReactionElement(rxn, layer_above(top_layer)))
-
-        # Initialize elements list
-        select_elements = cast(List[CanvasElement], self._node_elements) + cast(
-            List[CanvasElement], self._reaction_elements) + cast(
-                List[CanvasElement], self._compartment_elements)
-        for rxn_el in self._reaction_elements:
-            # Add Bezier handle and center elements
-            select_elements += rxn_el.bhandles
-            select_elements.append(rxn_el.center_el)
-            # Update reactions on whether they are selected
-            rxn_el.selected = rxn_el.reaction.index in new_sel_reactions
-
-        for plugin_el in self._plugin_elements:
-            select_elements.append(plugin_el)
-
-        self._model_elements = SortedKeyList(select_elements, lambda e: e.layers)
+    def _IndexElements(self, elts: Iterable[CanvasElement]):
+        """Add the given model elements to the spatial index, in the order they were added."""
+        for elt in elts:
+            self._elt_order[elt] = next(self._elt_counter)
+            self._spatial_index.insert(elt, elt.hit_rect())
+
+    def _UnindexElement(self, elt: CanvasElement):
+        self._elt_order.pop(elt, None)
+        self._spatial_index.discard(elt)
+
+    def _ElementsAt(self, logical_pos: Vec2) -> List[CanvasElement]:
+        """Return the elements that may contain logical_pos, from the highest layer to the lowest.
+
+        This is the same order as _ElementsHighToLow(), but only the model elements whose hit
+        rectangles contain the position are included. pos_inside() still needs to be checked.
+        """
+        candidates = self._spatial_index.query_point(logical_pos)
+        candidates.update(self._widget_elements)
+        widgets = set(self._widget_elements)
+        return sorted(candidates, reverse=True,
+                      key=lambda e: (e.layers, e in widgets, self._elt_order.get(e, -1)))
+
+    def _ElementsDidUpdate(self, dirty: Optional[List[Optional[Rect]]] = None):
+        """Helper that refreshes the selection and redraws, after the model elements changed.
+
+        dirty is the list of areas to re-render, or None to redraw everything.
+        """
+        if dirty is not None:
+            dirty.append(self._select_box.paint_rect())
+        # PatchElements() modifies the minimap's elements in place
+        self._minimap.InvalidateThumbnail()
         self._select_box.update(self.GetSelectedNodes(),
                                 [c for c in self._compartments if self.sel_compartments_idx.contains(c.index)])
         self._UpdateSelectBoxLayer()
-        self._select_box.related_elts = select_elements
-        self._widget_elements = SortedKeyList([self._select_box], lambda e: e.layers)
-        self._minimap.elements = self._model_elements
 
         self._UpdateSelectedLists()
-        self.FullRedraw()
+        if dirty is None:
+            self.FullRedraw()
+        else:
+            dirty.append(self._select_box.paint_rect())
+            self._InvalidateRects(dirty)
+
+        steps, nbytes = self.controller.get_undo_history_size()
+        self._SetStatusText('history', 'history: {} ({:.1f} MB)'.format(steps, nbytes / 2**20))
 
         post_event(CanvasDidUpdateEvent())
 
@@ -583,7 +706,10 @@ class Canvas(wx.ScrolledWindow):
 
         self._SetStatusText('zoom', '{:.2f}x'.format(cstate.scale))
 
-        self.FullRedraw()
+        # tiles are cached per zoom level, so there is nothing to invalidate, but fonts and pens
+        # are created for the scale they are drawn at
+        cstate.resources.clear()
+        self.LazyRefresh()
 
     def ZoomCenter(self, zooming_in: bool):
         """Zoom in on the center of the visible window."""
@@ -661,7 +787,7 @@ class Canvas(wx.ScrolledWindow):
                     ol.hovering = False
 
             if cstate.input_mode == InputMode.SELECT:
-                for el in self._ElementsHighToLow():
+                for el in self._ElementsAt(logical_pos):
                     if not el.enabled:
                         continue
                     if el.pos_inside(logical_pos) and el.on_left_down(logical_pos):
@@ -796,10 +922,8 @@ class Canvas(wx.ScrolledWindow):
                 self.IncrementZoom(zooming_in, Vec2(device_pos))
 
         finally:
-            if self.dragged_element is not None:
-                self._RedrawDynamicToBuffer()
-            else:
-                self.FullRedraw()
+            # a dragged element is taken out of the static tiles and painted on every frame
+            self._UpdateDynamicElements()
             evt.Skip()
             wx.CallAfter(self.SetFocus)
 
@@ -836,7 +960,7 @@ class Canvas(wx.ScrolledWindow):
             # self._UnfloatNodes()
             self._nodes_floating = False
         finally:
-            self.FullRedraw()
+            self._UpdateDynamicElements()
             evt.Skip()
 
     def OnRightUp(self, evt):
@@ -855,7 +979,7 @@ class Canvas(wx.ScrolledWindow):
         node_el: Optional[NodeElement] = None
         reaction_el: Optional[ReactionElement] = None
         comp_el: Optional[CompartmentElt] = None
-        for el in self._ElementsHighToLow():
+        for el in self._ElementsAt(logical_pos):
             if not el.enabled:
                 continue
             if el.pos_inside(logical_pos):
@@ -1014,8 +1138,11 @@ class Canvas(wx.ScrolledWindow):
         Returns None if there are no nodes, reactions, or compartments.
         """
         rects = list()
-        for el in self._node_elements:
-            rects.append(el.bounding_rect())
+        if len(self._node_elements) != 0:
+            _, positions, sizes = self.controller.get_node_geometry(self.net_index)
+            lo = positions.min(axis=0)
+            hi = (positions + sizes).max(axis=0)
+            rects.append(Rect(Vec2(*lo.tolist()), Vec2(*(hi - lo).tolist())))
         for el in self._reaction_elements:
             rects.append(el.bounding_rect())
         for el in self._compartment_elements:
@@ -1026,43 +1153,6 @@ class Canvas(wx.ScrolledWindow):
         else:
             return None
 
-    def findMinX(self, nodes: List[Node]):
-        '''
-        Find the left-most node's x position
-        Args:
-            self
-            l: the list of indices of the selected nodes
-        '''
-        return min(n.position.x for n in nodes)
-
-    def findMaxX(self, nodes: List[Node]):
-        '''
-        Find the right-most node's x position
-        Args:
-            self
-            l: the list of indices of the selected nodes
-        '''
-        return max(n.position.x for n in nodes)
-
-    def findMinY(self, nodes: List[Node]):
-        '''
-        Find the left-most node's x position
-        Args:
-            self
-            l: the list of indices of the selected nodes
-        '''
-        return min(n.position.y for n in nodes)
-
-    def findMaxY(self, nodes: List[Node]):
-        '''
-        Find the right-most node's x position
-        Args:
-            self
-            l: the list of indices of the selected nodes
-        '''
-        return max(n.position.y for n in nodes)
-
-
     def _DefaultHandlePositions(self, rea_el: ReactionElement):
         center = rea_el.bezier.real_center
         reactants = [self.node_idx_map[i] for i in rea_el.reaction.sources]
@@ -1087,133 +1177,47 @@ class Canvas(wx.ScrolledWindow):
 
     def AlignSelectedNodes(self, alignment: Alignment):
         """Align the selected nodes. Should be called only when *only* nodes are selected."""
-        # The selected nodes are self.sel_nodes
-        # To access a file in the resources folder, use
-        # Jin_edit:refer to plugins/arrange.py
+        sel_idx = [n.index for n in self.sel_nodes]
+        if len(sel_idx) == 0:
+            return
+        indices, positions, sizes = self.controller.get_node_geometry(self.net_index)
+        rows = np.searchsorted(indices, sel_idx)
+        pos = positions[rows]
+        size = sizes[rows]
 
-        sel_nodes = self.sel_nodes
         if alignment == Alignment.LEFT:
             # Align selected nodes to the left-most node's x position
-            with self.controller.group_action():
-                xpos = self.findMinX(sel_nodes)
-                for n in sel_nodes:
-                    newPos = Vec2(xpos, n.position.y)
-                    self.controller.move_node(self.net_index, n.index, newPos)
-            self.setDefaultHandles()
-
+            pos[:, 0] = pos[:, 0].min()
         elif alignment == Alignment.RIGHT:
-            '''
-            Align selected nodes to the right-most node's x position
-            '''
-            with self.controller.group_action():
-                xpos = self.findMaxX(sel_nodes)
-                for n in self.sel_nodes:
-                    newPos = Vec2(xpos, n.position.y)
-                    self.controller.move_node(self.net_index, n.index, newPos)
-            self.setDefaultHandles()
-
+            # Align selected nodes to the right-most node's x position
+            pos[:, 0] = pos[:, 0].max()
         elif alignment == Alignment.CENTER:
-            '''
-            Align selected nodes to the relative center of the x positions of the nodes
-            '''
-            with self.controller.group_action():
-                xMin = self.findMinX(sel_nodes)
-                xMax = self.findMaxX(sel_nodes)
-                xpos = math.floor((xMax + xMin)/2)
-                for n in sel_nodes:
-                    newPos = Vec2(xpos, n.position.y)
-                    self.controller.move_node(self.net_index, n.index, newPos)
-            self.setDefaultHandles()
-
+            # Align selected nodes to the relative center of the x positions of the nodes
+            pos[:, 0] = math.floor((pos[:, 0].min() + pos[:, 0].max()) / 2)
         elif alignment == Alignment.TOP:
-            with self.controller.group_action():
-                ypos = self.findMinY(sel_nodes)
-                for n in self.sel_nodes:
-                    newPos = Vec2(n.position.x, ypos)
-                    self.controller.move_node(self.net_index, n.index, newPos)
-            self.setDefaultHandles()
-
+            pos[:, 1] = pos[:, 1].min()
         elif alignment == Alignment.BOTTOM:
-            with self.controller.group_action():
-                ypos = self.findMaxY(sel_nodes)
-                for n in self.sel_nodes:
-                    newPos = Vec2(n.position.x, ypos)
-                    self.controller.move_node(self.net_index, n.index, newPos)
-            self.setDefaultHandles()
-
+            pos[:, 1] = pos[:, 1].max()
         elif alignment == Alignment.MIDDLE:
-            # Align selected nodes to the relative center of the x positions of the nodes
-            with self.controller.group_action():
-                yMin = self.findMinY(sel_nodes)
-                yMax = self.findMaxY(sel_nodes)
-                ypos = math.floor((yMax + yMin)/2)
-                for n in sel_nodes:
-                    newPos = Vec2(n.position.x, ypos)
-                    self.controller.move_node(0, n.index, newPos)
-            self.setDefaultHandles()
-
+            # Align selected nodes to the relative center of the y positions of the nodes
+            pos[:, 1] = math.floor((pos[:, 1].min() + pos[:, 1].max()) / 2)
         elif alignment == Alignment.GRID:
-            '''
-            Align selected nodes in a net grid manner
-            '''
-            with self.controller.group_action():
-                x = 40
-                y = 40
-                count = 1
-                for n in sel_nodes:
-                    self.controller.move_node(0, n.index, Vec2(x, y))
-                    x = x + 130
-                    if count % 5 == 0:
-                        y = y + 130
-                        x = 40
-                    count = count + 1
-            self.setDefaultHandles()
-
-        elif alignment == Alignment.HORIZONTAL:
-
-            # Sort the selected nodes in x position ascending order
-            nodes = sorted(sel_nodes, key=lambda x: x.position.x)
-
-            # find the average distance beteeen the selected nodes
-            averageDistance = 0.0
-            for count in range(1, len(nodes)):
-                node2 = nodes[count-1]
-                node1 = nodes[count]
-                averageDistance += (node1.position.x + node1.size.x) - node2.position.x
-            averageDistance = averageDistance / len(nodes)
-
-            with self.controller.group_action():
-                # x = Position of left most node
-                x = nodes[0].position.x
-                # Arrange nodes with equal distance between them
-                for count in range(len(nodes)):
-                    newPos = Vec2(x, nodes[count].position.y)
-                    self.controller.move_node(0, nodes[count].index, newPos)
-                    x = x + averageDistance
-            self.setDefaultHandles()
-
-        elif alignment == Alignment.VERTICAL:
-
-            # Sort the selected nodes in y position ascending order
-            nodes = sorted(sel_nodes, key=lambda x: x.position.y)
-
-            # find the average distance beteeen the selected nodes
-            averageDistance = 0.0
-            for count in range(1, len(nodes)):
-                node2 = nodes[count - 1]
-                node1 = nodes[count]
-                averageDistance += (node1.position.y + node1.size.y) - node2.position.y
-            averageDistance = averageDistance / len(nodes)
-
-            with self.controller.group_action():
-                # y = Position of top most node
-                y = nodes[0].position.y
-                # Arrange nodes with equal distance between them
-                for count in range(len(nodes)):
-                    newPos = Vec2(nodes[count].position.x, y)
-                    self.controller.move_node(0, nodes[count].index, newPos)
-                    y = y + averageDistance
-            self.setDefaultHandles()
+            # Align selected nodes in a net grid manner, five to a row
+            count = np.arange(len(rows))
+            pos[:, 0] = 40 + 130 * (count % 5)
+            pos[:, 1] = 40 + 130 * (count // 5)
+        elif alignment in (Alignment.HORIZONTAL, Alignment.VERTICAL):
+            axis = 0 if alignment == Alignment.HORIZONTAL else 1
+            # Arrange the nodes with equal distance between them, starting from the left-most
+            # (or top-most) one, with the average distance between the selected nodes
+            order = np.argsort(pos[:, axis], kind='stable')
+            start = pos[order, axis]
+            extent = size[order, axis]
+            average_distance = np.sum(start[1:] + extent[1:] - start[:-1]) / len(order)
+            pos[order, axis] = start[0] + average_distance * np.arange(len(order))
+
+        self.controller.move_nodes(self.net_index, sel_idx, pos)
+        self.setDefaultHandles()
 
     # TODO improve this. we might want a special mouseLeftWindow event
     def _EndDrag(self, evt: wx.MouseEvent):
@@ -1277,7 +1281,7 @@ class Canvas(wx.ScrolledWindow):
                 self.hovered_element.on_mouse_leave(logical_pos)
                 self.hovered_element = None
             elif evt.LeftIsDown():
-                for el in self._ElementsHighToLow():
+                for el in self._ElementsAt(logical_pos):
                     if not el.enabled:
                         continue
                     if el.pos_inside(logical_pos) and el.on_left_up(logical_pos):
@@ -1323,34 +1327,48 @@ class Canvas(wx.ScrolledWindow):
                                min(logical_pos.y, self._drag_select_start.y))
                 botright = Vec2(max(logical_pos.x, self._drag_select_start.x),
                                 max(logical_pos.y, self._drag_select_start.y))
+                old_drag_rect = self._drag_rect
                 self._drag_rect = Rect(topleft, botright - topleft)
                 if cstate.input_mode == InputMode.SELECT:
-                    selected_nodes = [n for n in self._nodes
-                                      if rects_overlap(n.s_rect, self._drag_rect)]
-                    selected_comps = [c for c in self._compartments
-                                      if rects_overlap(c.rect, self._drag_rect)]
-                    selected_rxns = [re.reaction for re in self._reaction_elements
-                                     if rects_overlap(circle_bounds(
-                                         re.bezier.real_center, rxn_radius),
-                                         self._drag_rect)]
-                    new_drag_sel_nodes_idx = set(n.index for n in selected_nodes)
-                    new_drag_sel_rxns_idx = set(r.index for r in selected_rxns)
-                    new_drag_sel_comps_idx = set(c.index for c in selected_comps)
-
-                    reactions_updated = new_drag_sel_rxns_idx != self.drag_sel_rxns_idx
+                    # Query both the old and the new rectangle, so that we also get the reactions
+                    # that are no longer selected
+                    candidates = self._spatial_index.query_rect(self._drag_rect)
+                    candidates |= self._spatial_index.query_rect(old_drag_rect)
+                    new_drag_sel_nodes_idx = set()
+                    new_drag_sel_rxns_idx = set()
+                    new_drag_sel_comps_idx = set()
+                    rxn_elts: Dict[int, ReactionElement] = dict()
+                    for el in candidates:
+                        if isinstance(el, NodeElement):
+                            if rects_overlap(el.node.s_rect, self._drag_rect):
+                                new_drag_sel_nodes_idx.add(el.node.index)
+                        elif isinstance(el, CompartmentElt):
+                            if rects_overlap(el.compartment.rect, self._drag_rect):
+                                new_drag_sel_comps_idx.add(el.compartment.index)
+                        elif isinstance(el, ReactionCenter):
+                            rxn_el = el.parent
+                            rxn_elts[rxn_el.reaction.index] = rxn_el
+                            if rects_overlap(circle_bounds(rxn_el.bezier.real_center, rxn_radius),
+                                             self._drag_rect):
+                                new_drag_sel_rxns_idx.add(rxn_el.reaction.index)
+
+                    changed_rxns = new_drag_sel_rxns_idx ^ self.drag_sel_rxns_idx
                     if (new_drag_sel_nodes_idx != self.drag_sel_nodes_idx or
-                            reactions_updated or
+                            changed_rxns or
                             new_drag_sel_comps_idx != self.drag_sel_comps_idx):
                         self.drag_sel_nodes_idx = new_drag_sel_nodes_idx
                         self.drag_sel_rxns_idx = new_drag_sel_rxns_idx
                         self.drag_sel_comps_idx = new_drag_sel_comps_idx
                         self._UpdateSelectedLists()
 
-                    if reactions_updated:
-                        # If drag selected reactions changed, then update reaction selection state.
-                        all_selected = self.drag_sel_rxns_idx | self.sel_reactions_idx.item_copy()
-                        for rel in self._reaction_elements:
-                            rel.selected = rel.reaction.index in all_selected
+                    # Update the selection state of only the reactions that entered or left
+                    for rxni in changed_rxns:
+                        if rxni in rxn_elts:
+                            rxn_el = rxn_elts[rxni]
+                            rxn_el.selected = (rxni in self.drag_sel_rxns_idx or
+                                               self.sel_reactions_idx.contains(rxni))
+                            self._InvalidateRects(e.paint_rect() for e in chain(
+                                [rxn_el], self._GetReactionWidgets(rxn_el)))
                 elif cstate.input_mode == InputMode.ADD_COMPARTMENTS:
                     pass
                 redraw = True
@@ -1360,8 +1378,10 @@ class Canvas(wx.ScrolledWindow):
             if evt.leftIsDown:  # dragging
                 if self.dragged_element is not None:
                     rel_pos = logical_pos - self._last_drag_pos
-                    if self.dragged_element.on_mouse_drag(logical_pos, rel_pos):
-                        redraw = True
+                    # deliver the events of this drag frame to the batched handlers at once
+                    with batch_events():
+                        if self.dragged_element.on_mouse_drag(logical_pos, rel_pos):
+                            redraw = True
                     self._last_drag_pos = logical_pos
                     # If redrawing, i.e. dragged element moved, return immediately. Otherwise
                     # we need to check if the mouse is still inside the dragged element.
@@ -1387,7 +1407,7 @@ class Canvas(wx.ScrolledWindow):
 
             # Likely hovering on something else
             hovered: Optional[CanvasElement] = None
-            for el in self._ElementsHighToLow():
+            for el in self._ElementsAt(logical_pos):
                 if not el.enabled:
                     continue
                 if el.pos_inside(logical_pos):
@@ -1416,12 +1436,57 @@ class Canvas(wx.ScrolledWindow):
                 self.LazyRefresh()
             evt.Skip()
 
+    def ReloadTheme(self):
+        """Drop everything drawn with the previous theme, after the settings are reloaded."""
+        cstate.resources.clear()
+        self.FullRedraw()
+
     def FullRedraw(self):
         '''Function to signal that the entire canvas needs to be redrawn.'''
-        self._static_bitmap = None
+        self._tile_cache.clear()
         self._dirty = True
         self.LazyRefresh()
 
+    def _InvalidateRects(self, rects: Iterable[Optional[Rect]]):
+        '''Re-render the cached tiles overlapping the given logical rects, and refresh those areas.
+
+        A rect that is None stands for an area of unknown extent, in which case everything is
+        redrawn.
+        '''
+        rects = list(rects)
+        if any(rect is None for rect in rects):
+            self.FullRedraw()
+            return
+
+        tile = self.TILE_SIZE
+        for zoom, tiles in self._tile_cache.items():
+            scale = 1.2 ** zoom  # see SetZoomLevel()
+            for rect in rects:
+                # pad by a pixel for antialiasing
+                device_rect = padded_rect(rect * scale, 1)
+                end = device_rect.position + device_rect.size
+                for tx in range(math.floor(device_rect.position.x) // tile, math.floor(end.x) // tile + 1):
+                    for ty in range(math.floor(device_rect.position.y) // tile,
+                                    math.floor(end.y) // tile + 1):
+                        tiles.pop((tx, ty), None)
+
+        for rect in rects:
+            device_rect = padded_rect(rect * cstate.scale, 2)
+            topleft = Vec2(self.CalcScrolledPosition(device_rect.position.to_wx_point()))
+            self.RefreshRect(Rect(topleft, device_rect.size).to_wx_rect())
+
+    def _UpdateDynamicElements(self):
+        '''Recompute the dynamic elements, re-rendering the tiles of the ones that changed.
+
+        Call this after self.dragged_element changed.
+        '''
+        old_dynamic = self._dynamic_elements
+        self._dynamic_elements = self._GetDynamicElements()
+        # destroyed elements were already invalidated when they were removed
+        self._InvalidateRects(elt.paint_rect() for elt in old_dynamic ^ self._dynamic_elements
+                              if not elt.destroyed)
+        self.LazyRefresh()
+
     def LazyRefresh(self) -> bool:
         now = int(time.time() * 1000)
         diff = now - self._last_refresh
@@ -1465,12 +1530,14 @@ class Canvas(wx.ScrolledWindow):
         gc = wx.GraphicsContext.Create(dc)
         assert gc is not None
 
-        if self._static_bitmap is None:
-            # draw the whole thing
-            self._RedrawDynamicToBuffer()
+        if self._dirty:
+            self._dynamic_elements = self._GetDynamicElements()
+            self._dirty = False
 
-        wpos = Vec2(self.CalcUnscrolledPosition(0, 0))
-        wsize = Vec2(self.GetSize())
+        # only the invalidated part of the window needs to be painted
+        update_box = self.GetUpdateRegion().GetBox()
+        wpos = Vec2(self.CalcUnscrolledPosition(update_box.GetX(), update_box.GetY()))
+        wsize = Vec2(update_box.GetWidth(), update_box.GetHeight())
 
         draw_rect(
             gc,
@@ -1478,17 +1545,16 @@ class Canvas(wx.ScrolledWindow):
             fill=get_theme('canvas_outside_bg'),
         )
 
-        subpos = wpos
-        # sometimes the subbitmap might overflow. need to restrict its size to be within the canvas
-        subsize = Vec2(min(self.realsize.x - subpos.x, wsize.x), min(self.realsize.y - subpos.y, wsize.y))
-        bitmap = self._static_bitmap.GetSubBitmap(wx.Rect(int(subpos.x), int(subpos.y), int(subsize.x), int(subsize.y)))
-        gc.DrawBitmap(bitmap, wpos.x, wpos.y, bitmap.GetWidth(), bitmap.GetHeight())
+        tiles = self._GetVisibleTiles(Rect(wpos, wsize))
+        for (tx, ty), bitmap in tiles.items():
+            gc.DrawBitmap(bitmap, tx * self.TILE_SIZE, ty * self.TILE_SIZE, bitmap.GetWidth(),
+                          bitmap.GetHeight())
         # draw dynamic elements
         gc.PushState()
         gc.Scale(cstate.scale, cstate.scale)
-        for elt in self._ElementsLowToHigh():
-            if elt in self._dynamic_elements and elt.enabled:
-                # draw to static buffer
+        viewport = Rect(wpos / cstate.scale, wsize / cstate.scale)
+        for elt in sorted(self._dynamic_elements, key=self._PaintOrder):
+            if elt.enabled and self._MayPaintInside(elt, viewport):
                 elt.on_paint(gc)
         self.DrawVisualCuesToGC(gc)
         gc.PopState()
@@ -1597,26 +1663,88 @@ class Canvas(wx.ScrolledWindow):
 
         return set(elts)
 
-    def _RedrawDynamicToBuffer(self):
-        self._dynamic_elements = self._GetDynamicElements()
-        # No dynamic elements; simply redraw everything by not populating _static_bitmap
+    def _PaintOrder(self, elt: CanvasElement):
+        """Sort key that orders elements as in _ElementsLowToHigh()."""
+        return (elt in self._widget_elements, elt.layers, self._elt_order.get(elt, -1))
 
-        temp_bitmap = wx.Bitmap(*self.realsize)
-        self._dirty = False
-        dc = wx.MemoryDC()
-        dc.SelectObject(temp_bitmap)
-        gc: wx.GraphicsContext = wx.GraphicsContext.Create(dc)
+    @staticmethod
+    def _MayPaintInside(elt: CanvasElement, rect: Rect) -> bool:
+        paint_rect = elt.paint_rect()
+        return paint_rect is None or rects_overlap(paint_rect, rect)
 
-        self.DrawBackgroundToGC(gc)
-        gc.PushState()
-        gc.Scale(cstate.scale, cstate.scale)
-        for elt in self._ElementsLowToHigh():
-            if elt not in self._dynamic_elements and elt.enabled:
-                # draw to static buffer
-                elt.on_paint(gc)
-        gc.PopState()
+    def _GetVisibleTiles(self, device_rect: Rect) -> Dict[Tuple[int, int], wx.Bitmap]:
+        """Return the tiles of the static canvas that overlap device_rect, rendering missing ones.
 
-        self._static_bitmap = temp_bitmap
+        device_rect is in unscrolled device coordinates, i.e. logical coordinates times the scale.
+        Tiles are only rendered for the area of the canvas, so the ones on the bottom and right
+        edges may be smaller than TILE_SIZE.
+        """
+        tile = self.TILE_SIZE
+        vsize = (self.realsize * cstate.scale).map(math.ceil)
+        end = (device_rect.position + device_rect.size).reduce2(min, vsize)
+        start = device_rect.position.map(lambda e: max(e, 0))
+        if end.x <= start.x or end.y <= start.y:
+            return dict()
+        positions = [(tx, ty)
+                     for tx in range(int(start.x) // tile, (math.ceil(end.x) - 1) // tile + 1)
+                     for ty in range(int(start.y) // tile, (math.ceil(end.y) - 1) // tile + 1)]
+
+        tiles = self._tile_cache.pop(self._zoom_level, dict())
+        # re-insert so that the current zoom level is the most recently used one
+        self._tile_cache[self._zoom_level] = tiles
+        missing = [pos for pos in positions if pos not in tiles]
+        if missing:
+            self._RenderTiles(tiles, missing, vsize)
+            self._TrimTileCache(set(positions))
+        return {pos: tiles[pos] for pos in positions}
+
+    def _RenderTiles(self, tiles: Dict[Tuple[int, int], wx.Bitmap], positions: List[Tuple[int, int]],
+                     vsize: Vec2):
+        """Render the static elements onto the tiles at the given positions."""
+        tile = self.TILE_SIZE
+        scale = cstate.scale
+
+        def tile_rect(pos: Tuple[int, int]) -> Rect:
+            topleft = Vec2(pos) * tile
+            return Rect(topleft, (topleft + Vec2.repeat(tile)).reduce2(min, vsize) - topleft)
+
+        # cull the elements once against the area of all the tiles, then against each tile
+        area = get_bounding_rect([tile_rect(pos) for pos in positions]) * (1 / scale)
+        elts = [(elt, elt.paint_rect()) for elt in self._ElementsLowToHigh()
+                if elt not in self._dynamic_elements and elt.enabled]
+        elts = [(elt, rect) for elt, rect in elts if rect is None or rects_overlap(rect, area)]
+
+        for pos in positions:
+            device_rect = tile_rect(pos)
+            logical_rect = device_rect * (1 / scale)
+            bitmap = wx.Bitmap(int(device_rect.size.x), int(device_rect.size.y))
+            dc = wx.MemoryDC()
+            dc.SelectObject(bitmap)
+            gc: wx.GraphicsContext = wx.GraphicsContext.Create(dc)
+            gc.Translate(-device_rect.position.x, -device_rect.position.y)
+            gc.Scale(scale, scale)
+            self.DrawBackgroundToGC(gc)
+            for elt, rect in elts:
+                if rect is None or rects_overlap(rect, logical_rect):
+                    elt.on_paint(gc)
+            del gc
+            dc.SelectObject(wx.NullBitmap)
+            tiles[pos] = bitmap
+
+    def _TrimTileCache(self, keep: Set[Tuple[int, int]]):
+        """Drop the least recently used zoom levels, then tiles not in keep, down to the limit."""
+        count = sum(len(tiles) for tiles in self._tile_cache.values())
+        for zoom in list(self._tile_cache):
+            if count <= self.MAX_CACHED_TILES or zoom == self._zoom_level:
+                break
+            count -= len(self._tile_cache.pop(zoom))
+        tiles = self._tile_cache[self._zoom_level]
+        for pos in list(tiles):
+            if count <= self.MAX_CACHED_TILES:
+                break
+            if pos not in keep:
+                del tiles[pos]
+                count -= 1
 
     def _DrawCompartmentHighlight(self, gc: wx.GraphicsContext):
         # TODO this is not model
@@ -1722,14 +1850,19 @@ class Canvas(wx.ScrolledWindow):
         self._DrawDragSelectionRect(gc)
 
     def ResetLayer(self, elt: CanvasElement, layers: Layer):
+        # the element may now be painted above or below its neighbours
+        self._InvalidateRects([elt.paint_rect()])
         if elt in self._model_elements:
             self._model_elements.remove(elt)
             elt.set_layers(layers)
             self._model_elements.add(elt)
+            # now last among its new layer
+            self._elt_order[elt] = next(self._elt_counter)
         elif elt in self._widget_elements:
             self._widget_elements.remove(elt)
             elt.set_layers(layers)
             self._widget_elements.add(elt)
+            self._elt_order[elt] = next(self._elt_counter)
 
     def GetSelectedNodes(self, copy=False) -> List[Node]:
         """Get the list of selected nodes using self.sel_nodes_idx."""
@@ -1814,9 +1947,13 @@ class Canvas(wx.ScrolledWindow):
             if len(sel_node_idx) + len(sel_rxn_idx) + len(sel_comp_idx) != orig_count:
                 self.drawing_drag = True
 
-        self.sel_nodes = [n for n in self._nodes if n.index in sel_node_idx]
-        self.sel_reactions = [r for r in self._reactions if r.index in sel_rxn_idx]
-        self.sel_comps = [c for c in self._compartments if c.index in sel_comp_idx]
+        # Look up by index, since the selection is usually much smaller than the network
+        self.sel_nodes = [self.node_idx_map[i] for i in sorted(sel_node_idx)
+                          if i in self.node_idx_map]
+        self.sel_reactions = [self.reaction_idx_map[i] for i in sorted(sel_rxn_idx)
+                              if i in self.reaction_idx_map]
+        self.sel_comps = [self.comp_idx_map[i] for i in sorted(sel_comp_idx)
+                          if i in self.comp_idx_map]
 
     def _SelectionChanged(self):
         """Callback passed to observer for when the node/reaction selection has changed."""
@@ -1826,12 +1963,18 @@ class Canvas(wx.ScrolledWindow):
         node_idx = self.sel_nodes_idx.item_copy()
         rxn_idx = self.sel_reactions_idx.item_copy()
         comp_idx = self.sel_compartments_idx.item_copy()
+        dirty = [self._select_box.paint_rect()]
         # Directly update select_box here, instead of binding to a handler
         self._select_box.update([n for n in self._nodes if n.index in node_idx],
                                 [c for c in self._compartments if c.index in comp_idx])
         self._UpdateSelectBoxLayer()
+        dirty.append(self._select_box.paint_rect())
         for rel in self._reaction_elements:
-            rel.selected = self.sel_reactions_idx.contains(rel.reaction.index)
+            selected = self.sel_reactions_idx.contains(rel.reaction.index)
+            if rel.selected != selected:
+                rel.selected = selected
+                dirty += [e.paint_rect() for e in chain([rel], self._GetReactionWidgets(rel))]
+        self._InvalidateRects(dirty)
         post_event(SelectionDidUpdateEvent(node_indices=node_idx, reaction_indices=rxn_idx,
                                            compartment_indices=comp_idx))
         cstate.input_mode = cstate.input_mode
@@ -2036,12 +2179,15 @@ class Canvas(wx.ScrolledWindow):
         # TODO currently not accounting for net_index
         self._plugin_elements.add(element)
         self._widget_elements.add(element)
+        self._elt_order[element] = next(self._elt_counter)
+        self._InvalidateRects([element.paint_rect()])
 
     def RemovePluginElement(self, net_index: int, element: CanvasElement):
         if element not in self._plugin_elements:
             raise ValueError("Tried to remove an element that is not on canvas.")
         self._plugin_elements.remove(element)
         self._widget_elements.remove(element)
+        self._InvalidateRects([element.paint_rect()])
 
     def GetReactionCentroids(self, net_index: int) -> Dict[int, Vec2]:
         """Helper method for ReactionForm to get access to the centroid positions.
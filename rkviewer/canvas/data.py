@@ -11,13 +11,13 @@ from math import factorial, pi, sin, cos
 from operator import mul
 from itertools import chain
 import numpy as np
-from typing import Any, Callable, ClassVar, Container, List, NamedTuple, Optional, Sequence, Set, Tuple, cast
+from typing import Any, Callable, ClassVar, Container, Hashable, List, NamedTuple, Optional, Sequence, Set, Tuple, cast
 from collections import namedtuple
 
-from .geometry import Vec2, Rect, get_bounding_rect, padded_rect, pt_in_circle, pt_on_line, rotate_unit, segment_rect_intersection, segments_intersect
+from .geometry import Vec2, Rect, get_bounding_rect, padded_rect, pt_in_circle, pt_on_segments, rotate_unit, segment_rect_intersection, segments_intersect
 from .state import cstate
 from ..config import get_setting, get_theme, Color, Font
-from ..utils import gchain, pairwise
+from ..utils import gchain
 
 
 MAXSEGS = 8  # Number of segments used to construct bezier
@@ -177,6 +177,25 @@ class CompositeShape:
     def __copy__(self):
         return CompositeShape(copy.deepcopy(self.items), copy.deepcopy(self.text_item), self.name)
 
+    def style_key(self) -> Hashable:
+        """Return a hashable key that is equal for shapes whose primitives (not including the text)
+        look the same."""
+        return tuple((_style_value(prim), _style_value(tf)) for prim, tf in self.items)
+
+
+def _style_value(value: Any) -> Hashable:
+    """Convert a primitive, or one of its fields, into something hashable for style_key()."""
+    if isinstance(value, Vec2):
+        return value.as_tuple()
+    elif isinstance(value, Color):
+        return (value.r, value.g, value.b, value.a)
+    elif isinstance(value, tuple):
+        return tuple(_style_value(v) for v in value)
+    elif hasattr(value, '__dataclass_fields__'):
+        return (type(value),) + tuple(_style_value(getattr(value, f))
+                                      for f in value.__dataclass_fields__)
+    return value
+
 
 class PrimitiveFactory:
     '''Factory that produces primitives.
@@ -470,16 +489,13 @@ class Reaction:
 def paint_handle(gc: wx.GraphicsContext, base: Vec2, handle: Vec2, hovering: bool):
     """Paint the handle as given by its base and tip positions, highlighting it if hovering."""
     c = get_theme('highlighted_handle_color') if hovering else get_theme('handle_color')
-    brush = wx.Brush(c)
-    pen = gc.CreatePen(wx.GraphicsPenInfo(c))
-
-    gc.SetPen(pen)
+    gc.SetPen(cstate.resources.pen(gc, c))
 
     # Draw handle lines
     gc.StrokeLine(*base, *handle)
 
     # Draw handle circles
-    gc.SetBrush(brush)
+    gc.SetBrush(cstate.resources.brush(gc, c))
     gc.DrawEllipse(handle.x - HANDLE_RADIUS, handle.y - HANDLE_RADIUS,
                    2 * HANDLE_RADIUS, 2 * HANDLE_RADIUS)
 
@@ -530,7 +546,7 @@ class SpeciesBezier:
     handle: HandleData
     centroid_handle: HandleData
     is_source: bool
-    bezier_points: List[Vec2]
+    bezier_points: np.ndarray  #: (MAXSEGS + 1, 2) array of the points along the curve.
     real_center: Vec2
     thickness: float
     _extended_handle: Vec2
@@ -547,7 +563,7 @@ class SpeciesBezier:
         self.handle = handle
         self.centroid_handle = centroid_handle
         self.is_source = is_source
-        self.bezier_points = [Vec2() for _ in range(MAXSEGS + 1)]
+        self.bezier_points = np.zeros((MAXSEGS + 1, 2))
         self._collision_dirty = True
         self._paint_dirty = True
         self.update_curve(real_center)
@@ -564,11 +580,9 @@ class SpeciesBezier:
 
     def get_bounding_rect(self) -> Rect:
         self._recompute(True)
-        top = min(pt.y for pt in self.bezier_points)
-        bottom = max(pt.y for pt in self.bezier_points)
-        left = min(pt.x for pt in self.bezier_points)
-        right = max(pt.x for pt in self.bezier_points)
-        return Rect(Vec2(left, top), Vec2(right - left, bottom - top))
+        left, top = self.bezier_points.min(axis=0)
+        right, bottom = self.bezier_points.max(axis=0)
+        return Rect(Vec2(float(left), float(top)), Vec2(float(right - left), float(bottom - top)))
 
     def _recompute(self, for_collision: bool):
         """Recompute everything that could have changed.
@@ -578,43 +592,12 @@ class SpeciesBezier:
         on them).
         """
         if self._collision_dirty or self._paint_dirty:
-            # STEP 1, get intersection between handle and node outer padding
-            node_center = self.node_rect.position + self.node_rect.size / 2
-
-            # add a padding to node, so that the Bezier curve starts outside the node. The portion
-            # of the handle within this is not drawn
-            outer_rect = padded_rect(self.node_rect, NODE_EDGE_GAP_DISTANCE)
-
-            self.node_intersection = None
-            # extend handle to make sure that an intersection is found between the handle and the
-            # node rectangle sides. We're essentially making the handle a ray.
-            longer_side = max(outer_rect.size.x, outer_rect.size.y)
-            long_dist = (longer_side + NODE_EDGE_GAP_DISTANCE) * 10
-
-            other_point = self.handle.tip if self.bezierCurves else self.real_center
-            handle_diff = other_point - node_center
-            if handle_diff.norm_sq <= 1e-6:
-                # if norm is too small, make it a hardcoded value to avoid zero vectors
-                handle_diff = Vec2(0, 1)
-            self._extended_handle = node_center + handle_diff.normalized(long_dist)
-            handle_segment = (node_center, self._extended_handle)
-            # check for intersection on the side
-            self.node_intersection = segment_rect_intersection(handle_segment, outer_rect)
-
-            assert self.node_intersection is not None
+            self._recompute_intersection()
 
         if for_collision:
             # STEP 2, recompute Bezier curve
             if self._collision_dirty:
-                for i in range(MAXSEGS+1):
-                    tmp = Vec2()
-                    for j, point in enumerate((self.node_intersection, self.handle.tip,
-                                               self.centroid_handle.tip, self.real_center)):
-                        tmp += point * float(BezJ[i, j])
-
-                    # and scale back down again
-                    self.bezier_points[i] = tmp
-
+                self.bezier_points = BezJ[:, :4] @ self._control_points()
                 self._collision_dirty = False
         else:
             # STEP 3, recompute arrow tip
@@ -624,6 +607,50 @@ class SpeciesBezier:
                     self._recompute_arrow_tip(self.node_intersection,
                                               self.node_intersection - self._extended_handle)
 
+    def _recompute_intersection(self):
+        """STEP 1 of _recompute(), get intersection between handle and node outer padding."""
+        node_center = self.node_rect.position + self.node_rect.size / 2
+
+        # add a padding to node, so that the Bezier curve starts outside the node. The portion
+        # of the handle within this is not drawn
+        outer_rect = padded_rect(self.node_rect, NODE_EDGE_GAP_DISTANCE)
+
+        self.node_intersection = None
+        # extend handle to make sure that an intersection is found between the handle and the
+        # node rectangle sides. We're essentially making the handle a ray.
+        longer_side = max(outer_rect.size.x, outer_rect.size.y)
+        long_dist = (longer_side + NODE_EDGE_GAP_DISTANCE) * 10
+
+        other_point = self.handle.tip if self.bezierCurves else self.real_center
+        handle_diff = other_point - node_center
+        if handle_diff.norm_sq <= 1e-6:
+            # if norm is too small, make it a hardcoded value to avoid zero vectors
+            handle_diff = Vec2(0, 1)
+        self._extended_handle = node_center + handle_diff.normalized(long_dist)
+        handle_segment = (node_center, self._extended_handle)
+        # check for intersection on the side
+        self.node_intersection = segment_rect_intersection(handle_segment, outer_rect)
+
+        assert self.node_intersection is not None
+
+    def _control_points(self) -> np.ndarray:
+        """Return the (4, 2) array of the control points of the curve."""
+        return np.array([(p.x, p.y) for p in (self.node_intersection, self.handle.tip,
+                                              self.centroid_handle.tip, self.real_center)],
+                        dtype=float)
+
+    def collision_segments(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the start and end points of the segments tested by is_on_curve().
+
+        Note that this assumes the curve is up to date, i.e. _recompute(True) has been called.
+        """
+        if self.bezierCurves:
+            return self.bezier_points[:-1], self.bezier_points[1:]
+        else:
+            assert self.node_intersection is not None
+            return (np.array([(self.node_intersection.x, self.node_intersection.y)], dtype=float),
+                    np.array([(self.real_center.x, self.real_center.y)], dtype=float))
+
     def arrow_tip_changed(self):
         self._paint_dirty = True
 
@@ -655,15 +682,8 @@ class SpeciesBezier:
     def is_on_curve(self, pos: Vec2) -> bool:
         """Check if position is on curve; pos is scaled logical position."""
         self._recompute(for_collision=True)
-        if self.bezierCurves:
-            return any(pt_on_line(p1, p2, pos,
-                                  CURVE_SLACK + self.thickness / 2)
-                       for p1, p2 in pairwise(self.bezier_points))
-        else:
-            assert self.node_intersection is not None
-            return pt_on_line(self.node_intersection,
-                              self.real_center, pos,
-                              CURVE_SLACK + self.thickness / 2)
+        starts, ends = self.collision_segments()
+        return bool(pt_on_segments(starts, ends, pos, CURVE_SLACK + self.thickness / 2).any())
 
     def do_paint(self, gc: wx.GraphicsContext, fill: wx.Colour, selected: bool):
         self._recompute(for_collision=False)
@@ -674,9 +694,7 @@ class SpeciesBezier:
         else:
             rxn_color = fill
 
-        pen = gc.CreatePen(wx.GraphicsPenInfo(rxn_color).Width(self.thickness))
-
-        gc.SetPen(pen)
+        gc.SetPen(cstate.resources.pen(gc, rxn_color, self.thickness))
         # gc.StrokeLines([wx.Point2D(*(p * cstate.scale)) for p in self.bezier_points])
         path = gc.CreatePath()
         points = [p for p in (self.node_intersection,
@@ -702,8 +720,8 @@ class SpeciesBezier:
     def paint_arrow_tip(self, gc: wx.GraphicsContext, fill: wx.Colour):
         assert len(self.arrow_adjusted_coords) == 4, \
             "Arrow adjusted coords is not of length 4: {}".format(self.arrow_adjusted_coords)
-        gc.SetPen(gc.CreatePen(wx.GraphicsPenInfo(fill)))
-        gc.SetBrush(wx.Brush(fill))
+        gc.SetPen(cstate.resources.pen(gc, fill))
+        gc.SetBrush(cstate.resources.brush(gc, fill))
         gc.DrawLines([wx.Point2D(*(coord))
                       for coord in self.arrow_adjusted_coords])
 
@@ -780,7 +798,31 @@ class ReactionBezier:
 
         pos is the logical position of the mouse (and not multiplied by any scale).
         """
-        return any(bz.is_on_curve(pos) for bz in chain(self.src_beziers, self.dest_beziers))
+        beziers = list(chain(self.src_beziers, self.dest_beziers))
+        self._recompute_curves(beziers)
+        segments = [bz.collision_segments() for bz in beziers]
+        thresholds = [np.full(len(starts), CURVE_SLACK + bz.thickness / 2)
+                      for bz, (starts, _) in zip(beziers, segments)]
+        return bool(pt_on_segments(np.concatenate([starts for starts, _ in segments]),
+                                   np.concatenate([ends for _, ends in segments]), pos,
+                                   np.concatenate(thresholds)).any())
+
+    @staticmethod
+    def _recompute_curves(beziers: List[SpeciesBezier]):
+        """Recompute the curve points of all the given species curves that are out of date.
+
+        This is the same as calling _recompute(True) on each of them, but with a single matrix
+        product for all the curves.
+        """
+        dirty = [bz for bz in beziers if bz._collision_dirty]
+        if not dirty:
+            return
+        for bz in dirty:
+            bz._recompute_intersection()
+        points = np.einsum('ij,kjd->kid', BezJ[:, :4], np.stack([bz._control_points() for bz in dirty]))
+        for bz, bz_points in zip(dirty, points):
+            bz.bezier_points = bz_points
+            bz._collision_dirty = False
 
     def src_handle_moved(self):
         """Special callback for when the source centroid handle is moved."""
@@ -813,9 +855,28 @@ class ReactionBezier:
         for bz in chain(self.src_beziers, self.dest_beziers):
             bz.do_paint(gc, fill, selected)
 
+    def do_paint_lod(self, gc: wx.GraphicsContext, fill: wx.Colour, selected: bool):
+        """Paint the reaction as straight lines from the species to the center, with no arrow tips.
+
+        This is the level-of-detail version of do_paint(), used when the canvas is zoomed out far
+        enough that the curves cannot be told apart. All the lines are stroked as a single path.
+        """
+        rxn_color = get_theme('selected_reaction_fill') if selected else fill
+        gc.SetPen(cstate.resources.pen(gc, rxn_color, self.reaction.thickness))
+        center = self.real_center
+        path = gc.CreatePath()
+        for bz in chain(self.src_beziers, self.dest_beziers):
+            bz._recompute(for_collision=False)
+            path.MoveToPoint(*bz.node_intersection)
+            path.AddLineToPoint(*center)
+            if selected:
+                bz.handle.base = bz.node_intersection
+        gc.StrokePath(path)
+
     def get_bounding_rect(self):
-        return get_bounding_rect(
-            list(sb.get_bounding_rect() for sb in chain(self.src_beziers, self.dest_beziers)))
+        beziers = list(chain(self.src_beziers, self.dest_beziers))
+        self._recompute_curves(beziers)
+        return get_bounding_rect(list(sb.get_bounding_rect() for sb in beziers))
 
 
 @dataclass
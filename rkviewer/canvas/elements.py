@@ -4,7 +4,7 @@ from abc import abstractmethod
 import enum
 from functools import partial
 from itertools import chain
-from math import pi, cos, sin
+from math import ceil, floor, pi, cos, sin
 from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union, cast
 from copy import copy
 
@@ -21,10 +21,11 @@ from ..events import (
 )
 from ..mvc import IController
 from ..utils import change_opacity, even_round, gchain, int_round
-from .data import Compartment, HandleData, ModifierTipStyle, Node, Reaction, ReactionBezier, RectData, SpeciesBezier, PolygonPrim, TextAlignment, TextPosition
+from .data import CURVE_SLACK, NODE_EDGE_GAP_DISTANCE, TIP_DISPLACEMENT, Compartment, HandleData, ModifierTipStyle, Node, Reaction, ReactionBezier, RectData, SpeciesBezier, PolygonPrim, TextAlignment, TextPosition
 from .geometry import (
     Rect,
     Vec2,
+    circle_bounds,
     clamp_point, clamp_rect_pos,
     get_bounding_rect,
     padded_rect,
@@ -32,6 +33,7 @@ from .geometry import (
     pt_in_rect, rotate_unit, segment_rect_intersection,
     pt_on_rect_sides,
 )
+from .resources import FontKey
 from .state import InputMode, cstate
 from .utils import draw_rect
 
@@ -127,6 +129,26 @@ class CanvasElement:
         """Return the bounding rectangle of the element."""
         return Rect(Vec2(), Vec2())
 
+    def hit_rect(self) -> Optional[Rect]:
+        """Return a rectangle outside of which pos_inside() is always False.
+
+        This is used by the canvas to index elements for hit-testing. Return None if the element
+        may contain any position, in which case it is always tested.
+        """
+        return None
+
+    def paint_rect(self) -> Optional[Rect]:
+        """Return a rectangle that contains everything on_paint() draws.
+
+        This is used by the canvas to skip painting elements outside of the area being redrawn.
+        Return None if the extent is not known, in which case the element is always painted.
+        """
+        return None
+
+
+# Font selected before a node is painted; the text primitive then sets its own
+DEFAULT_NODE_FONT: FontKey = (10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
+
 
 class NodeElement(CanvasElement):
     """CanvasElement for nodes."""
@@ -138,17 +160,35 @@ class NodeElement(CanvasElement):
         super().__init__(layers)
         self.node = node
         self.canvas = canvas
-        self.gfont = None  # In the future
-        self.font_scale = 1
+        self._style_key = None
 
     def pos_inside(self, logical_pos: Vec2) -> bool:
         return pt_in_rect(logical_pos, self.node.s_rect)
 
+    def _paint_sprite(self, gc: wx.GraphicsContext):
+        """Blit the cached sprite of the node body, shared by all nodes that look the same.
+
+        The node (and so its shape) is replaced whenever one of its properties changes, including
+        its shape and primitive properties, so the key only needs to be computed once.
+        """
+        if self._style_key is None:
+            self._style_key = self.node.composite_shape.style_key()
+        scale = cstate.scale
+        is_alias = self.node.original_index != -1
+        key = (self._style_key, self.node.size.as_tuple(), is_alias, scale)
+        bitmap = cstate.resources.sprite(key, lambda: render_node_sprite(self.node, scale))
+        # snap to whole device pixels so that the sprite is not resampled
+        pad = sprite_padding(self.node.composite_shape)
+        origin = (self.node.position - Vec2.repeat(pad)) * scale
+        gc.DrawBitmap(bitmap, floor(origin.x) / scale, floor(origin.y) / scale,
+                      bitmap.GetWidth() / scale, bitmap.GetHeight() / scale)
+
     def on_paint(self, gc: wx.GraphicsContext):
-        if self.gfont is None or self.font_scale != cstate.scale:
-            font = wx.Font(wx.FontInfo(10))
-            self.gfont = gc.CreateFont(font, wx.BLACK)
-        gc.SetFont(self.gfont)
+        if lod_active():
+            draw_flat_node(gc, self.node)
+            return
+
+        gc.SetFont(cstate.resources.font(gc, DEFAULT_NODE_FONT, wx.BLACK))
 
         # boundaryFactor = 1
         # if not self.node.floatingNode:
@@ -160,25 +200,25 @@ class NodeElement(CanvasElement):
         width, height = s_aligned_rect.size
 
         assert self.node.composite_shape is not None
-        draw_composite_shape(
-            gc,
-            self.node.rect,
-            self.node)
+        if get_theme('node_sprites'):
+            self._paint_sprite(gc)
+            draw_node_text(gc, self.node.rect, self.node)
+        else:
+            draw_composite_shape(
+                gc,
+                self.node.rect,
+                self.node)
 
         if self.node.lockNode:
             lock_color = self.node.border_color or Color(255, 0, 0)
-            pen = gc.CreatePen(wx.GraphicsPenInfo(
-                lock_color.to_wxcolour()).Width(2))
-            gc.SetPen(pen)
+            gc.SetPen(cstate.resources.pen(gc, lock_color.to_wxcolour(), 2))
             path = gc.CreatePath()
             path.AddCircle(self.node.position.x, self.node.position.y, .1*height)
             gc.StrokePath(path)
 
         if not self.node.floatingNode:
             boundary_color = self.node.border_color or Color(255, 0, 0)
-            pen = gc.CreatePen(wx.GraphicsPenInfo(
-                boundary_color.to_wxcolour()).Width(2))
-            gc.SetPen(pen)
+            gc.SetPen(cstate.resources.pen(gc, boundary_color.to_wxcolour(), 2))
             path = gc.CreatePath()
             path.AddRectangle(self.node.position.x-round(self.node.border_width/2 + 2)-2,
                               self.node.position.y-round(self.node.border_width/2 + 2)-2,
@@ -192,6 +232,21 @@ class NodeElement(CanvasElement):
     def bounding_rect(self) -> Rect:
         return self.node.rect
 
+    def hit_rect(self) -> Optional[Rect]:
+        return self.node.s_rect
+
+    def paint_rect(self) -> Optional[Rect]:
+        shape = self.node.composite_shape
+        text_prim = shape.text_item[0]
+        if text_prim.position != TextPosition.IN_NODE:
+            # text outside the node is drawn in full, so its extent depends on the font
+            return None
+        rect = self.node.rect
+        boxes = [rect] + [Rect(rect.position + rect.size.elem_mul(tf.translation),
+                               rect.size.elem_mul(tf.scale)) for _, tf in shape.items]
+        # leave room for the borders, the outline of non-floating nodes and tall text
+        return get_bounding_rect(boxes, self.node.border_width + text_prim.font_size + 4)
+
 
 class BezierHandle(CanvasElement):
     """Class that keeps track of a Bezier control handle tip.
@@ -230,20 +285,26 @@ class BezierHandle(CanvasElement):
     def pos_inside(self, logical_pos: Vec2):
         return pt_in_circle(logical_pos, BezierHandle.HANDLE_RADIUS, self.data.tip)
 
-    def _paint(self, gc: wx.GraphicsContext, handle_color: wx.Colour):
-        brush = wx.Brush(handle_color)
-        pen = gc.CreatePen(wx.GraphicsPenInfo(handle_color))
+    def hit_rect(self) -> Optional[Rect]:
+        return circle_bounds(self.data.tip, BezierHandle.HANDLE_RADIUS)
+
+    def paint_rect(self) -> Optional[Rect]:
+        if self.data.base is None:
+            return None
+        return get_bounding_rect([Rect(self.data.base, Vec2()),
+                                  circle_bounds(self.data.tip, BezierHandle.HANDLE_RADIUS)], 2)
 
+    def _paint(self, gc: wx.GraphicsContext, handle_color: wx.Colour):
         sbase = self.data.base
         stip = self.data.tip
 
-        gc.SetPen(pen)
+        gc.SetPen(cstate.resources.pen(gc, handle_color))
 
         # Draw handle lines
         gc.StrokeLine(*sbase, *stip)
 
         # Draw handle circles
-        gc.SetBrush(brush)
+        gc.SetBrush(cstate.resources.brush(gc, handle_color))
         gc.DrawEllipse(stip.x - BezierHandle.HANDLE_RADIUS,
                         stip.y - BezierHandle.HANDLE_RADIUS,
                         2 * BezierHandle.HANDLE_RADIUS, 2 * BezierHandle.HANDLE_RADIUS)
@@ -301,10 +362,8 @@ class ReactionCenter(CanvasElement):
         self.hovering = False
 
     def _paint(self, gc: wx.GraphicsContext, color: wx.Colour):
-        pen = wx.Pen(color)
-        brush = wx.Brush(color)
-        gc.SetPen(pen)
-        gc.SetBrush(brush)
+        gc.SetPen(cstate.resources.pen(gc, color))
+        gc.SetBrush(cstate.resources.brush(gc, color))
         radius = get_theme('reaction_radius')
         center = self.parent.bezier.real_center - Vec2.repeat(radius)
         gc.DrawEllipse(center.x, center.y, radius * 2, radius * 2)
@@ -366,6 +425,12 @@ class ReactionCenter(CanvasElement):
         radius = get_theme('reaction_radius')
         return Rect(self.parent.bezier.real_center - radius, Vec2.repeat(radius) * 2)
 
+    def hit_rect(self) -> Optional[Rect]:
+        return circle_bounds(self.parent.bezier.real_center, get_theme('reaction_radius'))
+
+    def paint_rect(self) -> Optional[Rect]:
+        return circle_bounds(self.parent.bezier.real_center, get_theme('reaction_radius') + 2)
+
 
 # Uniquely identifies nodes in a reaction: (regular node index; whether the node is a reactant)
 RIndex = Tuple[int, bool]
@@ -399,7 +464,9 @@ class ReactionElement(CanvasElement):
         self.reaction = reaction
         self.containing_node_indices = set(chain(reaction.sources, reaction.targets))
         self.bezier = bezier
-        self.moved_handler_id = bind_handler(DidMoveNodesEvent, self.nodes_moved)
+        # only receive the moves of the nodes of this reaction
+        self.moved_handler_id = bind_handler(DidMoveNodesEvent, self.nodes_moved,
+                                             keys=self.containing_node_indices)
         # i is 0 for source Beziers, but 1 for dest Beziers. "not" it to get the correct bool.
         self.index_to_bz = {(bz.node_idx, not gi): bz
                             for gi, bz in gchain(bezier.src_beziers,
@@ -537,6 +604,11 @@ class ReactionElement(CanvasElement):
         return True  # Return True so that this can be selected
 
     def on_paint(self, gc: wx.GraphicsContext):
+        if lod_active():
+            self.bezier.do_paint_lod(gc, self.reaction.fill_color, self.selected)
+            self._paint_modifiers_lod(gc)
+            return
+
         self.bezier.do_paint(gc, self.reaction.fill_color, self.selected)
 
         MOD_NODE_PAD = 10
@@ -544,11 +616,9 @@ class ReactionElement(CanvasElement):
         MODIFIER_RADIUS = 3
         TEE_LENGTH = 5
 
-        line_width = get_theme('modifier_line_width')
-        pen = gc.CreatePen(wx.GraphicsPenInfo(get_theme('modifier_line_color')).Width(line_width))
-        brush = gc.CreateBrush(wx.Brush(get_theme('modifier_line_color')))
-        gc.SetPen(pen)
-        gc.SetBrush(brush)
+        line_color = get_theme('modifier_line_color')
+        gc.SetPen(cstate.resources.pen(gc, line_color, get_theme('modifier_line_width')))
+        gc.SetBrush(cstate.resources.brush(gc, line_color))
         # Draw modifier lines
         for modifier in self.reaction.modifiers:
             mod_node = self.canvas.node_idx_map[modifier]
@@ -588,9 +658,40 @@ class ReactionElement(CanvasElement):
             gc.FillPath(path)
             # path.MoveToPoint(0.0, 50.0)
 
+    def _paint_modifiers_lod(self, gc: wx.GraphicsContext):
+        """Draw the modifier lines as plain lines between the centers, with no tips."""
+        if len(self.reaction.modifiers) == 0:
+            return
+        gc.SetPen(cstate.resources.pen(gc, get_theme('modifier_line_color'),
+                                       get_theme('modifier_line_width')))
+        rxn_center = self.bezier.real_center
+        path = gc.CreatePath()
+        for modifier in self.reaction.modifiers:
+            path.MoveToPoint(*self.canvas.node_idx_map[modifier].rect.center_point)
+            path.AddLineToPoint(*rxn_center)
+        gc.StrokePath(path)
+
     def bounding_rect(self) -> Rect:
         return self.bezier.get_bounding_rect()
 
+    def hit_rect(self) -> Optional[Rect]:
+        # Each curve lies within the hull of its control points, and it starts on the padded
+        # node rectangle. This avoids recomputing the curves just to index them.
+        rects = [Rect(self.bezier.real_center, Vec2())]
+        rects += [Rect(h.tip, Vec2()) for h in chain(self.reaction.handles,
+                                                     (self.reaction.src_c_handle,
+                                                      self.reaction.dest_c_handle))]
+        rects += [padded_rect(sb.node_rect, NODE_EDGE_GAP_DISTANCE)
+                  for sb in chain(self.bezier.src_beziers, self.bezier.dest_beziers)]
+        return get_bounding_rect(rects, CURVE_SLACK + self.reaction.thickness / 2)
+
+    def paint_rect(self) -> Optional[Rect]:
+        # the modifier lines end near the modifier nodes, and arrow tips stick out of the curves
+        rects = [self.hit_rect()]
+        rects += [self.canvas.node_idx_map[mi].rect for mi in self.reaction.modifiers]
+        tip_size = max(p.norm for p in cstate.arrow_tip.points) + TIP_DISPLACEMENT
+        return get_bounding_rect(rects, tip_size + get_theme('modifier_line_width'))
+
 
 class CompartmentElt(CanvasElement):
     def __init__(self, compartment: Compartment, major_layer: int, minor_layer: int):
@@ -626,6 +727,12 @@ class CompartmentElt(CanvasElement):
     def bounding_rect(self) -> Rect:
         return self.compartment.rect
 
+    def hit_rect(self) -> Optional[Rect]:
+        return padded_rect(self.compartment.rect, max(int(self.compartment.border_width), 1))
+
+    def paint_rect(self) -> Optional[Rect]:
+        return self.hit_rect()
+
 
 class SelectBox(CanvasElement):
     """Class that represents a select box, i.e. the bounding box draw around the selected nodes.
@@ -874,6 +981,13 @@ class SelectBox(CanvasElement):
                 # convert to device position for drawing
                 draw_rect(gc, handle_rect, fill=get_theme('handle_color'))
 
+    def paint_rect(self) -> Optional[Rect]:
+        if len(self.nodes) + len(self.compartments) == 0:
+            return Rect(Vec2(), Vec2())
+        outline_width = max(even_round(get_theme('select_outline_width')), 2)
+        return padded_rect(self.outline_rect(),
+                           get_theme('select_handle_length') / 2 + outline_width)
+
     def map_rel_pos(self, positions: Iterable[Vec2]) -> List[Vec2]:
         temp = [p - self._orig_rect.position - Vec2.repeat(self._padding)
                 for p in positions]
@@ -1223,26 +1337,20 @@ class SelectBox(CanvasElement):
 
             post_event(DidCommitDragEvent(self))
 
-def primitive_peninfo(color: Color, width: float, is_alias: bool):
-    info = wx.GraphicsPenInfo(color.to_wxcolour(), width)
-    if is_alias:
-        info = info.Style(wx.PENSTYLE_SHORT_DASH)
-    return info
+def primitive_pen(gc: wx.GraphicsContext, color: Color, width: float, is_alias: bool):
+    style = wx.PENSTYLE_SHORT_DASH if is_alias else wx.PENSTYLE_SOLID
+    return cstate.resources.pen(gc, color.to_wxcolour(), width, style)
 
 
-def primitive_brush(color: Color, is_alias: bool):
+def primitive_brush(gc: wx.GraphicsContext, color: Color, is_alias: bool):
     # style = wx.BRUSHSTYLE_FIRST_HATCH if is_alias else wx.BRUSHSTYLE_SOLID
     style = wx.BRUSHSTYLE_SOLID
-    brush = wx.Brush(color.to_wxcolour(), style=style)
-    return brush
+    return cstate.resources.brush(gc, color.to_wxcolour(), style)
 
 
 def draw_circle_to_gc(gc: wx.GraphicsContext, box: Rect, circle: CirclePrim, is_alias: bool):
-    peninfo = primitive_peninfo(circle.border_color, circle.border_width, is_alias)
-    pen = gc.CreatePen(peninfo)
-    brush = gc.CreateBrush(primitive_brush(circle.fill_color, is_alias))
-    gc.SetPen(pen)
-    gc.SetBrush(brush)
+    gc.SetPen(primitive_pen(gc, circle.border_color, circle.border_width, is_alias))
+    gc.SetBrush(primitive_brush(gc, circle.fill_color, is_alias))
     path = gc.CreatePath()
     path.AddEllipse(box.position.x, box.position.y, box.size.x, box.size.y)
     gc.DrawPath(path)
@@ -1257,18 +1365,14 @@ def draw_rect_to_gc(gc: wx.GraphicsContext, box: Rect, rect: RectanglePrim, is_a
         border_width = 0
     else:
         border_width = max(even_round(rect.border_width), 2)
-    pen = gc.CreatePen(primitive_peninfo(rect.border_color, border_width, is_alias))
-    brush = gc.CreateBrush(primitive_brush(rect.fill_color, is_alias))
-    gc.SetPen(pen)
-    gc.SetBrush(brush)
+    gc.SetPen(primitive_pen(gc, rect.border_color, border_width, is_alias))
+    gc.SetBrush(primitive_brush(gc, rect.fill_color, is_alias))
     gc.DrawRoundedRectangle(box.position.x, box.position.y, box.size.x, box.size.y, rect.corner_radius)
 
 
 def draw_polygon_to_gc(gc: wx.GraphicsContext, box: Rect, poly: PolygonPrim, is_alias: bool):
-    pen = gc.CreatePen(primitive_peninfo(poly.border_color, poly.border_width, is_alias))
-    brush = gc.CreateBrush(primitive_brush(poly.fill_color, is_alias))
-    gc.SetPen(pen)
-    gc.SetBrush(brush)
+    gc.SetPen(primitive_pen(gc, poly.border_color, poly.border_width, is_alias))
+    gc.SetBrush(primitive_brush(gc, poly.fill_color, is_alias))
     # offset so polygon is centered at (0.5, 0.5)
     points = [p + Vec2.repeat(0.5) for p in poly.points]
     transformed_pts = [box.position + p.elem_mul(box.size) for p in points]
@@ -1291,7 +1395,56 @@ draw_fn_map: Dict[Any, Any] = {
 #     gc.Scale(*transform.scale)
 
 
+def lod_active() -> bool:
+    """Return whether the canvas is zoomed out past the theme's level-of-detail threshold.
+
+    Below the threshold, nodes are drawn as flat rectangles without text, and reactions as straight
+    lines without arrow tips.
+    """
+    return cstate.scale < get_theme('lod_scale_threshold')
+
+
+def draw_flat_node(gc: wx.GraphicsContext, node: Node):
+    """Draw the node as a rectangle filled with the color of its first filled primitive."""
+    fill = get_theme('node_fill')
+    for primitive, _ in node.composite_shape.items:
+        if getattr(primitive, 'fill_color', None) is not None:
+            fill = primitive.fill_color.to_wxcolour()
+            break
+    gc.SetPen(wx.TRANSPARENT_PEN)
+    gc.SetBrush(cstate.resources.brush(gc, fill))
+    gc.DrawRectangle(*node.position, *node.size)
+
+
+def sprite_padding(shape: CompositeShape) -> float:
+    """Return the margin around the node rectangle that its sprite needs for the borders."""
+    return max((getattr(prim, 'border_width', 0) for prim, _ in shape.items), default=0) + 2
+
+
+def render_node_sprite(node: Node, scale: float) -> wx.Bitmap:
+    """Rasterise the body of the node (see draw_shape_body()) onto a transparent bitmap.
+
+    The bitmap is in device pixels, and it covers the node rectangle padded by sprite_padding().
+    """
+    pad = sprite_padding(node.composite_shape)
+    size = (node.size + Vec2.repeat(2 * pad)) * scale
+    bitmap = wx.Bitmap.FromRGBA(max(ceil(size.x), 1), max(ceil(size.y), 1), 0, 0, 0, 0)
+    dc = wx.MemoryDC(bitmap)
+    gc = wx.GraphicsContext.Create(dc)
+    gc.Scale(scale, scale)
+    draw_shape_body(gc, Rect(Vec2.repeat(pad), node.size), node)
+    del gc
+    dc.SelectObject(wx.NullBitmap)
+    return bitmap
+
+
 def draw_composite_shape(gc: wx.GraphicsContext, bounding_rect: Rect, node: Node):
+    draw_shape_body(gc, bounding_rect, node)
+    draw_node_text(gc, bounding_rect, node)
+
+
+def draw_shape_body(gc: wx.GraphicsContext, bounding_rect: Rect, node: Node):
+    """Draw the primitives of the node's shape, but not its text."""
     shape = node.composite_shape
     gc.PushState()
     # gc.Translate(*(bounding_rect.position.elem_mul(bounding_rect.size)))
@@ -1305,19 +1458,21 @@ def draw_composite_shape(gc: wx.GraphicsContext, bounding_rect: Rect, node: Node
         gc.PopState()
     gc.PopState()
 
+
+def draw_node_text(gc: wx.GraphicsContext, bounding_rect: Rect, node: Node):
     gc.PushState()
     # apply_transform_to_gc(gc, node.composite_shape.text_item[1])
     draw_text_to_gc(gc, bounding_rect, node.id, node.composite_shape.text_item)
     gc.PopState()
 
 
-def _truncate_text(gc: wx.GraphicsContext, max_width: float, text: str):
+def _truncate_text(gc: wx.GraphicsContext, font_key: FontKey, max_width: float, text: str):
     '''Truncate the given text (add ellipsis to the end) so that its width fits inside `max_width`.
 
-    Assume that we are using the currently selected font in gc.
+    Assume that we are using the font given by font_key, which is currently selected in gc.
     '''
 
-    tw, th, _, _ = gc.GetFullTextExtent(text)
+    tw, th = cstate.resources.text_extent(gc, font_key, text)
     # very rough chopping
     if tw > max_width:
         text_len = int((max_width / tw) * len(text))
@@ -1333,20 +1488,16 @@ def _truncate_text(gc: wx.GraphicsContext, max_width: float, text: str):
 def draw_text_to_gc(gc: wx.GraphicsContext, bounding_rect: Rect, full_text_string, text_item: Tuple[TextPrim, Transform]):
     primitive, transform = text_item
 
-    # Maybe cache this?
-    fg_color = primitive.font_color.to_wxcolour()
-    font = wx.Font(wx.FontInfo(primitive.font_size)
-                   .Family(primitive.font_family)
-                   .Style(primitive.font_style)
-                   .Weight(primitive.font_weight))
-    gfont = gc.CreateFont(font, fg_color)
-    gc.SetFont(gfont)
-    brush = gc.CreateBrush(wx.Brush(primitive.bg_color.to_wxcolour()))
+    resources = cstate.resources
+    font_key = (primitive.font_size, primitive.font_family, primitive.font_style,
+                primitive.font_weight)
+    gc.SetFont(resources.font(gc, font_key, primitive.font_color.to_wxcolour()))
+    brush = resources.brush(gc, primitive.bg_color.to_wxcolour())
 
     width, height = bounding_rect.size
-    text_string = _truncate_text(gc, bounding_rect.size.x, full_text_string)
-    tw, th, _, _ = gc.GetFullTextExtent(text_string)
-    tw_full, th_full, _, _ = gc.GetFullTextExtent(full_text_string)
+    text_string = _truncate_text(gc, font_key, bounding_rect.size.x, full_text_string)
+    tw, th = resources.text_extent(gc, font_key, text_string)
+    tw_full, th_full = resources.text_extent(gc, font_key, full_text_string)
 
     # remaining x and y
     rx = width - tw
@@ -8,7 +8,8 @@ import wx
 import copy
 from enum import Enum
 import math
-from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 
 TNum = Union[float, int]
@@ -20,9 +21,9 @@ class Vec2:
     Note:
         Vec2 objects are immutable, meaning one cannot modify elements of the vector.
     """
+    __slots__ = ('_x', '_y')
     _x: TNum
     _y: TNum
-    _i: int
 
     def __init__(self, x=None, y=None):
         """Initialize a 2D vector.
@@ -31,17 +32,14 @@ class Vec2:
         of the Vec2. If only the first argument is given, then it is unpacked as a two-element
         sequence (x, y). Otherweise, if no arguments are given at all, a (0, 0) Vec2 is created.
         """
-
-        self._i = 0
-        if x is None:
-            assert y is None, 'y cannot be set when x is None'
+        if y is not None:
+            self._x = x
+            self._y = y
+        elif x is None:
             self._x = 0
             self._y = 0
-        elif y is None:
-            self._x, self._y = x
         else:
-            self._x = x
-            self._y = y
+            self._x, self._y = x
 
         '''
         for e in (self.x, self.y):
@@ -58,39 +56,28 @@ class Vec2:
     def y(self):
         return self._y
 
-    def __iter__(self) -> 'Vec2':
-        self._i = 0
-        return self
-
-    def __next__(self) -> TNum:
-        if self._i == 0:
-            self._i += 1
-            return self.x
-        elif self._i == 1:
-            self._i += 1
-            return self.y
-        else:
-            raise StopIteration
+    def __iter__(self) -> Iterator[TNum]:
+        return iter((self._x, self._y))
 
     def __add__(self, other) -> 'Vec2':
-        return Vec2(self.x + other.x, self.y + other.y)
+        return Vec2(self._x + other.x, self._y + other.y)
 
     __iadd__ = __add__
 
     def __sub__(self, other) -> 'Vec2':
-        return Vec2(self.x - other.x, self.y - other.y)
+        return Vec2(self._x - other.x, self._y - other.y)
 
     __isub__ = __sub__
 
     def __mul__(self, k) -> 'Vec2':
-        return Vec2(self.x * k, self.y * k)
+        return Vec2(self._x * k, self._y * k)
 
     __rmul__ = __mul__
 
     __imul__ = __mul__
 
     def __truediv__(self, k) -> 'Vec2':
-        return Vec2(self.x / k, self.y / k)
+        return Vec2(self._x / k, self._y / k)
 
     def __repr__(self) -> str:
         return '({}, {})'.format(self.x, self.y)
@@ -116,7 +103,7 @@ class Vec2:
         return 2
 
     def __eq__(self, other: 'Vec2') -> bool:
-        return abs(self.x - other.x) < 1e-6 and abs(self.y - other.y) < 1e-6
+        return abs(self._x - other.x) < 1e-6 and abs(self._y - other.y) < 1e-6
 
     def to_wx_point(self) -> wx.Point:
         """Convert this to wx.Point; return the result."""
@@ -162,7 +149,7 @@ class Vec2:
 
     @property
     def norm_sq(self) -> TNum:
-        return self.x ** 2 + self.y ** 2
+        return self._x * self._x + self._y * self._y
 
     def normalized(self, norm: TNum = 1) -> 'Vec2':
         old_norm = self.norm
@@ -170,7 +157,7 @@ class Vec2:
         return self * (norm / old_norm)
 
     def dot(self, other: 'Vec2') -> TNum:
-        return self.x * other.x + self.y * other.y
+        return self._x * other.x + self._y * other.y
 
     @classmethod
     def repeat(cls, val: TNum = 1) -> 'Vec2':
@@ -189,6 +176,9 @@ class Vec2:
 
 class Rect:
     """Class that represents a rectangle by keeping a position and a size."""
+    __slots__ = ('position', 'size')
+    position: Vec2
+    size: Vec2
 
     def __init__(self, pos: 'Vec2', size: 'Vec2'):
         assert size.x >= 0 and size.y >= 0
@@ -428,6 +418,32 @@ def pt_on_line(a: 'Vec2', b: 'Vec2', point: 'Vec2', threshold: float = 0) -> boo
     return (point - projected).norm_sq <= threshold ** 2
 
 
+def pt_on_segments(starts: np.ndarray, ends: np.ndarray, point: 'Vec2',
+                   threshold: Union[float, np.ndarray] = 0) -> np.ndarray:
+    """Vectorized pt_on_line() over an array of segments.
+
+    Args:
+        starts: (N, 2) array of the start points of the segments.
+        ends: (N, 2) array of the end points of the segments.
+        point: The point to test.
+        threshold: The distance allowed on either side, either for all segments or as an array of
+            length N.
+
+    Returns:
+        Boolean array of length N, of whether point is on each segment. A segment of length zero
+        counts as a point.
+    """
+    delta = ends - starts
+    ap = np.array((point.x, point.y), dtype=float) - starts
+    len_sq = np.einsum('ij,ij->i', delta, delta)
+    dot = np.einsum('ij,ij->i', ap, delta)
+    ap_sq = np.einsum('ij,ij->i', ap, ap)
+    # dot / len_sq is where the projection falls on the segment, from 0 to 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dist_sq = np.where(len_sq > 0, ap_sq - dot * dot / len_sq, ap_sq)
+    return (dot >= 0) & (dot <= len_sq) & (dist_sq <= np.square(threshold))
+
+
 def pt_in_circle(center: 'Vec2', radius: float, point: 'Vec2') -> bool:
     """Returns whether point is inside the circle with the given center and radius."""
     return (point - center).norm_sq <= radius ** 2
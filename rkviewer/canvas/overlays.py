@@ -7,7 +7,8 @@ from rkviewer.canvas.state import cstate
 from rkviewer.config import Color
 import wx
 import abc
-from typing import Callable, List, cast
+from math import ceil
+from typing import Callable, List, Optional, cast
 from .geometry import Vec2, Rect, clamp_point, pt_in_rect
 from .utils import draw_rect
 
@@ -75,12 +76,18 @@ class Minimap(CanvasOverlay):
                     on scrolling. This coupled with delays in update causes very noticeable jitters
                     when dragging.
         elements: The list of elements updated by canvas.
+
+    Note:
+        The nodes and compartments are drawn once onto a thumbnail bitmap, which is kept until
+        InvalidateThumbnail() is called or the elements or the size of the canvas change. Only
+        the background and the visible window are drawn on every paint.
     """
     Callback = Callable[[Vec2], None]
     window_pos: Vec2
     window_size: Vec2
     device_pos: Vec2
-    elements: SortedKeyList
+    _elements: SortedKeyList
+    _thumbnail: Optional[wx.Bitmap]  #: The pre-rendered elements, or None if it needs a rebuild.
     _position: Vec2  #: Unscrolled, i.e. logical position of the minimap. This varies by scrolling.
     _realsize: Vec2  #: Full size of the canvas
     _width: int
@@ -107,6 +114,7 @@ class Minimap(CanvasOverlay):
             pos_callback: The callback function called when the minimap window changes position.
         """
         self._position = pos
+        self._thumbnail = None
         self.device_pos = device_pos  # should stay fixed
         self._width = width
         self.realsize = realsize  # use the setter to set the _size as well
@@ -125,9 +133,28 @@ class Minimap(CanvasOverlay):
 
     @realsize.setter
     def realsize(self, val: Vec2):
+        # the canvas sets this on every paint, so only rebuild the thumbnail if it changed
+        if getattr(self, '_realsize', None) != val:
+            self._thumbnail = None
         self._realsize = val
         self._size = Vec2(self._width, self._width * val.y / val.x)
 
+    @property
+    def elements(self) -> SortedKeyList:
+        return self._elements
+
+    @elements.setter
+    def elements(self, val: SortedKeyList):
+        self._elements = val
+        self._thumbnail = None
+
+    def InvalidateThumbnail(self):
+        """Rebuild the thumbnail of the elements on the next paint.
+
+        This should be called whenever the elements are modified in place.
+        """
+        self._thumbnail = None
+
     @property
     def dragging(self):
         """Whether the user is current dragging on the minimap window."""
@@ -163,18 +190,30 @@ class Minimap(CanvasOverlay):
         # draw visible rect
         draw_rect(gc, Rect(win_pos, win_size), fill=foreground)
 
+        if self._thumbnail is None:
+            self._thumbnail = self._RenderThumbnail()
+        gc.DrawBitmap(self._thumbnail, self.position.x, self.position.y,
+                      self._thumbnail.GetWidth(), self._thumbnail.GetHeight())
+
+    def _RenderThumbnail(self) -> wx.Bitmap:
+        """Draw the nodes and compartments onto a transparent bitmap the size of the minimap."""
+        scale = self._size.x / self._realsize.x
+        bitmap = wx.Bitmap.FromRGBA(max(ceil(self._size.x), 1), max(ceil(self._size.y), 1),
+                                    0, 0, 0, 0)
+        dc = wx.MemoryDC(bitmap)
+        gc = wx.GraphicsContext.Create(dc)
         for el in self.elements:
             pos: Vec2
             size: Vec2
             fc: wx.Colour
             if isinstance(el, NodeElement):
                 el = cast(NodeElement, el)
-                pos = el.node.position * scale + self.position
+                pos = el.node.position * scale
                 size = el.node.size * scale
                 fc = (el.node.fill_color or Color(128, 128, 128)).to_wxcolour()
             elif isinstance(el, CompartmentElt):
                 el = cast(CompartmentElt, el)
-                pos = el.compartment.position * scale + self.position
+                pos = el.compartment.position * scale
                 size = el.compartment.size * scale
                 fc = el.compartment.fill
             else:
@@ -182,7 +221,9 @@ class Minimap(CanvasOverlay):
 
             color = wx.Colour(fc.Red(), fc.Green(), fc.Blue(), 100)
             draw_rect(gc, Rect(pos, size), fill=color)
-
+        del gc
+        dc.SelectObject(wx.NullBitmap)
+        return bitmap
 
     def OnLeftDown(self, device_pos: Vec2):
         if not self._dragging:
@@ -0,0 +1,100 @@
+"""Cache of the pens, brushes, fonts and sprites used to paint the canvas.
+"""
+# pylint: disable=maybe-no-member
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+import wx
+
+
+FontKey = Tuple[int, Any, Any, Any]  #: (point size, family, style, weight)
+
+
+def _colour_key(colour: wx.Colour) -> Tuple[int, int, int, int]:
+    return (colour.Red(), colour.Green(), colour.Blue(), colour.Alpha())
+
+
+class GraphicsResources:
+    """Cache of the graphics objects created while painting, keyed by what they are made from.
+
+    Graphics pens, brushes and fonts belong to the renderer rather than to a particular
+    GraphicsContext, so the ones created for one paint (or one tile) are reused for the next.
+    The canvas clears the cache when the zoom scale or the theme changes.
+
+    Attributes:
+        MAX_RESOURCES: The number of pens, brushes and fonts kept, each; the least recently used
+                       ones are dropped first.
+        MAX_EXTENTS: The number of text extents kept, likewise.
+        MAX_SPRITES: The number of sprites kept, likewise.
+    """
+    MAX_RESOURCES = 512
+    MAX_EXTENTS = 4096
+    MAX_SPRITES = 256
+
+    _pens: 'OrderedDict[Tuple, wx.GraphicsPen]'
+    _brushes: 'OrderedDict[Tuple, wx.GraphicsBrush]'
+    _fonts: 'OrderedDict[Tuple, wx.GraphicsFont]'
+    _extents: 'OrderedDict[Tuple[FontKey, str], Tuple[float, float]]'
+    _sprites: 'OrderedDict[Hashable, wx.Bitmap]'
+
+    def __init__(self):
+        self._pens = OrderedDict()
+        self._brushes = OrderedDict()
+        self._fonts = OrderedDict()
+        self._extents = OrderedDict()
+        self._sprites = OrderedDict()
+
+    def clear(self):
+        self._pens.clear()
+        self._brushes.clear()
+        self._fonts.clear()
+        self._extents.clear()
+        self._sprites.clear()
+
+    @staticmethod
+    def _cached(cache: 'OrderedDict[Any, Any]', key: Hashable, max_size: int,
+                create: Callable[[], Any]) -> Any:
+        """Return the value cached under key, calling create() to create it if there is none. The
+        least recently used values are dropped once there are more than max_size."""
+        value = cache.get(key)
+        if value is None:
+            value = create()
+            cache[key] = value
+            if len(cache) > max_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return value
+
+    def pen(self, gc: wx.GraphicsContext, colour: wx.Colour, width: float = 1,
+            style=wx.PENSTYLE_SOLID) -> wx.GraphicsPen:
+        return self._cached(
+            self._pens, (_colour_key(colour), width, style), self.MAX_RESOURCES,
+            lambda: gc.CreatePen(wx.GraphicsPenInfo(colour).Width(width).Style(style)))
+
+    def brush(self, gc: wx.GraphicsContext, colour: wx.Colour,
+              style=wx.BRUSHSTYLE_SOLID) -> wx.GraphicsBrush:
+        return self._cached(self._brushes, (_colour_key(colour), style), self.MAX_RESOURCES,
+                            lambda: gc.CreateBrush(wx.Brush(colour, style)))
+
+    def font(self, gc: wx.GraphicsContext, key: FontKey, colour: wx.Colour) -> wx.GraphicsFont:
+        """Return the font given by key, in the given colour."""
+        def create():
+            size, family, style, weight = key
+            font = wx.Font(wx.FontInfo(size).Family(family).Style(style).Weight(weight))
+            return gc.CreateFont(font, colour)
+
+        return self._cached(self._fonts, (key, _colour_key(colour)), self.MAX_RESOURCES, create)
+
+    def text_extent(self, gc: wx.GraphicsContext, key: FontKey, text: str) -> Tuple[float, float]:
+        """Return the width and height of text in the font given by key, which must be the font
+        currently set on gc."""
+        def create():
+            tw, th, _, _ = gc.GetFullTextExtent(text)
+            return (tw, th)
+
+        return self._cached(self._extents, (key, text), self.MAX_EXTENTS, create)
+
+    def sprite(self, key: Hashable, render: Callable[[], wx.Bitmap]) -> wx.Bitmap:
+        """Return the bitmap cached under key, calling render() to create it if there is none."""
+        return self._cached(self._sprites, key, self.MAX_SPRITES, render)
@@ -0,0 +1,103 @@
+"""Spatial index used by the canvas to find the elements near a position.
+"""
+from collections import defaultdict
+import math
+from typing import DefaultDict, Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+from .geometry import Rect, Vec2
+
+
+T = TypeVar('T', bound=Hashable)
+Cell = Tuple[int, int]
+
+
+class SpatialGrid(Generic[T]):
+    """Uniform grid that buckets items by the cells their bounding rectangles overlap.
+
+    Queries return a superset of the items whose rectangles contain the position (or overlap the
+    rectangle), so the caller still needs to do the exact test on each returned item. Items with
+    no rectangle, and items that would span more than max_cells cells, are kept in a separate
+    set and returned by every query.
+
+    Attributes:
+        cell_size: The width and height of each grid cell, in logical canvas units.
+        max_cells: The largest number of cells a single item may occupy before it is treated as
+                   unbounded.
+    """
+    cell_size: float
+    max_cells: int
+    _cells: DefaultDict[Cell, Set[T]]
+    _item_cells: Dict[T, List[Cell]]
+    _unbounded: Set[T]
+
+    def __init__(self, cell_size: float = 100, max_cells: int = 256):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells = defaultdict(set)
+        self._item_cells = dict()
+        self._unbounded = set()
+
+    def __len__(self) -> int:
+        return len(self._item_cells) + len(self._unbounded)
+
+    def __contains__(self, item: T) -> bool:
+        return item in self._item_cells or item in self._unbounded
+
+    def _cell_range(self, rect: Rect) -> Tuple[range, range]:
+        lo = rect.position
+        hi = rect.position + rect.size
+        return (range(math.floor(lo.x / self.cell_size), math.floor(hi.x / self.cell_size) + 1),
+                range(math.floor(lo.y / self.cell_size), math.floor(hi.y / self.cell_size) + 1))
+
+    def insert(self, item: T, rect: Optional[Rect]):
+        """Add item with the given bounding rectangle, or None if it may be anywhere."""
+        self.discard(item)
+        if rect is None:
+            self._unbounded.add(item)
+            return
+        xs, ys = self._cell_range(rect)
+        if len(xs) * len(ys) > self.max_cells:
+            self._unbounded.add(item)
+            return
+        cells = [(x, y) for x in xs for y in ys]
+        for cell in cells:
+            self._cells[cell].add(item)
+        self._item_cells[item] = cells
+
+    def discard(self, item: T):
+        """Remove item if it is in the grid."""
+        self._unbounded.discard(item)
+        for cell in self._item_cells.pop(item, ()):
+            bucket = self._cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._item_cells.clear()
+        self._unbounded.clear()
+
+    def query_point(self, pos: Vec2) -> Set[T]:
+        """Return the items that may contain pos."""
+        cell = (math.floor(pos.x / self.cell_size), math.floor(pos.y / self.cell_size))
+        ret = set(self._unbounded)
+        if cell in self._cells:
+            ret.update(self._cells[cell])
+        return ret
+
+    def query_rect(self, rect: Rect) -> Set[T]:
+        """Return the items that may overlap rect."""
+        xs, ys = self._cell_range(rect)
+        ret = set(self._unbounded)
+        if len(xs) * len(ys) > len(self._cells):
+            # cheaper to go through the occupied cells than through every covered one
+            for (x, y), bucket in self._cells.items():
+                if x in xs and y in ys:
+                    ret.update(bucket)
+        else:
+            for x in xs:
+                for y in ys:
+                    if (x, y) in self._cells:
+                        ret.update(self._cells[(x, y)])
+        return ret
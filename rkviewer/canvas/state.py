@@ -2,8 +2,9 @@
 import wx
 from rkviewer.config import DEFAULT_ARROW_TIP
 from rkviewer.canvas.geometry import Rect, Vec2
+from rkviewer.canvas.resources import GraphicsResources
 import copy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, unique
 from typing import Any, Callable, List, Tuple
 
@@ -39,12 +40,14 @@ class CanvasState:
         scale: The zoom scale of the canvas.
         multi_select: Whether the user is pressing the keys that signify multiple selection of
                       items.
+        resources: The pens, brushes and fonts cached by the canvas for painting.
     """
     scale: float = 1
     bounds: Rect = Rect(Vec2(), Vec2())
     input_mode_changed: Callable[[InputMode], None] = lambda _: None
     _input_mode: InputMode = InputMode.SELECT
     arrow_tip: ArrowTip = ArrowTip(copy.copy(DEFAULT_ARROW_TIP))
+    resources: GraphicsResources = field(default_factory=GraphicsResources)
 
     @property
     def input_mode(self):
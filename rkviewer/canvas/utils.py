@@ -9,6 +9,7 @@ import math
 from typing import Collection, Generic, List, Optional, Set, TypeVar, Callable
 from .geometry import Rect, Vec2, rotate_unit
 from .data import Node, Reaction
+from .state import cstate
 
 
 def get_nodes_by_idx(nodes: List[Node], indices: Collection[int]):
@@ -59,11 +60,11 @@ def draw_rect(gc: wx.GraphicsContext, rect: Rect, *, fill: Optional[wx.Colour] =
     brush: wx.Brush
     # set up brush and pen if applicable
     if fill is not None:
-        brush = gc.CreateBrush(wx.Brush(fill, fill_style))
+        brush = cstate.resources.brush(gc, fill, fill_style)
     else:
         brush = wx.TRANSPARENT_BRUSH
     if border is not None:
-        pen = gc.CreatePen(wx.GraphicsPenInfo(border).Width(border_width).Style(border_style))
+        pen = cstate.resources.pen(gc, border, border_width, border_style)
     else:
         pen = wx.TRANSPARENT_PEN
 
@@ -7,7 +7,7 @@ import copy
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 import commentjson
 import wx
@@ -94,6 +94,9 @@ class AppSettings:
        # Find the center poistion of the frame
        self.position.x = self.displaySize[0] // 2 - self.size.x // 2
        self.position.y = self.displaySize[1] // 2 - self.size.y // 2
+       # Undo history limits; the oldest steps are dropped once either is exceeded
+       self.undo_max_depth = 200
+       self.undo_max_mb = 256
 
    def load_appSettings(self):
        sp = wx.StandardPaths.Get()
@@ -111,6 +114,9 @@ class AppSettings:
        self.position.y = config.ReadInt ('frame_position_y', self.position.y)
        self.size.x = config.ReadInt ('frame_size_w', self.size.x)
        self.size.y = config.ReadInt ('frame_size_h', self.size.y)
+       config.SetPath ('/UndoHistory')
+       self.undo_max_depth = config.ReadInt ('max_depth', self.undo_max_depth)
+       self.undo_max_mb = config.ReadInt ('max_mb', self.undo_max_mb)
 
    def save_appSettings(self):
        sp = wx.StandardPaths.Get()
@@ -127,6 +133,9 @@ class AppSettings:
        config.WriteInt ('frame_position_y', self.position.y)
        config.WriteInt ('frame_size_w', self.size.x)
        config.WriteInt ('frame_size_h', self.size.y)
+       config.SetPath ('/UndoHistory')
+       config.WriteInt ('max_depth', self.undo_max_depth)
+       config.WriteInt ('max_mb', self.undo_max_mb)
 
 
 # TODO merge these schema with those in iodine?
@@ -266,6 +275,12 @@ class ThemeSchema(Schema):
         text_field_bg: The background color of text fields.
         text_field_fg: The foreground (font) color of text fields
         text_field_border: Whether the border of text fields should be drawn.
+        lod_scale_threshold: The zoom scale below which the canvas is drawn at a lower level of
+                             detail: nodes become flat rectangles without text, and reactions
+                             straight lines without arrow tips. Set to 0 to always draw in full.
+        node_sprites: Whether to draw node shapes from bitmaps cached per shape, size and zoom
+                      level, instead of drawing every primitive of every node. The text is
+                      still drawn separately for each node.
 
     TODO more documentation under attributes and link to this document in Help or settings.json
     """
@@ -335,6 +350,8 @@ class ThemeSchema(Schema):
     text_field_bg = ColorField(missing=Color(255, 255, 255))
     text_field_fg = ColorField(missing=Color(0, 0, 0))
     text_field_border = fields.Boolean(missing=True)
+    lod_scale_threshold = fields.Float(missing=0.5, validate=validate.Range(min=0))
+    node_sprites = fields.Boolean(missing=False)
     # using ribbon style for notebooks, so no need for this
     # active_tab_bg = ColorField(missing=Color(100, 100, 100))
     # panel_font = FontField(missing=Font(pointSize=))
@@ -361,6 +378,7 @@ BUILTIN_SETTINGS = {
         ("cursor", 100),
         ("zoom", 100),
         ("fps", 100),
+        ("history", 140),
     ],  # first element: status field identifier; second element: field width
     "decimal_precision": 2,
     "min_node_width": 20,
@@ -406,6 +424,8 @@ def validate_schema(schema):
 _settings = BUILTIN_SETTINGS
 _theme = None
 _settings_err = None
+# wx.Colour instances of the theme colors, converted on first use
+_theme_colours: Dict[str, wx.Colour] = dict()
 
 
 
@@ -434,7 +454,7 @@ def load_theme_settings():
     app has not been initialized. So we wait until it is, and then display an error dialog if there
     is a previously recorded error.
     """
-    global _theme, _settings, _settings_err
+    global _theme, _settings, _settings_err, _theme_colours
     cur_settings = dict()
     if os.path.isfile(GetThemeSettingsPath ()):
         with open(GetThemeSettingsPath (), 'r') as fp:
@@ -455,6 +475,7 @@ def load_theme_settings():
             return
         config = root_schema.load({})
     _theme = copy.copy(config['theme'])
+    _theme_colours = dict()
     _settings = copy.copy(BUILTIN_SETTINGS)
 
 
@@ -479,13 +500,19 @@ def get_setting(setting_attr) -> Any:
 
 
 def get_theme(theme_attr, convert_color=True) -> Any:
-    '''convert_color: if True, convert Color instances to wx.Colour instances automatically
+    '''convert_color: if True, convert Color instances to wx.Colour instances automatically. The
+    converted wx.Colour is shared by all callers until the theme is reloaded, so it must not be
+    modified.
     '''
     global _theme
     tmp = _theme[theme_attr]
     # automatically convert Color to wx.Colour
     if convert_color and isinstance(tmp, Color):
-        tmp = wx.Colour(tmp.r, tmp.g, tmp.b, tmp.a)
+        colour = _theme_colours.get(theme_attr)
+        if colour is None:
+            colour = wx.Colour(tmp.r, tmp.g, tmp.b, tmp.a)
+            _theme_colours[theme_attr] = colour
+        tmp = colour
     return tmp
 
 
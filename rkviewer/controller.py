@@ -2,20 +2,29 @@
 """
 # pylint: disable=maybe-no-member
 from contextlib import contextmanager
+import copy
+import numpy as np
 from numpy.core.fromnumeric import shape
 import wx
 import traceback
-from typing import Any, Collection, List, Optional, Set
+from typing import Any, Collection, List, Optional, Sequence, Set, Tuple, cast
 import rkviewer.iodine as iod
 import logging
 
 from rkviewer.iodine import Color, getReactionModifiers
 from .utils import gchain, rgba_to_wx_colour
-from .events import DidAddCompartmentEvent, DidAddNodeEvent, DidAddReactionEvent, DidChangeCompartmentOfNodesEvent, DidCommitDragEvent, DidRedoEvent, DidUndoEvent, DidNewNetworkEvent, post_event
+from .events import DidAddCompartmentEvent, DidAddNodeEvent, DidAddReactionEvent, DidChangeCompartmentOfNodesEvent, DidCommitDragEvent, DidRedoEvent, DidUndoEvent, DidNewNetworkEvent, batch_events, post_event
 from .canvas.data import Compartment, Node, Reaction, CompositeShape
 from .canvas.geometry import Vec2
 from .canvas.utils import get_nodes_by_ident, get_nodes_by_idx
-from .mvc import IController, IView, ModelError, ModifierTipStyle
+from .mvc import (CompartmentIndexError, IController, IView, ModelError, ModifierTipStyle,
+                  NodeIndexError, ReactionIndexError)
+from .stoichiometry import Stoichiometry, get_stoichiometry
+
+
+def _rounded(vec: Vec2) -> Vec2:
+    """Round the coordinates to 2 decimal places, as the iodine position getters do."""
+    return Vec2(round(vec.x, 2), round(vec.y, 2))
 
 
 def iod_setter(controller_iod_setter):
@@ -52,11 +61,13 @@ class Controller(IController):
 
     @contextmanager
     def group_action(self):
-        try:
-            self._start_group()
-            yield
-        finally:
-            self._end_group()
+        # the batched event handlers (e.g. those of plugins) hear about the whole group at once
+        with batch_events():
+            try:
+                self._start_group()
+                yield
+            finally:
+                self._end_group()
 
     def _start_group(self) -> bool:
         self.group_depth += 1
@@ -136,12 +147,47 @@ class Controller(IController):
             post_event(DidAddNodeEvent(nodei))
         return nodei
 
+    def add_nodes_g(self, neti: int, nodes: Sequence[Node], fill_colors: Sequence[wx.Colour],
+                    border_colors: Sequence[wx.Colour],
+                    border_widths: Sequence[float]) -> List[int]:
+        '''
+        Add the given nodes, with the given colors and border widths, in a single group.
+
+        This is the same as calling add_node_g() and then the setters for the colors, border width,
+        concentration, name and SBO of each node, but it does not go through the setters.
+        '''
+        indices = list()
+        with self.group_action():
+            for node, fill, border, border_width in zip(nodes, fill_colors, border_colors,
+                                                        border_widths):
+                nodei = iod.addNode(neti, node.id, node.position.x, node.position.y, node.size.x,
+                                    node.size.y, node.floatingNode, node.lockNode, node.node_name,
+                                    node.node_SBO)
+                if node.comp_idx != -1:
+                    iod.setCompartmentOfNode(neti, nodei, node.comp_idx)
+                iod.setNodeShapeIndex(neti, nodei, node.shape_index)
+                iod.setNodeFillColorRGB(neti, nodei, fill.Red(), fill.Green(), fill.Blue())
+                iod.setNodeFillColorAlpha(neti, nodei, fill.Alpha() / 255)
+                iod.setNodeBorderColorRGB(neti, nodei, border.Red(), border.Green(), border.Blue())
+                iod.setNodeBorderColorAlpha(neti, nodei, border.Alpha() / 255)
+                iod.setNodeBorderWidth(neti, nodei, border_width)
+                iod.setNodeConcentration(neti, nodei, node.concentration)
+                post_event(DidAddNodeEvent(nodei))
+                indices.append(nodei)
+        return indices
+
     def set_application_position(self, pos: wx.Point):
         self.initial_position = pos
 
     def get_application_position(self) -> wx.Point:
         return self.initial_position
 
+    def set_undo_history_limits(self, max_depth: int, max_bytes: int):
+        iod.setUndoHistoryLimits(max_depth, max_bytes)
+
+    def get_undo_history_size(self) -> Tuple[int, int]:
+        return iod.getUndoHistorySize()
+
     def get_composite_shape_list(self, neti: int) -> List[CompositeShape]:
         return iod.getListOfCompositeShapes(neti)
 
@@ -173,12 +219,22 @@ class Controller(IController):
             raise ValueError('The "nodes" list for a newly added compartment should be empty. '
                              'This is to avoid implicit moving of nodes between compartments.')
         with self.group_action():
-            compi = iod.addCompartment(neti, compartment.id, *compartment.position, *compartment.size)
-            iod.setCompartmentFillColor(neti, compi, self.wx_to_tcolor(compartment.fill))
-            iod.setCompartmentOutlineColor(neti, compi, self.wx_to_tcolor(compartment.border))
-            iod.setCompartmentOutlineThickness(neti, compi, compartment.border_width)
-            iod.setCompartmentVolume(neti, compi, compartment.volume)
-            post_event(DidAddCompartmentEvent(compi))
+            return self._add_compartment(neti, compartment)
+
+    def add_compartments_g(self, neti: int, compartments: Sequence[Compartment]) -> List[int]:
+        if any(len(comp.nodes) != 0 for comp in compartments):
+            raise ValueError('The "nodes" list for a newly added compartment should be empty. '
+                             'This is to avoid implicit moving of nodes between compartments.')
+        with self.group_action():
+            return [self._add_compartment(neti, comp) for comp in compartments]
+
+    def _add_compartment(self, neti: int, compartment: Compartment) -> int:
+        compi = iod.addCompartment(neti, compartment.id, *compartment.position, *compartment.size)
+        iod.setCompartmentFillColor(neti, compi, self.wx_to_tcolor(compartment.fill))
+        iod.setCompartmentOutlineColor(neti, compi, self.wx_to_tcolor(compartment.border))
+        iod.setCompartmentOutlineThickness(neti, compi, compartment.border_width)
+        iod.setCompartmentVolume(neti, compi, compartment.volume)
+        post_event(DidAddCompartmentEvent(compi))
         return compi
     
     @iod_setter
@@ -194,6 +250,15 @@ class Controller(IController):
         #assert pos.x >= 0 and pos.y >= 0
         iod.setNodeCoordinate(neti, nodei, pos.x, pos.y, allowNegativeCoordinates)
 
+    @iod_setter
+    def move_nodes(self, neti: int, node_indices: List[int], positions,
+                   allowNegativeCoordinates: bool = False):
+        iod.setNodeCoordinates(neti, node_indices, positions, allowNegativeCoordinates)
+
+    def get_node_geometry(self, neti: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        table = iod.getNodeGeometryTable(neti)
+        return table.indices, table.positions, table.sizes
+
     @iod_setter
     def set_node_size(self, neti: int, nodei: int, size: Vec2):
         iod.setNodeSize(neti, nodei, size.x, size.y)
@@ -302,29 +367,44 @@ class Controller(IController):
     def add_reaction_g(self, neti: int, reaction: Reaction) -> int:
         """Try create a reaction."""
         with self.group_action():
-            iod.createReaction(neti, reaction.id, reaction.sources, reaction.targets)
-            reai = iod.getReactionIndex(neti, reaction.id)
-
-            for sidx in reaction.sources:
-                iod.setReactionSrcNodeStoich(neti, reai, sidx, 1.0)
-
-            for tidx in reaction.targets:
-                iod.setReactionDestNodeStoich(neti, reai, tidx, 1.0)
-
-            iod.setReactionFillColorRGB(neti, reai,
-                                        reaction.fill_color.Red(),
-                                        reaction.fill_color.Green(),
-                                        reaction.fill_color.Blue())
-            for (gi, nodei), handle in zip(gchain(reaction.sources, reaction.targets), reaction.handles):
-                pos = handle.tip
-                if gi == 0:
-                    iod.setReactionSrcNodeHandlePosition(neti, reai, nodei, pos.x, pos.y)
-                else:
-                    iod.setReactionDestNodeHandlePosition(neti, reai, nodei, pos.x, pos.y)
-
-            cpos = reaction.src_c_handle.tip
-            iod.setReactionCenterHandlePosition(neti, reai, cpos.x, cpos.y)
-            post_event(DidAddReactionEvent(reai, reaction.sources, reaction.targets))
+            return self._add_reaction(neti, reaction)
+
+    def add_reactions_g(self, neti: int, reactions: Sequence[Reaction],
+                        modifiers: Sequence[Optional[Set[int]]]) -> List[int]:
+        """Try create the reactions in a single group, setting the modifiers that are not None."""
+        indices = list()
+        with self.group_action():
+            for reaction, mods in zip(reactions, modifiers):
+                reai = self._add_reaction(neti, reaction)
+                if mods is not None:
+                    iod.setReactionModifiers(neti, reai, mods)
+                indices.append(reai)
+        return indices
+
+    def _add_reaction(self, neti: int, reaction: Reaction) -> int:
+        iod.createReaction(neti, reaction.id, reaction.sources, reaction.targets)
+        reai = iod.getReactionIndex(neti, reaction.id)
+
+        for sidx in reaction.sources:
+            iod.setReactionSrcNodeStoich(neti, reai, sidx, 1.0)
+
+        for tidx in reaction.targets:
+            iod.setReactionDestNodeStoich(neti, reai, tidx, 1.0)
+
+        iod.setReactionFillColorRGB(neti, reai,
+                                    reaction.fill_color.Red(),
+                                    reaction.fill_color.Green(),
+                                    reaction.fill_color.Blue())
+        for (gi, nodei), handle in zip(gchain(reaction.sources, reaction.targets), reaction.handles):
+            pos = handle.tip
+            if gi == 0:
+                iod.setReactionSrcNodeHandlePosition(neti, reai, nodei, pos.x, pos.y)
+            else:
+                iod.setReactionDestNodeHandlePosition(neti, reai, nodei, pos.x, pos.y)
+
+        cpos = reaction.src_c_handle.tip
+        iod.setReactionCenterHandlePosition(neti, reai, cpos.x, cpos.y)
+        post_event(DidAddReactionEvent(reai, reaction.sources, reaction.targets))
         return reai
 
     @iod_setter
@@ -394,21 +474,47 @@ class Controller(IController):
     def get_compartment_indices(self, neti: int) -> Set[int]:
         return iod.getListOfCompartmentIndices(neti)
 
+    def get_node_count(self, neti: int) -> int:
+        return iod.getNumberOfNodes(neti)
+
+    def get_reaction_count(self, neti: int) -> int:
+        return iod.getNumberOfReactions(neti)
+
+    def get_compartment_count(self, neti: int) -> int:
+        return iod.getNumberOfCompartments(neti)
+
     def get_list_of_nodes(self, neti: int) -> List[Node]:
-        nodes = list()
-        for nodei in iod.getListOfNodeIndices(neti):
-            nodes.append(self.get_node_by_index(neti, nodei))
-        return nodes
+        net = iod.getNetwork(neti)
+        return [self._make_node(neti, net, nodei) for nodei in net.nodes]
 
     def get_list_of_reactions(self, neti: int) -> List[Reaction]:
-        reactions = list()
-        for reai in iod.getListOfReactionIndices(neti):
-            reactions.append(self.get_reaction_by_index(neti, reai))
-        return reactions
+        net = iod.getNetwork(neti)
+        return [self._make_reaction(neti, net, reai) for reai in net.reactions]
 
     def get_list_of_compartments(self, neti: int) -> List[Compartment]:
-        return [self.get_compartment_by_index(neti, compi)
-                for compi in iod.getListOfCompartments(neti)]
+        net = iod.getNetwork(neti)
+        return [self._make_compartment(neti, net, compi) for compi in net.compartments]
+
+    def get_network_snapshot(self, neti: int) -> Tuple[List[Node], List[Reaction], List[Compartment]]:
+        """Return all the nodes, reactions and compartments of the network, in a single pass over
+        the model.
+        """
+        net = iod.getNetwork(neti)
+        return ([self._make_node(neti, net, nodei) for nodei in net.nodes],
+                [self._make_reaction(neti, net, reai) for reai in net.reactions],
+                [self._make_compartment(neti, net, compi) for compi in net.compartments])
+
+    def get_network_model(self, neti: int) -> iod.TNetwork:
+        return iod.getNetwork(neti)
+
+    def get_network_arrays(self, neti: int) -> iod.TNetworkArrays:
+        return iod.getNetworkArrays(neti)
+
+    def get_stoichiometry(self, neti: int) -> Stoichiometry:
+        return get_stoichiometry(neti)
+
+    def get_model_generation(self) -> int:
+        return iod.getGeneration()
 
     @iod_setter
     def rename_compartment(self, neti: int, compi: int, new_id: str):
@@ -461,76 +567,91 @@ class Controller(IController):
         return iod.getReactionIndex(neti, rxn_id)
 
     def get_node_by_index(self, neti: int, nodei: int) -> Node:
-        id = iod.getNodeID(neti, nodei)
-        x, y, w, h = iod.getNodeCoordinateAndSize(neti, nodei)
-        # fill_alpha = iod.getNodeFillColorAlpha(neti, nodei)
-        # fill_rgb = iod.getNodeFillColorRGB(neti, nodei)
-        # fill_color = rgba_to_wx_colour(fill_rgb, fill_alpha)
-        # border_alpha = iod.getNodeBorderColorAlpha(neti, nodei)
-        # border_rgb = iod.getNodeBorderColorRGB(neti, nodei)
-        # border_color = rgba_to_wx_colour(border_rgb, border_alpha)
+        net = iod.getNetwork(neti)
+        if nodei not in net.nodes:
+            raise NodeIndexError('Unknown index: {}'.format(nodei))
+        return self._make_node(neti, net, nodei)
+
+    def get_reaction_by_index(self, neti: int, reai: int) -> Reaction:
+        net = iod.getNetwork(neti)
+        if reai not in net.reactions:
+            raise ReactionIndexError('Unknown index: {}'.format(reai))
+        return self._make_reaction(neti, net, reai)
+
+    def get_compartment_by_index(self, neti: int, compi: int) -> Compartment:
+        net = iod.getNetwork(neti)
+        if compi not in net.compartments:
+            raise CompartmentIndexError('Unknown index: {}'.format(compi))
+        return self._make_compartment(neti, net, compi)
+
+    # The helpers below read the iodine objects directly, rather than through a dozen iod.get*()
+    # calls per element that each look up the network and element again. They must produce the
+    # same values as those getters would.
+    def _make_node(self, neti: int, net: iod.TNetwork, nodei: int) -> Node:
+        node = net.nodes[nodei]
+        if isinstance(node, iod.TAliasNode):
+            original_index = node.originalIdx
+            concrete = cast(iod.TNode, net.nodes[original_index])
+        else:
+            original_index = -1
+            concrete = cast(iod.TNode, node)
         return Node(
-            id,
+            concrete.id,
             neti,
             index=nodei,
-            pos=Vec2(x, y),
-            size=Vec2(w, h),
-            concentration=iod.getNodeConcentration(neti, nodei),
-            node_name = iod.getNodeName(neti, nodei),
-            node_SBO = iod.getNodeSBO(neti, nodei),
-            # fill_color=fill_color,
-            # border_color=border_color,
-            # border_width=iod.getNodeBorderWidth(neti, nodei),
-            comp_idx=iod.getCompartmentOfNode(neti, nodei),
-            floatingNode=iod.IsFloatingNode(neti, nodei),
-            lockNode=iod.IsNodeLocked(neti, nodei),
-            shape_index=iod.getNodeShapeIndex(neti, nodei),
-            composite_shape=iod.getNodeShape(neti, nodei),
-            original_index=iod.getOriginalIndex(neti, nodei)
+            pos=_rounded(node.position),
+            size=_rounded(node.rectSize),
+            concentration=concrete.concentration,
+            node_name=concrete.node_name,
+            node_SBO=concrete.node_SBO,
+            comp_idx=node.compi,
+            floatingNode=concrete.floating,
+            lockNode=node.nodeLocked,
+            shape_index=concrete.shapei,
+            composite_shape=copy.copy(concrete.shape),
+            original_index=original_index
         )
 
-    def get_reaction_by_index(self, neti: int, reai: int) -> Reaction:
-        id = iod.getReactionID(neti, reai)
-        sindices = iod.getListOfReactionSrcNodes(neti, reai)
-        tindices = iod.getListOfReactionDestNodes(neti, reai)
-        fill_rgb = iod.getReactionFillColorRGB(neti, reai)
-        fill_alpha = iod.getReactionFillColorAlpha(neti, reai)
+    def _make_reaction(self, neti: int, net: iod.TNetwork, reai: int) -> Reaction:
+        rxn = net.reactions[reai]
+        sindices = sorted(rxn.reactants)
+        tindices = sorted(rxn.products)
+        fill = rxn.fillColor
 
         # Handle positions array
-        items = list()
-        items.append(self.get_center_handle(neti, reai))
-        items += [self.get_src_node_handle(neti, reai, i) for i in sindices]
-        items += [self.get_dest_node_handle(neti, reai, i) for i in tindices]
+        items = [_rounded(rxn.centerHandlePos)]
+        items += [_rounded(rxn.reactants[i].handlePos) for i in sindices]
+        items += [_rounded(rxn.products[i].handlePos) for i in tindices]
 
-        return Reaction(id,
+        return Reaction(rxn.id,
                         neti,
                         sources=sindices,
                         targets=tindices,
-                        fill_color=rgba_to_wx_colour(fill_rgb, fill_alpha),
-                        line_thickness=iod.getReactionLineThickness(neti, reai),
+                        fill_color=rgba_to_wx_colour((fill.r << 16) | (fill.g << 8) | fill.b,
+                                                     fill.a / 255),
+                        line_thickness=rxn.thickness,
                         index=reai,
-                        rate_law=iod.getReactionRateLaw(neti, reai),
+                        rate_law=rxn.rateLaw,
                         handle_positions=items,
-                        center_pos=iod.getReactionCenterPos(neti, reai),
-                        bezierCurves=iod.bezier_curves(neti, reai),
-                        modifiers=iod.getReactionModifiers(neti, reai),
-                        modifier_tip_style=iod.getModifierTipStyle(neti, reai),
+                        center_pos=rxn.centerPos,
+                        bezierCurves=rxn.bezierCurves,
+                        modifiers=copy.copy(rxn.modifiers),
+                        modifier_tip_style=rxn.tipStyle,
                         )
 
-    def get_compartment_by_index(self, neti: int, compi: int) -> Compartment:
-        id = iod.getCompartmentID(neti, compi)
-
-        return Compartment(id,
-                           nodes=iod.getNodesInCompartment(neti, compi),
-                           volume=iod.getCompartmentVolume(neti, compi),
-                           position=Vec2(iod.getCompartmentPosition(neti, compi)),
-                           size=Vec2(iod.getCompartmentSize(neti, compi)),
-                           fill=self.tcolor_to_wx(iod.getCompartmentFillColor(neti, compi)),
-                           border=self.tcolor_to_wx(iod.getCompartmentOutlineColor(neti, compi)),
-                           border_width=iod.getCompartmentOutlineThickness(neti, compi),
+    def _make_compartment(self, neti: int, net: iod.TNetwork, compi: int) -> Compartment:
+        comp = net.compartments[compi]
+        return Compartment(comp.id,
+                           nodes=list(comp.node_indices),
+                           volume=comp.volume,
+                           position=comp.position,
+                           size=comp.rectSize,
+                           fill=self.tcolor_to_wx(comp.fillColor),
+                           border=self.tcolor_to_wx(comp.outlineColor),
+                           border_width=comp.outlineThickness,
                            index=compi,
                            net_index=neti,
-                           )    
+                           )
 
     def update_view(self):
         """Immediately update the view with using latest model."""
@@ -552,9 +673,18 @@ class Controller(IController):
     # get the updated list of nodes from model and update
 
     def _update_view(self):
-        """tell the view to update by re-populating its list of nodes."""
+        """tell the view to update by re-populating the nodes, etc. that changed since last time."""
 
         self.stacklen += 1  # TODO remove once fixed
         neti = 0
-        self.view.update_all(self.get_list_of_nodes(neti), self.get_list_of_reactions(neti),
-                             self.get_list_of_compartments(neti))
+        changes = iod.popChanges().get(neti, iod.TNetworkChanges())
+        if changes.replaced:
+            self.view.update_all(*self.get_network_snapshot(neti))
+            return
+
+        nodes, reactions, comps = changes.nodes, changes.reactions, changes.compartments
+        self.view.update_elements(
+            [self.get_node_by_index(neti, i) for i in sorted(nodes.added | nodes.modified)],
+            [self.get_reaction_by_index(neti, i) for i in sorted(reactions.added | reactions.modified)],
+            [self.get_compartment_by_index(neti, i) for i in sorted(comps.added | comps.modified)],
+            nodes.removed, reactions.removed, comps.removed)
@@ -6,12 +6,16 @@ handlers to these events.
 # from __future__ import annotations
 # pylint: disable=maybe-no-member
 from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass, fields, is_dataclass
+from itertools import chain
 from typing import (
     Any,
     Callable,
     DefaultDict,
     Dict,
+    Hashable,
+    Iterable,
     List,
     Optional,
     Set,
@@ -33,6 +37,39 @@ class CanvasEvent:
 
         return tuple(getattr(self, f.name) for f in fields(self))
 
+    def dispatch_keys(self) -> Optional[Iterable[Hashable]]:
+        """Return the keys of the handlers bound with keys that this event is delivered to.
+
+        Handlers bound without keys receive every event of their type. See bind_handler().
+        """
+        return None
+
+    def merge(self, later: 'CanvasEvent') -> Optional['CanvasEvent']:
+        """Return one event that stands for this event followed by later, which is of the same
+        type, or None if the two cannot be merged. See batch_events().
+        """
+        return None
+
+
+def _merge_offsets(indices1: List[int], offset1: Union[Vec2, List[Vec2]], indices2: List[int],
+                   offset2: Union[Vec2, List[Vec2]]) -> Tuple[List[int], Union[Vec2, List[Vec2]]]:
+    """Add up the offsets of two move events, per index."""
+    totals: Dict[int, Vec2] = dict()
+    for indices, offset in ((indices1, offset1), (indices2, offset2)):
+        for i, index in enumerate(indices):
+            off = offset if isinstance(offset, Vec2) else offset[i]
+            totals[index] = totals.get(index, Vec2()) + off
+    offsets = list(totals.values())
+    if len(offsets) == 0:
+        return list(), offset2
+    if all(off == offsets[0] for off in offsets):
+        return list(totals), offsets[0]
+    return list(totals), offsets
+
+
+def _merge_indices(indices1: Iterable[int], indices2: Iterable[int]) -> List[int]:
+    return list(dict.fromkeys(chain(indices1, indices2)))
+
 
 @dataclass
 class SelectionDidUpdateEvent(CanvasEvent):
@@ -47,11 +84,16 @@ class SelectionDidUpdateEvent(CanvasEvent):
     reaction_indices: Set[int]
     compartment_indices: Set[int]
 
+    def merge(self, later):
+        return later
+
 
 @dataclass
 class CanvasDidUpdateEvent(CanvasEvent):
     """Called after the canvas has been updated by the controller."""
-    pass
+
+    def merge(self, later):
+        return later
 
 @dataclass
 class DidNewNetworkEvent(CanvasEvent):
@@ -80,6 +122,16 @@ class DidMoveNodesEvent(CanvasEvent):
     dragged: bool
     by_user: bool = True
 
+    def dispatch_keys(self):
+        return self.node_indices
+
+    def merge(self, later):
+        if (self.dragged, self.by_user) != (later.dragged, later.by_user):
+            return None
+        indices, offset = _merge_offsets(self.node_indices, self.offset, later.node_indices,
+                                         later.offset)
+        return DidMoveNodesEvent(indices, offset, self.dragged, self.by_user)
+
 
 @dataclass
 class DidMoveCompartmentsEvent(CanvasEvent):
@@ -100,6 +152,13 @@ class DidMoveCompartmentsEvent(CanvasEvent):
     dragged: bool
     by_user: bool = True
 
+    def merge(self, later):
+        if (self.dragged, self.by_user) != (later.dragged, later.by_user):
+            return None
+        indices, offset = _merge_offsets(self.compartment_indices, self.offset,
+                                         later.compartment_indices, later.offset)
+        return DidMoveCompartmentsEvent(indices, offset, self.dragged, self.by_user)
+
 
 @dataclass
 class DidResizeNodesEvent(CanvasEvent):
@@ -168,6 +227,10 @@ class DidMoveBezierHandleEvent(CanvasEvent):
     by_user: bool
     direct: bool
 
+    def merge(self, later):
+        # the same handle moving again
+        return self if self == later else None
+
 
 @dataclass
 class DidMoveReactionCenterEvent(CanvasEvent):
@@ -272,6 +335,11 @@ class DidModifyNodesEvent(CanvasEvent):
     indices: List[int]
     by_user: bool = True
 
+    def merge(self, later):
+        if self.by_user != later.by_user:
+            return None
+        return DidModifyNodesEvent(_merge_indices(self.indices, later.indices), self.by_user)
+
 
 @dataclass
 class DidModifyReactionEvent(CanvasEvent):
@@ -285,6 +353,11 @@ class DidModifyReactionEvent(CanvasEvent):
     indices: List[int]
     by_user: bool = True
 
+    def merge(self, later):
+        if self.by_user != later.by_user:
+            return None
+        return DidModifyReactionEvent(_merge_indices(self.indices, later.indices), self.by_user)
+
 
 @dataclass
 class DidModifyCompartmentsEvent(CanvasEvent):
@@ -297,6 +370,9 @@ class DidModifyCompartmentsEvent(CanvasEvent):
     """
     indices: List[int]
 
+    def merge(self, later):
+        return DidModifyCompartmentsEvent(_merge_indices(self.indices, later.indices))
+
 
 @dataclass
 class DidUndoEvent(CanvasEvent):
@@ -328,6 +404,7 @@ class HandlerNode:
 
     def __init__(self, handler: EventCallback):
         self.handler = handler
+        self.prev = None
         self.next_ = None
 
 
@@ -335,8 +412,19 @@ class HandlerNode:
 handler_map: Dict[int, Tuple['HandlerChain', HandlerNode]] = dict()
 # Maps event to a chain of handlers
 event_chains: DefaultDict[Type[CanvasEvent], 'HandlerChain'] = defaultdict(lambda: HandlerChain())
+# Maps event to the chain of its batched handlers; see batch_events()
+batched_chains: DefaultDict[Type[CanvasEvent], 'HandlerChain'] = \
+    defaultdict(lambda: HandlerChain())
+# Maps event to a dict that maps each key to the handlers bound with that key, by handler ID
+keyed_handlers: DefaultDict[Type[CanvasEvent], DefaultDict[Hashable, Dict[int, EventCallback]]] = \
+    defaultdict(lambda: defaultdict(dict))
+# Maps the ID of a handler bound with keys to its event and keys
+keyed_map: Dict[int, Tuple[Type[CanvasEvent], List[Hashable]]] = dict()
 
 handler_id = 0
+batch_depth = 0  # number of batch_events() contexts entered
+# Events held back for the batched handlers, in the order they were posted
+pending_events: List[CanvasEvent] = list()
 
 
 class HandlerChain:
@@ -385,17 +473,45 @@ class HandlerChain:
         return node
 
 
-def bind_handler(evt_cls: Type[CanvasEvent], callback: EventCallback) -> int:
+def bind_handler(evt_cls: Type[CanvasEvent], callback: EventCallback,
+                 keys: Optional[Iterable[Hashable]] = None, batched: bool = False) -> int:
+    """Bind callback to the events of type evt_cls, and return the ID of the handler.
+
+    If keys is given, the callback only receives the events whose dispatch_keys() include at least
+    one of them, e.g. the DidMoveNodesEvents that move at least one of the given node indices. It
+    then receives each such event once, after the handlers bound without keys.
+
+    If batched is True, the events posted within batch_events() reach the callback merged, after
+    the outermost context exits. This cannot be combined with keys.
+    """
     global handler_id
+    if batched and keys is not None:
+        raise ValueError('A handler cannot be both batched and bound with keys')
     ret = handler_id
-    chain = event_chains[evt_cls]
-    hnode = chain.append(callback)
-    handler_map[ret] = (chain, hnode)
+    if keys is None:
+        chain = batched_chains[evt_cls] if batched else event_chains[evt_cls]
+        hnode = chain.append(callback)
+        handler_map[ret] = (chain, hnode)
+    else:
+        keys = list(keys)
+        by_key = keyed_handlers[evt_cls]
+        for key in keys:
+            by_key[key][ret] = callback
+        keyed_map[ret] = (evt_cls, keys)
     handler_id += 1
     return ret
 
 
 def unbind_handler(handler_id: int):
+    if handler_id in keyed_map:
+        evt_cls, keys = keyed_map.pop(handler_id)
+        by_key = keyed_handlers[evt_cls]
+        for key in keys:
+            del by_key[key][handler_id]
+            if not by_key[key]:
+                del by_key[key]
+        return
+
     chain, hnode = handler_map[handler_id]
     chain.remove(hnode)
     del handler_map[handler_id]
@@ -411,3 +527,61 @@ def post_event(evt: CanvasEvent):
 
     for callback in iter(event_chains[type(evt)]):
         callback(evt)
+
+    if batched_chains[type(evt)].head is not None:
+        if batch_depth == 0:
+            for callback in iter(batched_chains[type(evt)]):
+                callback(evt)
+        else:
+            _hold_event(evt)
+
+    by_key = keyed_handlers.get(type(evt))
+    if by_key:
+        keys = evt.dispatch_keys()
+        if keys is not None:
+            # a handler may be bound with several of the keys, but it is only called once
+            callbacks: Dict[int, EventCallback] = dict()
+            for key in keys:
+                callbacks.update(by_key.get(key, ()))
+            for hid in sorted(callbacks):
+                callbacks[hid](evt)
+
+
+def _hold_event(evt: CanvasEvent):
+    """Hold back evt for the batched handlers, merging it into the last held event if that is of
+    the same type and the two can be merged.
+
+    Events are only merged with the one right before them, so that the batched handlers still
+    receive them in the order they were posted.
+    """
+    if pending_events and type(pending_events[-1]) is type(evt):
+        merged = pending_events[-1].merge(evt)
+        if merged is not None:
+            pending_events[-1] = merged
+            return
+    pending_events.append(evt)
+
+
+@contextmanager
+def batch_events():
+    """Hold back the events posted within the context from the batched handlers, and deliver
+    them when the outermost context exits.
+
+    The handlers bound without batched=True still receive every event as soon as it is posted.
+    Consecutive events of the same type are merged where possible (see CanvasEvent.merge()), so
+    that e.g. the DidMoveNodesEvents of one drag reach the batched handlers once, with their offsets
+    added up. Events of different types in between are not merged across, so the order in which
+    the events were posted is kept.
+    """
+    global batch_depth
+    batch_depth += 1
+    try:
+        yield
+    finally:
+        batch_depth -= 1
+        if batch_depth == 0:
+            events = list(pending_events)
+            pending_events.clear()
+            for evt in events:
+                for callback in iter(batched_chains[type(evt)]):
+                    callback(evt)
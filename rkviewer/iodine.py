@@ -16,6 +16,7 @@ from functools import partial
 from marshmallow.decorators import post_dump, post_load, pre_load
 from marshmallow_polyfield import PolyField
 from numpy.lib.npyio import recfromcsv
+import numpy as np
 from .mvc import (ModifierTipStyle, IDNotFoundError, IDRepeatError, NodeNotFreeError, NetIndexError,
                   ReactionIndexError, NodeIndexError, CompartmentIndexError, StoichError,
                   StackEmptyError, JSONError, FileError)
@@ -25,11 +26,12 @@ from .canvas.data import CompositeShapeFactory, PrimitiveFactory, CirclePrim, Co
     RectanglePrim, HexagonPrim, LinePrim, TrianglePrim, Transform, TextPrim, ChoiceItem,\
     FONT_FAMILY_CHOICES, FONT_STYLE_CHOICES, FONT_WEIGHT_CHOICES, TEXT_ALIGNMENT_CHOICES
 import copy
+import sys
 from dataclasses import dataclass, field
 import json
-from typing import Any, DefaultDict, Dict, MutableSet, Optional, Set, Tuple, List, cast
+from typing import Any, DefaultDict, Deque, Dict, MutableSet, Optional, Sequence, Set, Tuple, List, cast
 from enum import Enum
-from collections import defaultdict
+from collections import defaultdict, deque
 from marshmallow import Schema, fields, validate, missing as missing_, ValidationError, pre_dump
 from pprint import pprint
 
@@ -124,6 +126,11 @@ class TNetwork:
     baseNodes: Set[int]  #: Set of node indices not in any compartment
     srcMap: DefaultDict[int, MutableSet[int]]  #: Map nodes to reactions of which it is a source
     destMap: DefaultDict[int, MutableSet[int]]  #: Map nodes to reactions of which it is a target
+    aliasMap: DefaultDict[int, MutableSet[int]]  #: Map original nodes to the indices of their aliases
+    modifierMap: DefaultDict[int, MutableSet[int]]  #: Map nodes to reactions of which it is a modifier
+    nodeIdMap: Dict[str, int]  #: Map IDs of (non-alias) nodes to their indices
+    reactionIdMap: Dict[str, int]  #: Map reaction IDs to their indices
+    compartmentIdMap: Dict[str, int]  #: Map compartment IDs to their indices
     lastNodeIdx: int
     lastReactionIdx: int
     lastCompartmentIdx: int
@@ -150,39 +157,59 @@ class TNetwork:
         self.baseNodes = set(index for index, n in nodes.items() if n.compi == -1)
         self.srcMap = defaultdict(set)
         self.destMap = defaultdict(set)
+        self.modifierMap = defaultdict(set)
+        self.aliasMap = defaultdict(set)
         # Initialize srcMap and destMap
         for index, reaction in reactions.items():
             for src in reaction.reactants:
                 self.srcMap[src].add(index)
             for dest in reaction.products:
                 self.destMap[dest].add(index)
+            for mod in reaction.modifiers:
+                self.modifierMap[mod].add(index)
+        for index, n in nodes.items():
+            if isinstance(n, TAliasNode):
+                self.aliasMap[n.originalIdx].add(index)
+        self.nodeIdMap = {n.id: index for index, n in nodes.items() if isinstance(n, TNode)}
+        self.reactionIdMap = {r.id: index for index, r in reactions.items()}
+        self.compartmentIdMap = {c.id: index for index, c in compartments.items()}
 
         self.lastNodeIdx = max(nodes.keys(), default=-1) + 1
         self.lastReactionIdx = max(reactions.keys(), default=-1) + 1
         self.lastCompartmentIdx = max(compartments.keys(), default=-1) + 1
 
     def addNode(self, node: TAbstractNode) -> int:
-        self.nodes[self.lastNodeIdx] = node
-        self.baseNodes.add(self.lastNodeIdx)
         ret = self.lastNodeIdx
-        self.lastNodeIdx += 1
+        _setItem(self.nodes, ret, node)
+        _addToSet(self.baseNodes, ret)
+        if isinstance(node, TNode):
+            _setItem(self.nodeIdMap, node.id, ret)
+        else:
+            assert isinstance(node, TAliasNode)
+            _addToSet(self.aliasMap[node.originalIdx], ret)
+        _setAttr(self, 'lastNodeIdx', ret + 1)
         return ret
 
     def addReaction(self, rea: 'TReaction'):
-        self.reactions[self.lastReactionIdx] = rea
+        reai = self.lastReactionIdx
+        _setItem(self.reactions, reai, rea)
+        _setItem(self.reactionIdMap, rea.id, reai)
 
         # update nodeToReactions
         for src in rea.reactants:
-            self.srcMap[src].add(self.lastReactionIdx)
+            _addToSet(self.srcMap[src], reai)
         for dest in rea.products:
-            self.destMap[dest].add(self.lastReactionIdx)
+            _addToSet(self.destMap[dest], reai)
+        for mod in rea.modifiers:
+            _addToSet(self.modifierMap[mod], reai)
 
-        self.lastReactionIdx += 1
+        _setAttr(self, 'lastReactionIdx', reai + 1)
 
     def addCompartment(self, comp: 'TCompartment') -> int:
         ind = self.lastCompartmentIdx
-        self.compartments[ind] = comp
-        self.lastCompartmentIdx += 1
+        _setItem(self.compartments, ind, comp)
+        _setItem(self.compartmentIdMap, comp.id, ind)
+        _setAttr(self, 'lastCompartmentIdx', ind + 1)
         return ind
 
 
@@ -219,27 +246,287 @@ class TCompartment:
     outlineThickness: float = 2
 
 
+# Sentinel for a dict key that is absent before (or after) a change.
+_MISSING = object()
+
+
+def _sizeOf(obj: Any, seen: Set[int]) -> int:
+    '''Rough estimate of the memory held by obj and everything it refers to, in bytes.'''
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if obj is None or isinstance(obj, (str, bytes, int, float, Enum, type)):
+        return size
+    if isinstance(obj, dict):
+        size += sum(_sizeOf(k, seen) + _sizeOf(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(_sizeOf(item, seen) for item in obj)
+    else:
+        if hasattr(obj, '__dict__'):
+            size += _sizeOf(vars(obj), seen)
+        for slot in getattr(type(obj), '__slots__', ()):
+            size += _sizeOf(getattr(obj, slot, None), seen)
+    return size
+
+
+class TDelta(abc.ABC):
+    '''A single reversible change to the model.
+
+    Deltas are self-inverse: swap() exchanges the stored value with the live one, so calling it
+    once undoes the change and calling it again redoes it.
+    '''
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def swap(self):
+        pass
+
+    def nbytes(self) -> int:
+        '''Estimated memory kept alive by this delta.'''
+        return sys.getsizeof(self) + _sizeOf(getattr(self, 'value', None), set())
+
+
+class TAttrDelta(TDelta):
+    '''Change to an attribute of an object.'''
+    __slots__ = ('obj', 'attr', 'value')
+
+    def __init__(self, obj: Any, attr: str, value: Any):
+        self.obj = obj
+        self.attr = attr
+        self.value = value
+
+    def swap(self):
+        cur = getattr(self.obj, self.attr)
+        setattr(self.obj, self.attr, self.value)
+        self.value = cur
+
+
+class TItemDelta(TDelta):
+    '''Change to an item of a dict or list. For dicts, value may be _MISSING (no such key).'''
+    __slots__ = ('container', 'key', 'value')
+
+    def __init__(self, container: Any, key: Any, value: Any):
+        self.container = container
+        self.key = key
+        self.value = value
+
+    def swap(self):
+        if isinstance(self.container, dict):
+            cur = self.container.get(self.key, _MISSING)
+        else:
+            cur = self.container[self.key]
+        if self.value is _MISSING:
+            del self.container[self.key]
+        else:
+            self.container[self.key] = self.value
+        self.value = cur
+
+
+class TSetDelta(TDelta):
+    '''Addition or removal of a single element of a set.'''
+    __slots__ = ('container', 'elem')
+
+    def __init__(self, container: MutableSet, elem: Any):
+        self.container = container
+        self.elem = elem
+
+    def swap(self):
+        if self.elem in self.container:
+            self.container.remove(self.elem)
+        else:
+            self.container.add(self.elem)
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.elem)
+
+
+class TGlobalDelta(TDelta):
+    '''Change to one of the module-level variables, e.g. networkDict.'''
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value: Any):
+        self.name = name
+        self.value = value
+
+    def swap(self):
+        g = globals()
+        cur = g[self.name]
+        g[self.name] = self.value
+        self.value = cur
+
+
+class TEdit:
+    '''One undo/redo step: the deltas recorded since the matching _pushUndoStack() or startGroup().
+    '''
+    deltas: List[TDelta]
+    touched: Set['TElementKey']  #: The elements changed by the deltas; see _touch()
+    nbytes: int  #: Estimated memory held by the deltas
+
+    def __init__(self):
+        self.deltas = []
+        self.touched = set()
+        self.nbytes = sys.getsizeof(self) + sys.getsizeof(self.deltas)
+
+    def add(self, delta: TDelta) -> int:
+        '''Append the delta and return the number of bytes it added.'''
+        self.deltas.append(delta)
+        size = delta.nbytes()
+        self.nbytes += size
+        return size
+
+    def undo(self):
+        for delta in reversed(self.deltas):
+            delta.swap()
+
+    def redo(self):
+        for delta in self.deltas:
+            delta.swap()
+
+
 class TStack:
-    items: List['TNetworkDict']
+    items: Deque[TEdit]
+    nbytes: int  #: Total estimated memory held by the edits
 
     def __init__(self):
-        self.items = []
+        self.items = deque()
+        self.nbytes = 0
 
     def isEmpty(self):
-        return self.items == []
+        return len(self.items) == 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def push(self, edit: TEdit):
+        self.items.append(edit)
+        self.nbytes += edit.nbytes
 
-    def push(self, netDict: 'TNetworkDict'):
-        theSet = copy.deepcopy(netDict)
-        self.items.append(theSet)
+    def pop(self) -> TEdit:
+        edit = self.items.pop()
+        self.nbytes -= edit.nbytes
+        return edit
 
-    def pop(self):
-        return self.items.pop()
+    def popOldest(self) -> TEdit:
+        edit = self.items.popleft()
+        self.nbytes -= edit.nbytes
+        return edit
+
+    def top(self) -> TEdit:
+        return self.items[-1]
+
+
+# (neti, kind, index) of a model element, where kind is 'nodes', 'reactions' or 'compartments'.
+# The key (neti, None, -1) stands for the network itself.
+TElementKey = Tuple[int, Optional[str], int]
+
+
+@dataclass
+class TElementChanges:
+    '''Indices of the elements of one kind that were added, removed or modified.'''
+    added: Set[int] = field(default_factory=set)
+    removed: Set[int] = field(default_factory=set)
+    modified: Set[int] = field(default_factory=set)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+
+@dataclass
+class TNetworkChanges:
+    '''The changes made to one network, as returned by popChanges().
+
+    If replaced is True, the network itself was added, removed or replaced wholesale (e.g. by
+    clearNetwork() or loadNetwork()), and the element changes should not be relied upon.
+    '''
+    nodes: TElementChanges = field(default_factory=TElementChanges)
+    reactions: TElementChanges = field(default_factory=TElementChanges)
+    compartments: TElementChanges = field(default_factory=TElementChanges)
+    replaced: bool = False
 
 
 class TNetworkDict(Dict[int, TNetwork]):
+    idMap: Dict[str, int]  #: Map network IDs to their indices
+
     def __init__(self):
         super().__init__()
         self.lastNetIndex = 0
+        self.idMap = dict()
+
+
+class TGeometryTable:
+    '''Positions and sizes of the nodes (including alias nodes) of a network, as contiguous arrays.
+
+    Row i holds the node with index indices[i], in increasing index order. The table mirrors the
+    nodes rather than replacing them: TNode.position and rectSize remain the source of truth, since
+    the undo history records changes to them. The rows of the nodes touched since the last read
+    are refreshed lazily, so the table is only kept for the networks for which it was requested
+    through getNodeGeometryTable(). Like the network itself, it must not be modified directly.
+    '''
+    network: TNetwork
+    indices: np.ndarray  #: (N,) node indices
+    positions: np.ndarray  #: (N, 2) top-left corners of the nodes
+    sizes: np.ndarray  #: (N, 2) sizes of the nodes
+    rowOf: Dict[int, int]  #: Map node indices to their rows
+    stale: Set[int]  #: Indices of the nodes touched since the last refresh()
+
+    def __init__(self, network: TNetwork):
+        self.network = network
+        self.stale = set()
+        self.rebuild()
+
+    def rebuild(self):
+        nodes = self.network.nodes
+        order = sorted(nodes)
+        self.indices = np.array(order, dtype=int)
+        self.rowOf = {nodei: row for row, nodei in enumerate(order)}
+        self.positions = np.array([nodes[i].position.as_tuple() for i in order],
+                                  dtype=float).reshape(-1, 2)
+        self.sizes = np.array([nodes[i].rectSize.as_tuple() for i in order],
+                              dtype=float).reshape(-1, 2)
+        self.stale.clear()
+
+    def refresh(self):
+        if not self.stale:
+            return
+        nodes = self.network.nodes
+        if len(nodes) != len(self.rowOf) or \
+                any(i not in nodes or i not in self.rowOf for i in self.stale):
+            # nodes were added or removed, so the rows move
+            self.rebuild()
+            return
+        for nodei in self.stale:
+            row = self.rowOf[nodei]
+            self.positions[row] = nodes[nodei].position.as_tuple()
+            self.sizes[row] = nodes[nodei].rectSize.as_tuple()
+        self.stale.clear()
+
+    def rowsOf(self, nodeIndices: Sequence[int]) -> np.ndarray:
+        '''Return the rows of the given nodes, in the same order.'''
+        return np.fromiter((self.rowOf[i] for i in nodeIndices), dtype=int, count=len(nodeIndices))
+
+
+@dataclass(frozen=True)
+class TNetworkArrays:
+    '''The nodes and reactions of a network as read-only arrays, as returned by getNetworkArrays().
+
+    Nodes (including alias nodes) are in increasing index order, and so are reactions. The
+    incidence of reactions on nodes is a CSR matrix with one row per reaction and one column per
+    node row: the columns of the entries of reaction row r are incidenceIndices[incidencePtr[r]:
+    incidencePtr[r + 1]], and their values in incidenceData are the net stoichiometries, negative
+    for reactants and positive for products. A node that is both a reactant and a product of the
+    same reaction has a single entry. Aliases are columns of their own; see originalIndices.
+    '''
+    nodeIndices: np.ndarray  #: (N,) node indices
+    nodeIds: np.ndarray  #: (N,) node IDs, as objects; aliases have the IDs of their originals
+    originalIndices: np.ndarray  #: (N,) indices of the original nodes of aliases, or -1
+    positions: np.ndarray  #: (N, 2) top-left corners of the nodes
+    sizes: np.ndarray  #: (N, 2) sizes of the nodes
+    reactionIndices: np.ndarray  #: (R,) reaction indices
+    reactionIds: np.ndarray  #: (R,) reaction IDs, as objects
+    incidencePtr: np.ndarray  #: (R + 1,) start of the entries of each reaction row
+    incidenceIndices: np.ndarray  #: (nnz,) node rows of the entries
+    incidenceData: np.ndarray  #: (nnz,) stoichiometries of the entries
 
 
 class ErrorCode(Enum):
@@ -321,6 +608,17 @@ networkDict: TNetworkDict = TNetworkDict()
 undoStack: TStack = TStack()
 redoStack: TStack = TStack()
 lastNetIndex: int = 0
+undoMaxDepth: int = 200
+undoMaxBytes: int = 256 * 1024 * 1024
+# elements touched since the last popChanges(), mapped to whether each existed before it was
+# first touched
+pendingChanges: Dict[TElementKey, bool] = dict()
+# geometry tables requested through getNodeGeometryTable(), by network index
+geometryTables: Dict[int, TGeometryTable] = dict()
+# incremented on every change to the model, including undo, redo and reset; see getGeneration()
+generation: int = 0
+# results of getNetworkArrays(), by network index, with the generation they were computed at
+networkArrays: Dict[int, Tuple[int, TNetworkArrays]] = dict()
 
 
 def getErrorCode():
@@ -339,8 +637,11 @@ def undo():
     if undoStack.isEmpty():
         errCode = -9
     else:
-        redoStack.push(networkDict)
-        networkDict = undoStack.pop()
+        edit = undoStack.pop()
+        _notePending(edit.touched)
+        _bumpGeneration()
+        edit.undo()
+        redoStack.push(edit)
     if errCode < 0:
         raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -351,11 +652,15 @@ def redo():
     errCode: -9: stack is empty
     """
     global stackFlag, errCode, networkDict, undoStack, redoStack
+    errCode = 0
     if redoStack.isEmpty():
         errCode = -9
     else:
-        undoStack.push(networkDict)
-        networkDict = redoStack.pop()
+        edit = redoStack.pop()
+        _notePending(edit.touched)
+        _bumpGeneration()
+        edit.redo()
+        undoStack.push(edit)
     if errCode < 0:
         raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -366,7 +671,8 @@ def startGroup():
     """
     global stackFlag, errCode, networkDict, undoStack, redoStack
     redoStack = TStack()
-    undoStack.push(networkDict)
+    undoStack.push(TEdit())
+    _trimHistory()
     stackFlag = False
 
 
@@ -385,18 +691,18 @@ def newNetwork(netID: str):
     """
     global stackFlag, errCode, networkDict, undoStack, redoStack, lastNetIndex
     errCode = 0
-    for network in networkDict.values():
-        if network.id == netID:
-            errCode = -3
-            break
+    if netID in networkDict.idMap:
+        errCode = -3
     if errCode < 0:
         raise ExceptionDict[errCode](errorDict[errCode])
     else:
         _pushUndoStack()
+        _touch(lastNetIndex, None)
 
         newNetwork = TNetwork(netID)
-        networkDict[lastNetIndex] = newNetwork
-        lastNetIndex += 1
+        _setItem(networkDict, lastNetIndex, newNetwork)
+        _setItem(networkDict.idMap, netID, lastNetIndex)
+        _setGlobal('lastNetIndex', lastNetIndex + 1)
 
 
 def getNetworkIndex(netID: str) -> int:
@@ -407,10 +713,9 @@ def getNetworkIndex(netID: str) -> int:
     global stackFlag, errCode, networkDict, undoStack, redoStack
     errCode = -2
 
-    for i, net in networkDict.items():
-        if net.id == netID:
-            errCode = 0
-            return i
+    if netID in networkDict.idMap:
+        errCode = 0
+        return networkDict.idMap[netID]
 
     raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -479,16 +784,19 @@ def deleteNetwork(neti: int):
         raise ExceptionDict[errCode](errorDict[errCode])
     else:
         _pushUndoStack()
+        _touch(neti, None)
 
-        del networkDict[neti]
+        _delItem(networkDict.idMap, networkDict[neti].id)
+        _delItem(networkDict, neti)
 
 
 def clearNetworks():
     global stackFlag, errCode, networkDict, undoStack, redoStack, lastNetIndex
     errCode = 0
     _pushUndoStack()
-    networkDict = TNetworkDict()
-    lastNetIndex = 0
+    _touchAll([(neti, None, -1) for neti in networkDict])
+    _setGlobal('networkDict', TNetworkDict())
+    _setGlobal('lastNetIndex', 0)
 
 
 def getNumberOfNetworks():
@@ -524,13 +832,14 @@ def _raiseError(eCode: int):
 def _addNetwork(network: TNetwork) -> int:
     """Helper function that adds a network object."""
     global lastNetIndex
-    for net in networkDict.values():
-        if net.id == network.id:
-            _raiseError(-3)
+    if network.id in networkDict.idMap:
+        _raiseError(-3)
     _pushUndoStack()
+    _touch(lastNetIndex, None)
 
-    networkDict[lastNetIndex] = network
-    lastNetIndex += 1
+    _setItem(networkDict, lastNetIndex, network)
+    _setItem(networkDict.idMap, network.id, lastNetIndex)
+    _setGlobal('lastNetIndex', lastNetIndex + 1)
     return lastNetIndex - 1
 
 
@@ -541,6 +850,16 @@ def _getNetwork(neti: int) -> TNetwork:
     return networkDict[neti]
 
 
+def getNetwork(neti: int) -> TNetwork:
+    """
+    Return the network object itself, for callers that read most of its fields in one go. It must
+    not be modified directly: such changes could not be undone, and would not be reported by
+    popChanges().
+    errCode: -5: net index out of range
+    """
+    return _getNetwork(neti)
+
+
 def _getNodeOrAlias(neti: int, nodei: int) -> TAbstractNode:
     net = _getNetwork(neti)
     if nodei not in net.nodes:
@@ -581,10 +900,167 @@ def _getCompartment(neti: int, compi: int) -> TCompartment:
 
 
 def _pushUndoStack():
+    """Open a new undo step, unless we are inside a group. Every change recorded until the next
+    push is undone/redone together."""
     global stackFlag, errCode, networkDict, undoStack, redoStack
     if stackFlag:
         redoStack = TStack()
-        undoStack.push(networkDict)
+        undoStack.push(TEdit())
+        _trimHistory()
+
+
+def _record(delta: TDelta):
+    """Add the delta to the current undo step. If there is no undo step, the change cannot be
+    undone anyway, so it is dropped."""
+    _bumpGeneration()
+    if not undoStack.isEmpty():
+        undoStack.nbytes += undoStack.top().add(delta)
+        if undoStack.nbytes + redoStack.nbytes > undoMaxBytes:
+            _trimHistory()
+
+
+def _trimHistory():
+    """Evict the oldest undo steps until the history fits within undoMaxDepth and undoMaxBytes.
+    The step currently being recorded is never evicted, so a single edit larger than the budget
+    is still undoable."""
+    while len(undoStack) > max(undoMaxDepth, 1):
+        undoStack.popOldest()
+    while len(undoStack) > 1 and undoStack.nbytes + redoStack.nbytes > undoMaxBytes:
+        undoStack.popOldest()
+    # the farthest redo steps go next, if the budget is still exceeded
+    while not redoStack.isEmpty() and undoStack.nbytes + redoStack.nbytes > undoMaxBytes:
+        redoStack.popOldest()
+
+
+def setUndoHistoryLimits(maxDepth: int, maxBytes: int):
+    """Set the maximum number of undo steps and their total estimated size in bytes. The oldest
+    steps are evicted first once either limit is exceeded.
+    errCode: -12: Variable out of range
+    """
+    global undoMaxDepth, undoMaxBytes
+    if maxDepth < 1 or maxBytes < 0:
+        _raiseError(-12)
+    undoMaxDepth = maxDepth
+    undoMaxBytes = maxBytes
+    _trimHistory()
+
+
+def getGeneration() -> int:
+    """Return the current generation of the model. This is different after any change to any
+    network, so readers holding on to model objects can tell whether they are out of date."""
+    return generation
+
+
+def _bumpGeneration():
+    global generation
+    generation += 1
+
+
+def getUndoHistorySize() -> Tuple[int, int]:
+    """Return the number of undo/redo steps held, and their estimated memory use in bytes."""
+    return len(undoStack) + len(redoStack), undoStack.nbytes + redoStack.nbytes
+
+
+def _setAttr(obj: Any, attr: str, value: Any):
+    _record(TAttrDelta(obj, attr, getattr(obj, attr)))
+    setattr(obj, attr, value)
+
+
+def _setItem(container: Any, key: Any, value: Any):
+    if isinstance(container, dict):
+        _record(TItemDelta(container, key, container.get(key, _MISSING)))
+    else:
+        _record(TItemDelta(container, key, container[key]))
+    container[key] = value
+
+
+def _delItem(container: Dict, key: Any):
+    _record(TItemDelta(container, key, container[key]))
+    del container[key]
+
+
+def _addToSet(container: MutableSet, elem: Any):
+    if elem not in container:
+        _record(TSetDelta(container, elem))
+        container.add(elem)
+
+
+def _removeFromSet(container: MutableSet, elem: Any):
+    """Remove elem from the set; like set.remove(), raise KeyError if it is not there."""
+    container.remove(elem)
+    _record(TSetDelta(container, elem))
+
+
+def _setGlobal(name: str, value: Any):
+    _record(TGlobalDelta(name, globals()[name]))
+    globals()[name] = value
+
+
+def _exists(key: TElementKey) -> bool:
+    neti, kind, index = key
+    if neti not in networkDict:
+        return False
+    return kind is None or index in getattr(networkDict[neti], kind)
+
+
+def _notePending(keys):
+    for key in keys:
+        if key not in pendingChanges:
+            pendingChanges[key] = _exists(key)
+        neti, kind, index = key
+        table = geometryTables.get(neti)
+        if table is not None:
+            if kind is None:
+                del geometryTables[neti]
+            elif kind == 'nodes':
+                table.stale.add(index)
+
+
+def _touchAll(keys):
+    """Note that the given elements are about to change, in both popChanges() and the current undo
+    step. Must be called before the change is made, so that additions and removals can be told
+    apart from modifications."""
+    _notePending(keys)
+    if not undoStack.isEmpty():
+        undoStack.top().touched.update(keys)
+
+
+def _touch(neti: int, kind: Optional[str], index: int = -1):
+    _touchAll(((neti, kind, index),))
+
+
+def _touchNode(neti: int, nodei: int):
+    """Touch the node, along with its aliases, which are displayed using its properties."""
+    net = networkDict[neti]
+    _touchAll([(neti, 'nodes', nodei)] + [(neti, 'nodes', i) for i in net.aliasMap.get(nodei, ())])
+
+
+def popChanges() -> Dict[int, TNetworkChanges]:
+    """Return the elements added, removed or modified since the last call, by network index.
+
+    This includes changes made by undo() and redo(). Elements that were added and then removed
+    again in between are not reported.
+    """
+    global pendingChanges
+    changes: Dict[int, TNetworkChanges] = dict()
+    for key, existed in pendingChanges.items():
+        neti, kind, index = key
+        exists = _exists(key)
+        if not existed and not exists:
+            continue
+        netChanges = changes.setdefault(neti, TNetworkChanges())
+        if kind is None:
+            netChanges.replaced = True
+            continue
+        elts: TElementChanges = getattr(netChanges, kind)
+        if existed and exists:
+            elts.modified.add(index)
+        elif exists:
+            elts.added.add(index)
+        else:
+            elts.removed.add(index)
+    pendingChanges = dict()
+    return changes
 
 
 def addNode(neti: int, nodeID: str, x: float, y: float, w: float, h: float, 
@@ -599,16 +1075,16 @@ def addNode(neti: int, nodeID: str, x: float, y: float, w: float, h: float,
     global stackFlag, errCode, networkDict, undoStack, redoStack
     errCode = 0
     n = _getNetwork(neti)
-    for node in n.nodes.values():
-        if isinstance(node, TNode) and node.id == nodeID:
-            _raiseError(-3)
+    if nodeID in n.nodeIdMap:
+        _raiseError(-3)
 
     if x < 0 or y < 0 or w <= 0 or h <= 0:
         _raiseError(-12)
 
     _pushUndoStack()
+    _touch(neti, 'nodes', n.lastNodeIdx)
     newNode = TNode(n.lastNodeIdx, nodeID, Vec2(x, y), Vec2(w, h), 
-                    floatingNode, nodeLocked, nodeName, nodeSBO)
+                    floatingNode, nodeLocked, node_name=nodeName, node_SBO=nodeSBO)
     return n.addNode(newNode)
 
 
@@ -619,6 +1095,7 @@ def addAliasNode(neti: int, originalIdx: int, x: float, y: float, w: float, h: f
     original_node = _getConcreteNode(neti, originalIdx)
 
     _pushUndoStack()
+    _touch(neti, 'nodes', net.lastNodeIdx)
 
     # Refer to the original node's index, whether 'original_index' is a TNode or a TAliasNode
     anode = TAliasNode(net.lastNodeIdx, Vec2(x, y), Vec2(w, h), original_node.index,
@@ -640,20 +1117,21 @@ def aliasForReaction(neti: int, reai: int, nodei: int, x: float, y: float, w: fl
 
     reaction = _getReaction(neti, reai)
     net = _getNetwork(neti)
+    _touch(neti, 'reactions', reai)
 
     # update reactants and srcMap
     if nodei in reaction.reactants:
-        reaction.reactants[aliasi] = reaction.reactants[nodei]
-        del reaction.reactants[nodei]
-        net.srcMap[nodei].remove(reai)
-        net.srcMap[aliasi].add(reai)
+        _setItem(reaction.reactants, aliasi, reaction.reactants[nodei])
+        _delItem(reaction.reactants, nodei)
+        _removeFromSet(net.srcMap[nodei], reai)
+        _addToSet(net.srcMap[aliasi], reai)
 
     # update products and destMap
     if nodei in reaction.products:
-        reaction.products[aliasi] = reaction.products[nodei]
-        del reaction.products[nodei]
-        net.destMap[nodei].remove(reai)
-        net.destMap[aliasi].add(reai)
+        _setItem(reaction.products, aliasi, reaction.products[nodei])
+        _delItem(reaction.products, nodei)
+        _removeFromSet(net.destMap[nodei], reai)
+        _addToSet(net.destMap[aliasi], reai)
 
 
 def getNodeIndex(neti: int, nodeID: str):
@@ -669,10 +1147,9 @@ def getNodeIndex(neti: int, nodeID: str):
         errCode = -5
     else:
         n = networkDict[neti]
-        for i, node, in n.nodes.items():
-            if isinstance(node, TNode) and node.id == nodeID:
-                errCode = 0
-                return i
+        if nodeID in n.nodeIdMap:
+            errCode = 0
+            return n.nodeIdMap[nodeID]
 
     assert errCode < 0
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -691,6 +1168,11 @@ def deleteNode(neti: int, nodei: int) -> bool:
         # to delete an alias, remove it from the compartment
         # modify the reactions that it is in, so that previous references now point to the original
         # node. Also modify the modifiers to do the same
+        _touchAll([(neti, 'nodes', nodei)] +
+                  [(neti, 'reactions', reai) for reai in
+                   set().union(net.srcMap[nodei], net.destMap[nodei], net.modifierMap.get(nodei, ()))])
+        if node.compi != -1:
+            _touch(neti, 'compartments', node.compi)
 
         if is_alias:
             # swap all occurrences of alias with the original node, since we're deleting the alias
@@ -701,7 +1183,7 @@ def deleteNode(neti: int, nodei: int) -> bool:
             # put the original node in the reaction in the place of the alias node
             for reai in srcReactions:
                 rxn = net.reactions[reai]
-                rxn.reactants[node.originalIdx] = rxn.reactants[nodei]
+                _setItem(rxn.reactants, node.originalIdx, rxn.reactants[nodei])
                 # I'm not sure what should happen if both a node and its alias are reactants of
                 # the same reaction. Originally I thought of adding up the stoich of the deleted
                 # alias to that of the original node, but frankly this is such a nonsensical case
@@ -711,47 +1193,58 @@ def deleteNode(neti: int, nodei: int) -> bool:
                 #     new_species = rxn.reactants[node.originalIdx]
                 #     new_species.stoich += original_species.stoich
                 #     new_species.handlePos = original_species.handlePos
-                del rxn.reactants[nodei]
+                _delItem(rxn.reactants, nodei)
 
             for reai in destReactions:
                 rxn = net.reactions[reai]
                 # see above for explanation
-                rxn.products[node.originalIdx] = rxn.products[nodei]
+                _setItem(rxn.products, node.originalIdx, rxn.products[nodei])
                 # if original_species:
                 #     new_species = rxn.products[node.originalIdx]
                 #     new_species.stoich += original_species.stoich
                 #     new_species.handlePos = original_species.handlePos
-                del rxn.products[nodei]
+                _delItem(rxn.products, nodei)
 
             # update srcMap and destMap
-            net.srcMap[node.originalIdx] |= net.srcMap[nodei]
-            net.destMap[node.originalIdx] |= net.destMap[nodei]
-            del net.srcMap[nodei]
-            del net.destMap[nodei]
+            for reai in net.srcMap[nodei]:
+                _addToSet(net.srcMap[node.originalIdx], reai)
+            for reai in net.destMap[nodei]:
+                _addToSet(net.destMap[node.originalIdx], reai)
+            _delItem(net.srcMap, nodei)
+            _delItem(net.destMap, nodei)
 
             # replace occurrences in modifiers
-            for rxn in net.reactions.values():
-                if nodei in rxn.modifiers:
-                    rxn.modifiers.remove(nodei)
-                    rxn.modifiers.add(node.originalIdx)
+            for reai in net.modifierMap.get(nodei, ()):
+                rxn = net.reactions[reai]
+                _removeFromSet(rxn.modifiers, nodei)
+                _addToSet(rxn.modifiers, node.originalIdx)
+                _addToSet(net.modifierMap[node.originalIdx], reai)
+            if nodei in net.modifierMap:
+                _delItem(net.modifierMap, nodei)
+
+            _removeFromSet(net.aliasMap[node.originalIdx], nodei)
         else:
             # for now, disallow removing concrete nodes that are part of a reaction
             if len(net.srcMap[nodei]) != 0 or len(net.destMap[nodei]) != 0:
                 _raiseError(-4)
 
             # remove self from modifiers list
-            for rxn in net.reactions.values():
-                rxn.modifiers.discard(nodei)
+            for reai in net.modifierMap.get(nodei, ()):
+                _removeFromSet(net.reactions[reai].modifiers, nodei)
+            if nodei in net.modifierMap:
+                _delItem(net.modifierMap, nodei)
+
+            _delItem(net.nodeIdMap, node.id)
 
         # remove from compartment
         compi = getCompartmentOfNode(neti, nodei)
         if compi == -1:
-            net.baseNodes.remove(nodei)
+            _removeFromSet(net.baseNodes, nodei)
         else:
-            net.compartments[compi].node_indices.remove(nodei)
+            _removeFromSet(net.compartments[compi].node_indices, nodei)
 
         # remove from 'nodes'
-        del net.nodes[nodei]
+        _delItem(net.nodes, nodei)
 
 
     net = _getNetwork(neti)
@@ -771,12 +1264,14 @@ def deleteNode(neti: int, nodei: int) -> bool:
         deleteHelper(net, node, neti, nodei, True)
     else:
         # delete all the aliases of node if node is an original node
-        alias_indices = [i for i, n in net.nodes.items() if isinstance(n, TAliasNode) and cast(TAliasNode, n).originalIdx == nodei]
+        alias_indices = list(net.aliasMap.get(nodei, ()))
         for alias_idx in alias_indices:
             deleteHelper(net, net.nodes[alias_idx], neti, alias_idx, True)
 
         # delete original node
         deleteHelper(net, node, neti, nodei, False)
+        if nodei in net.aliasMap:
+            _delItem(net.aliasMap, nodei)
 
     return True
 
@@ -794,10 +1289,11 @@ def clearNetwork(neti: int):
         raise ExceptionDict[errCode](errorDict[errCode])
     else:
         _pushUndoStack()
+        _touch(neti, None)
         # networkDict[neti].nodes.clear()
         # networkDict[neti].reactions.clear()
         # networkDict[neti].compartments.clear()
-        networkDict[neti] = TNetwork(networkDict[neti].id)
+        _setItem(networkDict, neti, TNetwork(networkDict[neti].id))
 
 
 def getNumberOfNodes(neti: int):
@@ -1097,11 +1593,15 @@ def setNodeID(neti: int, nodei: int, newID: str):
         if nodei not in net.nodes.keys():
             errCode = -7
         else:
-            if any((n.id == newID for n in net.nodes.values() if isinstance(n, TNode))):
+            if newID in net.nodeIdMap:
                 errCode = -3
             else:
                 _pushUndoStack()
-                _getConcreteNode(neti, nodei).id = newID
+                node = _getConcreteNode(neti, nodei)
+                _touchNode(neti, node.index)
+                _delItem(net.nodeIdMap, node.id)
+                _setItem(net.nodeIdMap, newID, node.index)
+                _setAttr(node, 'id', newID)
                 return
     raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -1121,7 +1621,9 @@ def setNodeName(neti: int, nodei: int, newName: str):
             errCode = -7
         else:
             _pushUndoStack()
-            _getConcreteNode(neti, nodei).node_name = newName
+            node = _getConcreteNode(neti, nodei)
+            _touchNode(neti, node.index)
+            _setAttr(node, 'node_name', newName)
             return
     raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -1141,7 +1643,9 @@ def setNodeSBO(neti: int, nodei: int, newSBO: str):
             errCode = -7
         else:
             _pushUndoStack()
-            _getConcreteNode(neti, nodei).node_SBO = newSBO
+            node = _getConcreteNode(neti, nodei)
+            _touchNode(neti, node.index)
+            _setAttr(node, 'node_SBO', newSBO)
             return
     raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -1164,7 +1668,9 @@ def setNodeConcentration(neti: int, nodei: int, newConc: float):
             errCode = -12
         else:
             _pushUndoStack()
-            _getConcreteNode(neti, nodei).concentration = newConc
+            node = _getConcreteNode(neti, nodei)
+            _touchNode(neti, node.index)
+            _setAttr(node, 'concentration', newConc)
             return
     raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -1193,13 +1699,122 @@ def setNodeCoordinate(neti: int, nodei: int, x: float, y: float, allowNegativeCo
         # only move if node is locked
         if not n.nodeLocked:
             _pushUndoStack()
-            n.position = Vec2(x, y)
+            _touch(neti, 'nodes', nodei)
+            _setAttr(n, 'position', Vec2(x, y))
 
         return
 
     raise ExceptionDict[errCode](errorDict[errCode])
 
 
+def setNodeCoordinates(neti: int, nodeIndices: Sequence[int], positions,
+                       allowNegativeCoordinates: bool = False):
+    """
+    Move several nodes at once, in a single undo step. positions is an (N, 2) array-like of the
+    new (x, y) coordinates of the N nodes in nodeIndices. Locked nodes are left where they are.
+    errCode: -7: node index out of range
+    -5: net index out of range
+    -12: Variable out of range
+    """
+    global errCode
+    errCode = 0
+    net = _getNetwork(neti)
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    if len(positions) != len(nodeIndices):
+        _raiseError(-12)
+    for nodei in nodeIndices:
+        if nodei not in net.nodes:
+            _raiseError(-7)
+
+    lowerLimit = -1E12 if allowNegativeCoordinates else 0
+    if len(positions) != 0 and positions.min() < lowerLimit:
+        _raiseError(-12)
+
+    moves = [(nodei, x, y) for nodei, (x, y) in zip(nodeIndices, positions.tolist())
+             if not net.nodes[nodei].nodeLocked]
+    if len(moves) == 0:
+        return
+    _pushUndoStack()
+    for nodei, x, y in moves:
+        _touch(neti, 'nodes', nodei)
+        _setAttr(net.nodes[nodei], 'position', Vec2(x, y))
+
+
+def getNodeGeometryTable(neti: int) -> TGeometryTable:
+    """
+    Return the positions and sizes of all the nodes of the network as arrays; see TGeometryTable.
+    The table is built on the first call and kept up to date afterwards.
+    errCode: -5: net index out of range
+    """
+    net = _getNetwork(neti)
+    table = geometryTables.get(neti)
+    if table is None or table.network is not net:
+        table = TGeometryTable(net)
+        geometryTables[neti] = table
+    else:
+        table.refresh()
+    return table
+
+
+def getNetworkArrays(neti: int) -> TNetworkArrays:
+    """
+    Return the nodes and reactions of the network as arrays in one pass; see TNetworkArrays. The
+    result is cached until the next change to the model.
+    errCode: -5: net index out of range
+    """
+    net = _getNetwork(neti)
+    cached = networkArrays.get(neti)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    table = getNodeGeometryTable(neti)
+    nodes = net.nodes
+    nodeIds = np.empty(len(table.indices), dtype=object)
+    originalIndices = np.full(len(table.indices), -1, dtype=int)
+    for row, nodei in enumerate(table.indices.tolist()):
+        node = nodes[nodei]
+        if isinstance(node, TAliasNode):
+            originalIndices[row] = node.originalIdx
+            node = nodes[node.originalIdx]
+        nodeIds[row] = cast(TNode, node).id
+
+    reactionOrder = sorted(net.reactions)
+    reactionIds = np.empty(len(reactionOrder), dtype=object)
+    incidencePtr = np.zeros(len(reactionOrder) + 1, dtype=int)
+    columns: List[int] = list()
+    values: List[float] = list()
+    rowOf = table.rowOf
+    for row, reai in enumerate(reactionOrder):
+        rxn = net.reactions[reai]
+        reactionIds[row] = rxn.id
+        entries: Dict[int, float] = dict()
+        for nodei, species in rxn.reactants.items():
+            entries[rowOf[nodei]] = entries.get(rowOf[nodei], 0) - species.stoich
+        for nodei, species in rxn.products.items():
+            entries[rowOf[nodei]] = entries.get(rowOf[nodei], 0) + species.stoich
+        for col in sorted(entries):
+            columns.append(col)
+            values.append(entries[col])
+        incidencePtr[row + 1] = len(columns)
+
+    arrays = TNetworkArrays(
+        nodeIndices=table.indices.copy(),
+        nodeIds=nodeIds,
+        originalIndices=originalIndices,
+        positions=table.positions.copy(),
+        sizes=table.sizes.copy(),
+        reactionIndices=np.array(reactionOrder, dtype=int),
+        reactionIds=reactionIds,
+        incidencePtr=incidencePtr,
+        incidenceIndices=np.array(columns, dtype=int),
+        incidenceData=np.array(values, dtype=float),
+    )
+    for array in vars(arrays).values():
+        array.flags.writeable = False
+    networkArrays[neti] = (generation, arrays)
+    return arrays
+
+
 def setNodeSize(neti: int, nodei: int, w: float, h: float):
     """
     setNodeSize setNodeSize
@@ -1219,7 +1834,8 @@ def setNodeSize(neti: int, nodei: int, w: float, h: float):
             errCode = -12
         else:
             _pushUndoStack()
-            n.nodes[nodei].rectSize = Vec2(w, h)
+            _touch(neti, 'nodes', nodei)
+            _setAttr(n.nodes[nodei], 'rectSize', Vec2(w, h))
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -1242,7 +1858,9 @@ def setNodeFloatingStatus (neti: int, nodei: int, floatingStatus : bool):
             errCode = -7
         else:
             _pushUndoStack()
-            _getConcreteNode(neti, nodei).floating = floatingStatus
+            node = _getConcreteNode(neti, nodei)
+            _touchNode(neti, node.index)
+            _setAttr(node, 'floating', floatingStatus)
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -1264,7 +1882,8 @@ def setNodeLockedStatus (neti: int, nodei: int, lockedNode: bool):
             errCode = -7
         else:
             _pushUndoStack()
-            _getNodeOrAlias(neti, nodei).nodeLocked = lockedNode
+            _touch(neti, 'nodes', nodei)
+            _setAttr(_getNodeOrAlias(neti, nodei), 'nodeLocked', lockedNode)
             return
 
 
@@ -1279,11 +1898,12 @@ def setNodeFillColorRGB(neti: int, nodei: int, r: int, g: int, b: int):
         _raiseError(-12)
 
     node = _getConcreteNode(neti, nodei)
+    _touchNode(neti, node.index)
     for prim, _ in node.shape.items:
         if 'fill_color' in prim.__dataclass_fields__:
             old_color = getattr(prim, 'fill_color')
             assert isinstance(old_color, Color)
-            setattr(prim, 'fill_color', old_color.swapped(r, g, b))
+            _setAttr(prim, 'fill_color', old_color.swapped(r, g, b))
 
 
 def setNodeFillColorAlpha(neti: int, nodei: int, a: float):
@@ -1297,12 +1917,13 @@ def setNodeFillColorAlpha(neti: int, nodei: int, a: float):
         _raiseError(-12)
 
     node = _getConcreteNode(neti, nodei)
+    _touchNode(neti, node.index)
     for prim, _ in node.shape.items:
         if 'fill_color' in prim.__dataclass_fields__:
             a_int = int(a * 255)
             old_color = getattr(prim, 'fill_color')
             assert isinstance(old_color, Color)
-            setattr(prim, 'fill_color', old_color.swapped(a=a_int))
+            _setAttr(prim, 'fill_color', old_color.swapped(a=a_int))
 
 
 def setNodeBorderColorRGB(neti: int, nodei: int, r: int, g: int, b: int):
@@ -1316,11 +1937,12 @@ def setNodeBorderColorRGB(neti: int, nodei: int, r: int, g: int, b: int):
         _raiseError(-12)
 
     node = _getConcreteNode(neti, nodei)
+    _touchNode(neti, node.index)
     for prim, _ in node.shape.items:
         if 'border_color' in prim.__dataclass_fields__:
             old_color = getattr(prim, 'border_color')
             assert isinstance(old_color, Color)
-            setattr(prim, 'border_color', old_color.swapped(r, g, b))
+            _setAttr(prim, 'border_color', old_color.swapped(r, g, b))
 
 
 def setNodeBorderColorAlpha(neti: int, nodei: int, a: float):
@@ -1333,12 +1955,13 @@ def setNodeBorderColorAlpha(neti: int, nodei: int, a: float):
     if a < 0 or a > 1:
         _raiseError(-12)
     node = _getConcreteNode(neti, nodei)
+    _touchNode(neti, node.index)
     for prim, _ in node.shape.items:
         if 'border_color' in prim.__dataclass_fields__:
             a_int = int(a * 255)
             old_color = getattr(prim, 'border_color')
             assert isinstance(old_color, Color)
-            setattr(prim, 'border_color', old_color.swapped(a=a_int))
+            _setAttr(prim, 'border_color', old_color.swapped(a=a_int))
 
 
 def setNodeBorderWidth(neti: int, nodei: int, width: float):
@@ -1351,9 +1974,10 @@ def setNodeBorderWidth(neti: int, nodei: int, width: float):
     if width <= 0:
         _raiseError(-12)
     node = _getConcreteNode(neti, nodei)
+    _touchNode(neti, node.index)
     for prim, _ in node.shape.items:
         if 'border_width' in prim.__dataclass_fields__:
-            setattr(prim, 'border_width', width)
+            _setAttr(prim, 'border_width', width)
 
 
 def createReaction(neti: int, reaID: str, sources: List[int], targets: List[int]):
@@ -1370,7 +1994,7 @@ def createReaction(neti: int, reaID: str, sources: List[int], targets: List[int]
 
     net = _getNetwork(neti)
     # duplicate ID?
-    if any((r.id == reaID for r in net.reactions.values())):
+    if reaID in net.reactionIdMap:
         errCode = -3
     else:
         # ensure nodes exist
@@ -1382,6 +2006,7 @@ def createReaction(neti: int, reaID: str, sources: List[int], targets: List[int]
         if set(sources) == set(targets):
             raise ValueError('Reaction source node set and target node set cannot be identical.')
         _pushUndoStack()
+        _touch(neti, 'reactions', net.lastReactionIdx)
         newReact = TReaction(reaID)
 
         # Add src/target nodes
@@ -1408,10 +2033,10 @@ def getReactionIndex(neti: int, reaID: str):
         errCode = -5
     else:
         errCode = -2
-        for i, r in networkDict[neti].reactions.items():
-            if r.id == reaID:
-                errCode = 0
-                return i
+        reactionIdMap = networkDict[neti].reactionIdMap
+        if reaID in reactionIdMap:
+            errCode = 0
+            return reactionIdMap[reaID]
 
     raise ExceptionDict[errCode](errorDict[errCode])
 
@@ -1431,13 +2056,17 @@ def deleteReaction(neti: int, reai: int):
             errCode = -6
         else:
             _pushUndoStack()
+            _touch(neti, 'reactions', reai)
             net = _getNetwork(neti)
             reaction = _getReaction(neti, reai)
             for src in reaction.reactants:
-                net.srcMap[src].remove(reai)
+                _removeFromSet(net.srcMap[src], reai)
             for dest in reaction.products:
-                net.destMap[dest].remove(reai)
-            del networkDict[neti].reactions[reai]
+                _removeFromSet(net.destMap[dest], reai)
+            for mod in reaction.modifiers:
+                _removeFromSet(net.modifierMap[mod], reai)
+            _delItem(net.reactionIdMap, reaction.id)
+            _delItem(net.reactions, reai)
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -1458,9 +2087,12 @@ def clearReactions(neti: int):
     else:
         _pushUndoStack()
         net = _getNetwork(neti)
-        net.reactions.clear()
-        net.srcMap.clear()
-        net.destMap.clear()
+        _touchAll([(neti, 'reactions', reai) for reai in net.reactions])
+        _setAttr(net, 'reactions', dict())
+        _setAttr(net, 'reactionIdMap', dict())
+        _setAttr(net, 'srcMap', defaultdict(set))
+        _setAttr(net, 'destMap', defaultdict(set))
+        _setAttr(net, 'modifierMap', defaultdict(set))
 
 
 def getNumberOfReactions(neti: int):
@@ -1469,6 +2101,7 @@ def getNumberOfReactions(neti: int):
     return: >=0: ok, -5: net index out of range
     """
     global stackFlag, errCode, networkDict, undoStack, redoStack
+    errCode = 0
     if neti not in networkDict:
         errCode = -5
     if errCode < 0:
@@ -1922,11 +2555,15 @@ def setReactionID(neti: int, reai: int, newID: str):
         if reai not in reactions:
             errCode = -6
         else:
-            if any((r.id == newID for r in reactions.values())):
+            reactionIdMap = networkDict[neti].reactionIdMap
+            if newID in reactionIdMap:
                 errCode = -3
             else:
                 _pushUndoStack()
-                networkDict[neti].reactions[reai].id = newID
+                _touch(neti, 'reactions', reai)
+                _delItem(reactionIdMap, reactions[reai].id)
+                _setItem(reactionIdMap, newID, reai)
+                _setAttr(reactions[reai], 'id', newID)
                 return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -1947,7 +2584,8 @@ def setRateLaw(neti: int, reai: int, rateLaw: str):
             errCode = -6
         else:
             _pushUndoStack()
-            networkDict[neti].reactions[reai].rateLaw = rateLaw
+            _touch(neti, 'reactions', reai)
+            _setAttr(networkDict[neti].reactions[reai], 'rateLaw', rateLaw)
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -1958,7 +2596,8 @@ def setReactionCenterPos(neti: int, reai: int, centerPos: Optional[Vec2]):
     setReactionCenterPos set the center position of the Reaction
     """
     r = _getReaction(neti, reai)
-    r.centerPos = centerPos
+    _touch(neti, 'reactions', reai)
+    _setAttr(r, 'centerPos', centerPos)
 
 
 def setReactionSrcNodeStoich(neti: int, reai: int, srcNodeIdx: int, newStoich: float):
@@ -1987,7 +2626,8 @@ def setReactionSrcNodeStoich(neti: int, reai: int, srcNodeIdx: int, newStoich: f
             errCode = -8
         else:
             _pushUndoStack()
-            networkDict[neti].reactions[reai].reactants[srcNodeIdx].stoich = newStoich
+            _touch(neti, 'reactions', reai)
+            _setAttr(r[reai].reactants[srcNodeIdx], 'stoich', newStoich)
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2019,7 +2659,8 @@ def setReactionDestNodeStoich(neti: int, reai: int, destNodeIdx: int, newStoich:
             errCode = -8
         else:
             _pushUndoStack()
-            networkDict[neti].reactions[reai].products[destNodeIdx].stoich = newStoich
+            _touch(neti, 'reactions', reai)
+            _setAttr(r[reai].products[destNodeIdx], 'stoich', newStoich)
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2047,8 +2688,8 @@ def setReactionSrcNodeHandlePosition(neti: int, reai: int, srcNodeIdx: int, hand
                              srcNodeIdx, reai))
         else:
             _pushUndoStack()
-            networkDict[neti].reactions[reai].reactants[srcNodeIdx].handlePos = Vec2(
-                handlePosX, handlePosY)
+            _touch(neti, 'reactions', reai)
+            _setAttr(r[reai].reactants[srcNodeIdx], 'handlePos', Vec2(handlePosX, handlePosY))
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2076,8 +2717,8 @@ def setReactionDestNodeHandlePosition(neti: int, reai: int, destNodeIdx: int, ha
                              destNodeIdx, reai))
         else:
             _pushUndoStack()
-            networkDict[neti].reactions[reai].products[destNodeIdx].handlePos = Vec2(
-                handlePosX, handlePosY)
+            _touch(neti, 'reactions', reai)
+            _setAttr(r[reai].products[destNodeIdx], 'handlePos', Vec2(handlePosX, handlePosY))
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2102,7 +2743,8 @@ def setReactionFillColorRGB(neti: int, reai: int, R: int, G: int, B: int):
             errCode = -12
         else:
             _pushUndoStack()
-            r[reai].fillColor = r[reai].fillColor.swapped(R, G, B)
+            _touch(neti, 'reactions', reai)
+            _setAttr(r[reai], 'fillColor', r[reai].fillColor.swapped(R, G, B))
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2127,8 +2769,9 @@ def setReactionFillColorAlpha(neti: int, reai: int, a: float):
             errCode = -12
         else:
             _pushUndoStack()
+            _touch(neti, 'reactions', reai)
             A1 = int(a * 255)
-            r[reai].fillColor = r[reai].fillColor.swapped(a=A1)
+            _setAttr(r[reai], 'fillColor', r[reai].fillColor.swapped(a=A1))
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2152,7 +2795,8 @@ def setReactionLineThickness(neti: int, reai: int, thickness: float):
             errCode = -12
         else:
             _pushUndoStack()
-            networkDict[neti].reactions[reai].thickness = thickness
+            _touch(neti, 'reactions', reai)
+            _setAttr(networkDict[neti].reactions[reai], 'thickness', thickness)
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2179,15 +2823,23 @@ def setReactionBezierCurves(neti: int, reai: int, bezierCurves: bool):
             errCode = -6
         else:
             _pushUndoStack()
-            r[reai].bezierCurves = bezierCurves
+            _touch(neti, 'reactions', reai)
+            _setAttr(r[reai], 'bezierCurves', bezierCurves)
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
 
 
 def setReactionModifiers(neti: int, reai: int, modifiers: Set[int]):
+    net = _getNetwork(neti)
     r = _getReaction(neti, reai)
-    r.modifiers = copy.copy(set(modifiers))
+    _touch(neti, 'reactions', reai)
+    modifiers = set(modifiers)
+    for mod in r.modifiers - modifiers:
+        _removeFromSet(net.modifierMap[mod], reai)
+    for mod in modifiers - r.modifiers:
+        _addToSet(net.modifierMap[mod], reai)
+    _setAttr(r, 'modifiers', modifiers)
 
 
 def getReactionModifiers(neti: int, reai: int) -> Set[int]:
@@ -2197,7 +2849,8 @@ def getReactionModifiers(neti: int, reai: int) -> Set[int]:
 
 def setModifierTipStyle(neti: int, reai: int, tipStyle: ModifierTipStyle):
     r = _getReaction(neti, reai)
-    r.tipStyle = tipStyle
+    _touch(neti, 'reactions', reai)
+    _setAttr(r, 'tipStyle', tipStyle)
 
 
 def getModifierTipStyle(neti: int, reai: int) -> ModifierTipStyle:
@@ -2221,8 +2874,9 @@ def setReactionCenterHandlePosition(neti: int, reai: int, centerHandlePosX: floa
             errCode = -6
         else:
             _pushUndoStack()
-            networkDict[neti].reactions[reai].centerHandlePos = Vec2(
-                centerHandlePosX, centerHandlePosY)
+            _touch(neti, 'reactions', reai)
+            _setAttr(networkDict[neti].reactions[reai], 'centerHandlePos',
+                     Vec2(centerHandlePosX, centerHandlePosY))
             return
 
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2238,7 +2892,7 @@ def setParameter(netid: int, param_id: str, param_value: float):
         # TODO verify param values
         n = _getNetwork(netid)
         _pushUndoStack()
-        n.parameters[param_id] = param_value
+        _setItem(n.parameters, param_id, param_value)
         return
     
     raise ExceptionDict[errCode](errorDict[errCode])
@@ -2253,7 +2907,7 @@ def removeParameter(netid: int, param_id: str):
     else:
         n = _getNetwork(netid)
         _pushUndoStack()
-        n.parameters.pop(param_id)
+        _delItem(n.parameters, param_id)
         return
 
     raise ExceptionDict[errCode](errDict[errCode])
@@ -2282,9 +2936,10 @@ def addCompartment(neti: int, compID: str, x: float, y: float, w: float, h: floa
         _raiseError(-12)
     net = _getNetwork(neti)
     comp = TCompartment(compID, Vec2(x, y), Vec2(w, h))
-    if any((compID == c.id for c in net.compartments.values())):
+    if compID in net.compartmentIdMap:
         _raiseError(-3)
     _pushUndoStack()
+    _touch(neti, 'compartments', net.lastCompartmentIdx)
     return net.addCompartment(comp)
 
 
@@ -2295,20 +2950,31 @@ def deleteCompartment(neti: int, compi: int):
         _raiseError(-13)
 
     _pushUndoStack()
+    _touchAll([(neti, 'compartments', compi)] +
+              [(neti, 'nodes', nodei) for nodei in net.compartments[compi].node_indices])
     # Put all nodes in compartment in base compartment (-1)
     for nodei in net.compartments[compi].node_indices:
         assert net.nodes[nodei].compi == compi
         # move to base compartment
-        net.nodes[nodei].compi = -1
-        net.baseNodes.add(nodei)
+        _setAttr(net.nodes[nodei], 'compi', -1)
+        _addToSet(net.baseNodes, nodei)
 
-    del net.compartments[compi]
+    _delItem(net.compartmentIdMap, net.compartments[compi].id)
+    _delItem(net.compartments, compi)
 
 
 def getListOfCompartments(neti: int) -> List[int]:
     return list(_getNetwork(neti).compartments.keys())
 
 
+def getNumberOfCompartments(neti: int) -> int:
+    """
+    getNumberOfCompartments get the number of compartments in the network
+    return: >=0: ok, -5: net index out of range
+    """
+    return len(_getNetwork(neti).compartments)
+
+
 def getNodesInCompartment(neti: int, compi: int) -> List[int]:
     """Return the list of node indices in the given compartment."""
     if compi == -1:
@@ -2325,21 +2991,23 @@ def setCompartmentOfNode(neti: int, nodei: int, compi: int):
     """Set the compartment of the node, or remove it from any compartment if -1 is given."""
     net = _getNetwork(neti)
     node = _getNodeOrAlias(neti, nodei)
-    if node.compi == '':
-        node.compi = -1
     _pushUndoStack()
+    _touchAll([(neti, 'nodes', nodei)] +
+              [(neti, 'compartments', i) for i in (node.compi, compi) if i not in (-1, '')])
+    if node.compi == '':
+        _setAttr(node, 'compi', -1)
     if node.compi != -1:
-        net.compartments[node.compi].node_indices.remove(nodei)
+        _removeFromSet(net.compartments[node.compi].node_indices, nodei)
     else:
-        net.baseNodes.remove(nodei)
+        _removeFromSet(net.baseNodes, nodei)
 
     if compi != -1:
         newComp = _getCompartment(neti, compi)
-        newComp.node_indices.add(nodei)
+        _addToSet(newComp.node_indices, nodei)
     else:
-        net.baseNodes.add(nodei)
+        _addToSet(net.baseNodes, nodei)
 
-    node.compi = compi
+    _setAttr(node, 'compi', compi)
 
 
 def setCompartmentPosition(neti: int, compi: int, x: float, y: float):
@@ -2347,7 +3015,8 @@ def setCompartmentPosition(neti: int, compi: int, x: float, y: float):
         _raiseError(-12)
     _pushUndoStack()
     comp = _getCompartment(neti, compi)
-    comp.position = Vec2(x, y)
+    _touch(neti, 'compartments', compi)
+    _setAttr(comp, 'position', Vec2(x, y))
 
 
 def getCompartmentPosition(neti: int, compi: int) -> Tuple[float, float]:
@@ -2360,7 +3029,8 @@ def setCompartmentSize(neti: int, compi: int, w: float, h: float):
         _raiseError(-12)
     _pushUndoStack()
     comp = _getCompartment(neti, compi)
-    comp.rectSize = Vec2(w, h)
+    _touch(neti, 'compartments', compi)
+    _setAttr(comp, 'rectSize', Vec2(w, h))
 
 
 def getCompartmentSize(neti: int, compi: int) -> Tuple[float, float]:
@@ -2370,7 +3040,8 @@ def getCompartmentSize(neti: int, compi: int) -> Tuple[float, float]:
 
 def setCompartmentVolume(neti: int, compi: int, volume: float):
     _pushUndoStack()
-    _getCompartment(neti, compi).volume = volume
+    _touch(neti, 'compartments', compi)
+    _setAttr(_getCompartment(neti, compi), 'volume', volume)
 
 
 def getCompartmentVolume(neti: int, compi: int) -> float:
@@ -2378,8 +3049,20 @@ def getCompartmentVolume(neti: int, compi: int) -> float:
 
 
 def setCompartmentID(neti: int, compi: int, id: str):
+    """
+    errCode: -3: id repeat
+    """
+    net = _getNetwork(neti)
+    comp = _getCompartment(neti, compi)
+    if comp.id == id:
+        return
+    if id in net.compartmentIdMap:
+        _raiseError(-3)
     _pushUndoStack()
-    _getCompartment(neti, compi).id = id
+    _touch(neti, 'compartments', compi)
+    _delItem(net.compartmentIdMap, comp.id)
+    _setItem(net.compartmentIdMap, id, compi)
+    _setAttr(comp, 'id', id)
 
 
 def getCompartmentID(neti: int, compi: int) -> str:
@@ -2390,7 +3073,8 @@ def getCompartmentID(neti: int, compi: int) -> str:
 # reaction color functions to do the same.
 def setCompartmentFillColor(neti: int, compi: int, color: Color):
     _pushUndoStack()
-    _getCompartment(neti, compi).fillColor = color
+    _touch(neti, 'compartments', compi)
+    _setAttr(_getCompartment(neti, compi), 'fillColor', color)
 
 
 def getCompartmentFillColor(neti: int, compi: int) -> Color:
@@ -2399,7 +3083,8 @@ def getCompartmentFillColor(neti: int, compi: int) -> Color:
 
 def setCompartmentOutlineColor(neti: int, compi: int, color: Color):
     _pushUndoStack()
-    _getCompartment(neti, compi).outlineColor = color
+    _touch(neti, 'compartments', compi)
+    _setAttr(_getCompartment(neti, compi), 'outlineColor', color)
 
 
 def getCompartmentOutlineColor(neti: int, compi: int) -> Color:
@@ -2408,7 +3093,8 @@ def getCompartmentOutlineColor(neti: int, compi: int) -> Color:
 
 def setCompartmentOutlineThickness(neti: int, compi: int, thickness: float):
     _pushUndoStack()
-    _getCompartment(neti, compi).outlineThickness = thickness
+    _touch(neti, 'compartments', compi)
+    _setAttr(_getCompartment(neti, compi), 'outlineThickness', thickness)
 
 
 def getCompartmentOutlineThickness(neti: int, compi: int) -> float:
@@ -2451,7 +3137,8 @@ def setNodeShapeIndex(neti: int, nodei: int, shapei: int, preserve_common_fields
     '''
     net = _getNetwork(neti)
     node = _getConcreteNode(neti, nodei)
-    node.shapei = shapei
+    _touchNode(neti, node.index)
+    _setAttr(node, 'shapei', shapei)
     shp = shapeFactories[shapei].produce()
 
     if preserve_common_fields and len(node.shape.items) == len(shp.items):
@@ -2459,12 +3146,12 @@ def setNodeShapeIndex(neti: int, nodei: int, shapei: int, preserve_common_fields
             fill = node.shape.items[index][0].fill_color
             borderc = node.shape.items[index][0].border_color
             borderw = node.shape.items[index][0].border_width
-            node.shape.items[index] = shp.items[index]
+            _setItem(node.shape.items, index, shp.items[index])
             setNodePrimitiveProperty(neti, nodei, index, "fill_color", fill)
             setNodePrimitiveProperty(neti, nodei, index, "border_color", borderc)
             setNodePrimitiveProperty(neti, nodei, index, "border_width", 1.0 * borderw)
     else:
-        node.shape = shp
+        _setAttr(node, 'shape', shp)
 
 
 def setNodePrimitiveProperty(neti: int, nodei: int, prim_index: int, prop_name: str, prop_value: Any):
@@ -2479,6 +3166,7 @@ def setNodePrimitiveProperty(neti: int, nodei: int, prim_index: int, prop_name:
         prop_value: The value of the primitives's property
     '''
     node = _getConcreteNode(neti, nodei)
+    _touchNode(neti, node.index)
     if prim_index >= len(node.shape.items) or prim_index < -1:
         raise ValueError('Primitive index out of range for the shape of node {} in network {}'.format(nodei, neti))
 
@@ -2500,7 +3188,7 @@ def setNodePrimitiveProperty(neti: int, nodei: int, prim_index: int, prop_name:
                          f'is of type `{type(primitive).__name__}`.')
 
     # This is not very safe, but this is very simple to implement, so it shall be like this for now
-    setattr(primitive, prop_name, prop_value)
+    _setAttr(primitive, prop_name, prop_value)
 
 
 
@@ -2542,13 +3230,19 @@ def CreateBiBi(neti: int, reaID: str, rateLaw: str, src1i: int, src2i: int, dest
 
 
 def reset():
-    global stackFlag, errCode, networkDict, undoStack, redoStack, lastNetIndex
+    global stackFlag, errCode, networkDict, undoStack, redoStack, lastNetIndex, pendingChanges, \
+        geometryTables, networkArrays
     stackFlag = True
     errCode = 0
     networkDict = TNetworkDict()
     undoStack = TStack()
     redoStack = TStack()
     lastNetIndex = 0
+    pendingChanges = dict()
+    geometryTables = dict()
+    networkArrays = dict()
+    # not reset to zero, so that readers from before the reset see a different generation
+    _bumpGeneration()
 
 
 '''Code for serialization/deserialization.'''
@@ -2890,11 +3584,25 @@ def validateState():
     assert len(net_ids) == len(set(net_ids)), "duplicate network IDs"
 
     assert isinstance(networkDict, dict)
+    assert networkDict.idMap == {net.id: neti for neti, net in networkDict.items()}
     for neti, net in networkDict.items():
         assert isinstance(neti, int)
         assert isinstance(net, TNetwork)
 
         validateNodes(net.nodes)
+        assert net.nodeIdMap == {n.id: i for i, n in net.nodes.items() if isinstance(n, TNode)}
+        assert net.reactionIdMap == {r.id: i for i, r in net.reactions.items()}
+        assert net.compartmentIdMap == {c.id: i for i, c in net.compartments.items()}
+        aliasMap = defaultdict(set)
+        for i, n in net.nodes.items():
+            if isinstance(n, TAliasNode):
+                aliasMap[n.originalIdx].add(i)
+        assert aliasMap == {k: v for k, v in net.aliasMap.items() if v}
+        modifierMap = defaultdict(set)
+        for i, r in net.reactions.items():
+            for mod in r.modifiers:
+                modifierMap[mod].add(i)
+        assert modifierMap == {k: v for k, v in net.modifierMap.items() if v}
         # TODO validate reactions, compartments, and cross-validate
 
 
@@ -5,7 +5,8 @@ from rkviewer.config import Color
 import wx
 import abc
 import copy
-from typing import Any, List, Optional, Set, Tuple
+import numpy as np
+from typing import Any, List, Optional, Sequence, Set, Tuple
 from .canvas.geometry import Vec2
 from .canvas.data import Compartment, Node, Reaction, ModifierTipStyle, CompositeShape
 
@@ -48,6 +49,19 @@ class IController(abc.ABC):
         """Try to add the given Compartment to the canvas. Return index of added comp."""
         pass
 
+    @abc.abstractmethod
+    def add_nodes_g(self, neti: int, nodes: Sequence[Node], fill_colors: Sequence[wx.Colour],
+                    border_colors: Sequence[wx.Colour],
+                    border_widths: Sequence[float]) -> List[int]:
+        """Try to add the given Nodes, with the given colors and border widths, in one group.
+        Return the indices of the nodes added."""
+        pass
+
+    @abc.abstractmethod
+    def add_compartments_g(self, neti: int, compartments: Sequence[Compartment]) -> List[int]:
+        """Try to add the given Compartments in one group. Return the indices of the comps added."""
+        pass
+
     @abc.abstractmethod
     def add_alias_node(self, neti: int, original_index: int, pos: Vec2, size: Vec2) -> int:
         pass
@@ -62,6 +76,20 @@ class IController(abc.ABC):
         """Try to move the give node. TODO only accept node ID and new location"""
         pass
 
+    @abc.abstractmethod
+    def move_nodes(self, neti: int, node_indices: List[int], positions,
+                   allowNegativeCoordinates: bool = False):
+        """Move the given nodes to the rows of the (N, 2) array-like positions, in one step."""
+        pass
+
+    @abc.abstractmethod
+    def get_node_geometry(self, neti: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the sorted node indices, and the (N, 2) arrays of their positions and sizes.
+
+        The arrays are shared with the model and must not be modified.
+        """
+        pass
+
     @abc.abstractmethod
     def set_node_size(self, neti: int, nodei: int, size: Vec2) -> bool:
         """Try to move the give node. TODO only accept node ID and new location"""
@@ -224,6 +252,18 @@ class IController(abc.ABC):
     def get_compartment_indices(self, neti: int) -> Set[int]:
         pass
 
+    @abc.abstractmethod
+    def get_node_count(self, neti: int) -> int:
+        pass
+
+    @abc.abstractmethod
+    def get_reaction_count(self, neti: int) -> int:
+        pass
+
+    @abc.abstractmethod
+    def get_compartment_count(self, neti: int) -> int:
+        pass
+
     @abc.abstractmethod
     def get_list_of_nodes(self, neti: int) -> List[Node]:
         pass
@@ -236,6 +276,31 @@ class IController(abc.ABC):
     def get_list_of_compartments(self, neti: int) -> List[Compartment]:
         pass
 
+    @abc.abstractmethod
+    def get_network_snapshot(self, neti: int) -> Tuple[List[Node], List[Reaction], List[Compartment]]:
+        """Return the lists of nodes, reactions and compartments of the network at once."""
+        pass
+
+    @abc.abstractmethod
+    def get_network_model(self, neti: int) -> Any:
+        """Return the live model object of the network. It must not be modified."""
+        pass
+
+    @abc.abstractmethod
+    def get_network_arrays(self, neti: int) -> Any:
+        """Return the nodes and reactions of the network as read-only NumPy arrays."""
+        pass
+
+    @abc.abstractmethod
+    def get_stoichiometry(self, neti: int) -> Any:
+        """Return the stoichiometry matrix of the network, with its conservation laws."""
+        pass
+
+    @abc.abstractmethod
+    def get_model_generation(self) -> int:
+        """Return a number that changes whenever the model is changed."""
+        pass
+
     @abc.abstractmethod
     def rename_compartment(self, neti: int, compi: int, new_id: str):
         pass
@@ -296,6 +361,11 @@ class IController(abc.ABC):
     def add_reaction_g(self, neti: int, reaction: Reaction) -> int:
         pass
 
+    @abc.abstractmethod
+    def add_reactions_g(self, neti: int, reactions: Sequence[Reaction],
+                        modifiers: Sequence[Optional[Set[int]]]) -> List[int]:
+        pass
+
     @abc.abstractmethod
     def get_node_by_index(self, neti: int, nodei: int) -> Node:
         pass
@@ -338,6 +408,15 @@ class IController(abc.ABC):
     def get_application_position(self) -> wx.Point:
         pass
 
+    @abc.abstractmethod
+    def set_undo_history_limits(self, max_depth: int, max_bytes: int):
+        pass
+
+    @abc.abstractmethod
+    def get_undo_history_size(self) -> Tuple[int, int]:
+        """Return the number of undo/redo steps held and their estimated size in bytes."""
+        pass
+
     @abc.abstractmethod
     def get_composite_shape_list(self, neti: int) -> List[CompositeShape]:
         pass
@@ -389,6 +468,14 @@ class IView(abc.ABC):
         """Update all the graph objects, and redraw everything at the end"""
         pass
 
+    @abc.abstractmethod
+    def update_elements(self, nodes, reactions, compartments, removed_nodes, removed_reactions,
+                        removed_compartments):
+        """Update only the given graph objects, which were added or modified, and delete the
+        ones with the removed indices. Redraw everything at the end.
+        """
+        pass
+
 
 class ModelError(Exception):
     """Base class for other exceptions"""
@@ -423,6 +510,10 @@ class CompartmentIndexError(ModelError):
     pass
 
 
+class StaleViewError(ModelError):
+    pass
+
+
 class StoichError(ModelError):
     pass
 
@@ -9,7 +9,7 @@ from dataclasses import field, dataclass
 from traitlets.traitlets import default
 
 from wx.core import EVT_LIST_END_LABEL_EDIT
-from rkviewer.iodine import DEFAULT_SHAPE_FACTORY
+from rkviewer.iodine import DEFAULT_SHAPE_FACTORY, TAliasNode
 from rkviewer.canvas.canvas import Canvas
 from rkviewer.events import DidChangeCompartmentOfNodesEvent, post_event
 from rkviewer.canvas.utils import default_handle_positions as _default_handle_positions
@@ -18,9 +18,12 @@ from rkviewer.canvas.geometry import Rect, pt_in_rect
 from rkviewer.config import DEFAULT_ARROW_TIP
 import wx
 import copy
+import numpy as np
 from contextlib import contextmanager
-from rkviewer.mvc import IController, ModifierTipStyle
-from typing import Any, KeysView, List, Optional, Set, Tuple, Union
+from types import MappingProxyType
+from rkviewer.mvc import IController, ModifierTipStyle, StaleViewError
+from rkviewer.stoichiometry import Stoichiometry
+from typing import AbstractSet, Any, KeysView, List, Mapping, Optional, Sequence, Set, Tuple, Union
 from rkviewer.canvas import data
 from rkviewer.canvas.state import cstate, ArrowTip
 from rkviewer.config import Color, get_setting, get_theme
@@ -179,6 +182,370 @@ class CompartmentData:
     border_width: float = field()
 
 
+@dataclass(frozen=True)
+class NetworkArrays:
+    """The nodes and reactions of a network as read-only NumPy arrays, for numeric analyses.
+
+    Node rows (aliases included) and reaction rows are in increasing index order. The incidence of
+    reactions on nodes is given as a CSR sparse matrix with one row per reaction and one column per
+    node row, with the net stoichiometries as values: negative for reactants and positive for
+    products. If SciPy is available, it can be built with
+    ``scipy.sparse.csr_matrix((incidence_data, incidence_indices, incidence_ptr),
+    shape=(len(reaction_indices), len(node_indices)))``.
+
+    Attributes:
+        node_indices: (N,) The node indices.
+        node_ids: (N,) The node IDs, as objects. Alias nodes have the ID of their original node.
+        original_indices: (N,) For alias nodes, the index of the original node; -1 otherwise.
+        positions: (N, 2) The top-left positions of the nodes.
+        sizes: (N, 2) The sizes of the nodes.
+        reaction_indices: (R,) The reaction indices.
+        reaction_ids: (R,) The reaction IDs, as objects.
+        incidence_ptr: (R + 1,) The CSR row pointers of the incidence matrix.
+        incidence_indices: (nnz,) The CSR column (node row) indices of the incidence matrix.
+        incidence_data: (nnz,) The stoichiometries of the entries of the incidence matrix.
+    """
+    node_indices: np.ndarray = field()
+    node_ids: np.ndarray = field()
+    original_indices: np.ndarray = field()
+    positions: np.ndarray = field()
+    sizes: np.ndarray = field()
+    reaction_indices: np.ndarray = field()
+    reaction_ids: np.ndarray = field()
+    incidence_ptr: np.ndarray = field()
+    incidence_indices: np.ndarray = field()
+    incidence_data: np.ndarray = field()
+
+
+class NetworkView:
+    """Read-only view of a network, as it is in the model, for plugins that read a lot of it.
+
+    Unlike get_nodes() and the like, nothing is copied: each element is wrapped when it is accessed
+    and its attributes are read straight from the model. This also means that the view is only valid
+    until the next change to the model; after that, is_stale is True and accessing anything raises
+    StaleViewError. Call get_network_view() again to get a fresh view.
+
+    The collections returned by views (e.g. ReactionView.sources) are read-only views as well, and
+    must not be modified. Positions and sizes are not rounded, unlike those of NodeData.
+
+    Attributes:
+        net_index: The index of the network.
+        generation: The generation of the model this view was created at. Compare it with
+                    model_generation() to tell whether results computed from the view are out of
+                    date.
+    """
+
+    def __init__(self, net_index: int, model: Any, generation: int):
+        self.net_index = net_index
+        self.generation = generation
+        self._model = model
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the model has changed since this view was created."""
+        return _controller.get_model_generation() != self.generation
+
+    def _check(self):
+        if self.is_stale:
+            raise StaleViewError('The network has changed since this view was created')
+
+    @property
+    def nodes(self) -> Mapping[int, 'NodeView']:
+        """The nodes of the network, by index."""
+        self._check()
+        return _ElementViews(self, self._model.nodes, NodeView)
+
+    @property
+    def reactions(self) -> Mapping[int, 'ReactionView']:
+        """The reactions of the network, by index."""
+        self._check()
+        return _ElementViews(self, self._model.reactions, ReactionView)
+
+    @property
+    def compartments(self) -> Mapping[int, 'CompartmentView']:
+        """The compartments of the network, by index."""
+        self._check()
+        return _ElementViews(self, self._model.compartments, CompartmentView)
+
+    @property
+    def parameters(self) -> Mapping[str, float]:
+        """The parameters of the network, by ID."""
+        self._check()
+        return MappingProxyType(self._model.parameters)
+
+    def get_node_index(self, id: str) -> int:
+        """Return the index of the (non-alias) node with the given ID, or -1 if there is none."""
+        self._check()
+        return self._model.nodeIdMap.get(id, -1)
+
+    def get_reaction_index(self, id: str) -> int:
+        """Return the index of the reaction with the given ID, or -1 if there is none."""
+        self._check()
+        return self._model.reactionIdMap.get(id, -1)
+
+
+class _ElementViews(Mapping):
+    """Mapping from the indices of the elements of one kind to views of them, created on access."""
+
+    def __init__(self, network: NetworkView, elements: Mapping[int, Any], view_class: type):
+        self._network = network
+        self._elements = elements
+        self._view_class = view_class
+
+    def __getitem__(self, index: int):
+        self._network._check()
+        return self._view_class(self._network, index, self._elements[index])
+
+    def __iter__(self):
+        self._network._check()
+        return iter(self._elements)
+
+    def __len__(self) -> int:
+        self._network._check()
+        return len(self._elements)
+
+
+class _ReadOnlySet(AbstractSet):
+    """Read-only view of a set in the model."""
+
+    def __init__(self, network: NetworkView, elements: AbstractSet):
+        self._network = network
+        self._elements = elements
+
+    @classmethod
+    def _from_iterable(cls, it):
+        # the results of set operations are new sets, not views
+        return frozenset(it)
+
+    def __contains__(self, elem) -> bool:
+        self._network._check()
+        return elem in self._elements
+
+    def __iter__(self):
+        self._network._check()
+        return iter(self._elements)
+
+    def __len__(self) -> int:
+        self._network._check()
+        return len(self._elements)
+
+
+class NodeView:
+    """Read-only view of a node in the model; see NetworkView. The attributes are the same as those
+    of NodeData.
+    """
+    __slots__ = ('_network', 'index', '_node', '_concrete')
+
+    def __init__(self, network: NetworkView, index: int, node: Any):
+        self._network = network
+        self.index = index
+        self._node = node
+        # aliases share all properties but the geometry, the lock and the compartment with the
+        # original node
+        self._concrete = network._model.nodes[node.originalIdx] \
+            if isinstance(node, TAliasNode) else node
+
+    @property
+    def net_index(self) -> int:
+        return self._network.net_index
+
+    @property
+    def id(self) -> str:
+        self._network._check()
+        return self._concrete.id
+
+    @property
+    def position(self) -> Vec2:
+        self._network._check()
+        return self._node.position
+
+    @property
+    def size(self) -> Vec2:
+        self._network._check()
+        return self._node.rectSize
+
+    @property
+    def bounding_rect(self) -> Rect:
+        return Rect(self.position, self.size)
+
+    @property
+    def comp_idx(self) -> int:
+        self._network._check()
+        return self._node.compi
+
+    @property
+    def floating_node(self) -> bool:
+        self._network._check()
+        return self._concrete.floating
+
+    @property
+    def lock_node(self) -> bool:
+        self._network._check()
+        return self._node.nodeLocked
+
+    @property
+    def original_index(self) -> int:
+        self._network._check()
+        return self._node.originalIdx if self._concrete is not self._node else -1
+
+    @property
+    def shape_index(self) -> int:
+        self._network._check()
+        return self._concrete.shapei
+
+    @property
+    def shape(self) -> CompositeShape:
+        self._network._check()
+        return self._concrete.shape
+
+    @property
+    def concentration(self) -> float:
+        self._network._check()
+        return self._concrete.concentration
+
+    @property
+    def node_name(self) -> str:
+        self._network._check()
+        return self._concrete.node_name
+
+    @property
+    def node_SBO(self) -> str:
+        self._network._check()
+        return self._concrete.node_SBO
+
+
+class ReactionView:
+    """Read-only view of a reaction in the model; see NetworkView. The attributes are the same as
+    those of ReactionData, except that sources and targets are in the order the nodes were added.
+    """
+    __slots__ = ('_network', 'index', '_reaction')
+
+    def __init__(self, network: NetworkView, index: int, reaction: Any):
+        self._network = network
+        self.index = index
+        self._reaction = reaction
+
+    @property
+    def net_index(self) -> int:
+        return self._network.net_index
+
+    @property
+    def id(self) -> str:
+        self._network._check()
+        return self._reaction.id
+
+    @property
+    def fill_color(self) -> Color:
+        self._network._check()
+        return self._reaction.fillColor
+
+    @property
+    def line_thickness(self) -> float:
+        self._network._check()
+        return self._reaction.thickness
+
+    @property
+    def sources(self) -> AbstractSet[int]:
+        self._network._check()
+        return _ReadOnlySet(self._network, self._reaction.reactants.keys())
+
+    @property
+    def targets(self) -> AbstractSet[int]:
+        self._network._check()
+        return _ReadOnlySet(self._network, self._reaction.products.keys())
+
+    def get_reactant_stoich(self, node_index: int) -> float:
+        """Return the stoichiometry of the given reactant node."""
+        self._network._check()
+        return self._reaction.reactants[node_index].stoich
+
+    def get_product_stoich(self, node_index: int) -> float:
+        """Return the stoichiometry of the given product node."""
+        self._network._check()
+        return self._reaction.products[node_index].stoich
+
+    @property
+    def center_pos(self) -> Optional[Vec2]:
+        self._network._check()
+        return self._reaction.centerPos
+
+    @property
+    def rate_law(self) -> str:
+        self._network._check()
+        return self._reaction.rateLaw
+
+    @property
+    def using_bezier(self) -> bool:
+        self._network._check()
+        return self._reaction.bezierCurves
+
+    @property
+    def modifiers(self) -> AbstractSet[int]:
+        self._network._check()
+        return _ReadOnlySet(self._network, self._reaction.modifiers)
+
+    @property
+    def modifier_tip_style(self) -> ModifierTipStyle:
+        self._network._check()
+        return self._reaction.tipStyle
+
+
+class CompartmentView:
+    """Read-only view of a compartment in the model; see NetworkView. The attributes are the same as
+    those of CompartmentData.
+    """
+    __slots__ = ('_network', 'index', '_compartment')
+
+    def __init__(self, network: NetworkView, index: int, compartment: Any):
+        self._network = network
+        self.index = index
+        self._compartment = compartment
+
+    @property
+    def net_index(self) -> int:
+        return self._network.net_index
+
+    @property
+    def id(self) -> str:
+        self._network._check()
+        return self._compartment.id
+
+    @property
+    def nodes(self) -> AbstractSet[int]:
+        self._network._check()
+        return _ReadOnlySet(self._network, self._compartment.node_indices)
+
+    @property
+    def volume(self) -> float:
+        self._network._check()
+        return self._compartment.volume
+
+    @property
+    def position(self) -> Vec2:
+        self._network._check()
+        return self._compartment.position
+
+    @property
+    def size(self) -> Vec2:
+        self._network._check()
+        return self._compartment.rectSize
+
+    @property
+    def fill_color(self) -> Color:
+        self._network._check()
+        return self._compartment.fillColor
+
+    @property
+    def border_color(self) -> Color:
+        self._network._check()
+        return self._compartment.outlineColor
+
+    @property
+    def border_width(self) -> float:
+        self._network._check()
+        return self._compartment.outlineThickness
+
+
 def _to_color(color: wx.Colour) -> Color:
     return Color(color.Red(), color.Green(), color.Blue(), color.Alpha())
 
@@ -381,7 +748,7 @@ def node_count(net_index: int) -> int:
     """
     Returns the number of nodes in the given network.
     """
-    return len(get_nodes(net_index))
+    return _controller.get_node_count(net_index)
 
 
 def get_reactions(net_index: int) -> List[ReactionData]:
@@ -401,7 +768,7 @@ def reaction_count(net_index: int) -> int:
     """
     Returns the number of reactions in the given network.
     """
-    return len(get_reactions(net_index))
+    return _controller.get_reaction_count(net_index)
 
 
 def get_compartments(net_index: int) -> List[CompartmentData]:
@@ -421,7 +788,59 @@ def compartments_count(net_index: int) -> int:
     """
     Returns the number of compartments in the given network.
     """
-    return len(get_compartments(net_index))
+    return _controller.get_compartment_count(net_index)
+
+
+def get_network_view(net_index: int) -> NetworkView:
+    """
+    Returns a read-only view of the given network, valid until the next change to the model.
+
+    This is much cheaper than get_nodes() and get_reactions() for reading a large network, since
+    nothing is copied up front. See NetworkView for details.
+    """
+    return NetworkView(net_index, _controller.get_network_model(net_index),
+                       _controller.get_model_generation())
+
+
+def get_network_arrays(net_index: int) -> NetworkArrays:
+    """
+    Returns the nodes and reactions of the network as read-only NumPy arrays, built in one pass.
+
+    The result is cached until the network changes, so calling this repeatedly is cheap. See
+    NetworkArrays for the layout.
+    """
+    arrays = _controller.get_network_arrays(net_index)
+    return NetworkArrays(
+        node_indices=arrays.nodeIndices,
+        node_ids=arrays.nodeIds,
+        original_indices=arrays.originalIndices,
+        positions=arrays.positions,
+        sizes=arrays.sizes,
+        reaction_indices=arrays.reactionIndices,
+        reaction_ids=arrays.reactionIds,
+        incidence_ptr=arrays.incidencePtr,
+        incidence_indices=arrays.incidenceIndices,
+        incidence_data=arrays.incidenceData,
+    )
+
+
+def get_stoichiometry(net_index: int) -> Stoichiometry:
+    """
+    Returns the stoichiometry matrix of the network, with one row per species (non-alias node) and
+    one column per reaction, as a sparse matrix.
+
+    Its conservation laws and moiety matrix are computed exactly when first accessed. The result is
+    cached until the network changes, so calling this repeatedly is cheap. See Stoichiometry for
+    details.
+    """
+    return _controller.get_stoichiometry(net_index)
+
+
+def model_generation() -> int:
+    """
+    Returns the current generation of the model, which changes whenever the model is changed.
+    """
+    return _controller.get_model_generation()
 
 
 def set_compartment_of_node(net_index: int, node_index: int, comp_index: int):
@@ -589,6 +1008,26 @@ def clear_parameters(net_index: int):
 
 
 
+def _column(values: Optional[Sequence[Any]], count: int, name: str, default: Any) -> List[Any]:
+    """Return the given column of a bulk insertion as a list, or the default for every element if
+    it is None.
+    """
+    if values is None:
+        return [default] * count
+    if len(values) != count:
+        raise ValueError('Expected {} values for "{}", but got {}'.format(count, name,
+                                                                          len(values)))
+    return list(values)
+
+
+def _vec2_column(values: Optional[Union[Sequence[Vec2], np.ndarray]], count: int, name: str,
+                 default: Vec2) -> List[Vec2]:
+    """Same as _column(), but also accept an array of shape (count, 2) and convert it to Vec2s."""
+    if values is None:
+        return [default] * count
+    return [Vec2(float(x), float(y)) for x, y in _column(values, count, name, None)]
+
+
 def add_compartment(net_index: int, id: str, fill_color: Color = None, border_color: Color = None,
                     border_width: float = None, position: Vec2 = None, size: Vec2 = None,
                     volume: float = None, nodes: List[int] = None) -> int:
@@ -640,6 +1079,48 @@ def add_compartment(net_index: int, id: str, fill_color: Color = None, border_co
     return _controller.add_compartment_g(net_index, compartment)
 
 
+def add_compartments(net_index: int, ids: Sequence[str], fill_colors: Sequence[Color] = None,
+                     border_colors: Sequence[Color] = None, border_widths: Sequence[float] = None,
+                     positions: Union[Sequence[Vec2], np.ndarray] = None,
+                     sizes: Union[Sequence[Vec2], np.ndarray] = None,
+                     volumes: Sequence[float] = None) -> List[int]:
+    """Adds many compartments to the given network at once, with a single undo entry.
+
+    Each argument other than net_index and ids is a column with one value per compartment, or None
+    to use the default of add_compartment() for all of them. See add_nodes() for more details.
+
+    Returns:
+        The indices of the compartments that were added, in the order of ids.
+    """
+    count = len(ids)
+    fill_colors = _column(fill_colors, count, 'fill_colors', _to_color(get_theme('comp_fill')))
+    border_colors = _column(border_colors, count, 'border_colors',
+                            _to_color(get_theme('comp_border')))
+    border_widths = _column(border_widths, count, 'border_widths', get_theme('comp_border_width'))
+    positions = _vec2_column(positions, count, 'positions', Vec2())
+    sizes = _vec2_column(sizes, count, 'sizes',
+                         Vec2(get_setting('min_comp_width'), get_setting('min_comp_height')))
+    volumes = _column(volumes, count, 'volumes', 1)
+
+    compartments = [
+        Compartment(
+            id=id,
+            net_index=net_index,
+            nodes=list(),
+            volume=volume,
+            position=position,
+            size=size,
+            fill=_to_wxcolour(fill_color),
+            border=_to_wxcolour(border_color),
+            border_width=border_width,
+            index=-1
+        )
+        for id, fill_color, border_color, border_width, position, size, volume in
+        zip(ids, fill_colors, border_colors, border_widths, positions, sizes, volumes)
+    ]
+    return _controller.add_compartments_g(net_index, compartments)
+
+
 def add_node(net_index: int, id: str, fill_color: Color = None, border_color: Color = None,
              border_width: float = None, position: Vec2 = None, size: Vec2 = None, comp_idx: int = -1,
              floating_node: bool = True, lock_node: bool = False, shape_index: int = 0,
@@ -693,17 +1174,65 @@ def add_node(net_index: int, id: str, fill_color: Color = None, border_color: Co
         node_SBO = node_SBO,
         comp_idx = comp_idx
     )
-    with group_action():
-        nodei = _controller.add_node_g(net_index, node)
-        _controller.set_node_fill_rgb(net_index, nodei, _to_wxcolour(fill_color))
-        _controller.set_node_fill_alpha(net_index, nodei, fill_color.a)
-        _controller.set_node_border_rgb(net_index, nodei, _to_wxcolour(border_color))
-        _controller.set_node_border_alpha(net_index, nodei, border_color.a)
-        _controller.set_node_border_width(net_index, nodei, border_width)
-        _controller.set_node_concentration(net_index, nodei, concentration)
-        _controller.set_node_name(net_index, nodei, node_name)
-        _controller.set_node_SBO(net_index, nodei, node_SBO)
-    return nodei
+    return _controller.add_nodes_g(net_index, [node], [_to_wxcolour(fill_color)],
+                                   [_to_wxcolour(border_color)], [border_width])[0]
+
+
+def add_nodes(net_index: int, ids: Sequence[str], fill_colors: Sequence[Color] = None,
+              border_colors: Sequence[Color] = None, border_widths: Sequence[float] = None,
+              positions: Union[Sequence[Vec2], np.ndarray] = None,
+              sizes: Union[Sequence[Vec2], np.ndarray] = None, comp_idxs: Sequence[int] = None,
+              floating_nodes: Sequence[bool] = None, lock_nodes: Sequence[bool] = None,
+              shape_indices: Sequence[int] = None, concentrations: Sequence[float] = None,
+              node_names: Sequence[str] = None, node_SBOs: Sequence[str] = None) -> List[int]:
+    """Adds many nodes to the given network at once.
+
+    This is equivalent to calling add_node() for each ID within a group_action(), but all the nodes
+    are inserted in one go, so there is a single undo entry and the canvas is updated only once.
+
+    Each argument other than net_index and ids is a column with one value per node, or None to use
+    the default of add_node() for all the nodes. positions and sizes may also be given as arrays of
+    shape (len(ids), 2).
+
+    Returns:
+        The indices of the nodes that were added, in the order of ids.
+    """
+    count = len(ids)
+    fill_colors = _column(fill_colors, count, 'fill_colors', _to_color(get_theme('node_fill')))
+    border_colors = _column(border_colors, count, 'border_colors',
+                            _to_color(get_theme('node_border')))
+    border_widths = _column(border_widths, count, 'border_widths', get_theme('node_border_width'))
+    positions = _vec2_column(positions, count, 'positions', Vec2())
+    sizes = _vec2_column(sizes, count, 'sizes',
+                         Vec2(get_theme('node_width'), get_theme('node_height')))
+    comp_idxs = _column(comp_idxs, count, 'comp_idxs', -1)
+    floating_nodes = _column(floating_nodes, count, 'floating_nodes', True)
+    lock_nodes = _column(lock_nodes, count, 'lock_nodes', False)
+    shape_indices = _column(shape_indices, count, 'shape_indices', 0)
+    concentrations = _column(concentrations, count, 'concentrations', 0.0)
+    node_names = _column(node_names, count, 'node_names', '')
+    node_SBOs = _column(node_SBOs, count, 'node_SBOs', '')
+
+    nodes = [
+        Node(
+            id,
+            net_index,
+            pos=position,
+            size=size,
+            floatingNode=floating_node,
+            lockNode=lock_node,
+            shape_index=shape_index,
+            concentration=concentration,
+            node_name=node_name,
+            node_SBO=node_SBO,
+            comp_idx=comp_idx
+        )
+        for id, position, size, comp_idx, floating_node, lock_node, shape_index, concentration,
+        node_name, node_SBO in zip(ids, positions, sizes, comp_idxs, floating_nodes, lock_nodes,
+                                   shape_indices, concentrations, node_names, node_SBOs)
+    ]
+    return _controller.add_nodes_g(net_index, nodes, [_to_wxcolour(c) for c in fill_colors],
+                                   [_to_wxcolour(c) for c in border_colors], border_widths)
 
 
 def add_alias(net_index: int, original_index: int, position: Vec2 = None, size: Vec2 = None):
@@ -1007,6 +1536,76 @@ def add_reaction(net_index: int, id: str, reactants: List[int], products: List[i
     return reai
 
 
+def add_reactions(net_index: int, ids: Sequence[str], reactants: Sequence[List[int]],
+                  products: Sequence[List[int]], fill_colors: Sequence[Color] = None,
+                  line_thicknesses: Sequence[float] = None, rate_laws: Sequence[str] = None,
+                  handle_positions: Sequence[Optional[List[Vec2]]] = None,
+                  center_positions: Sequence[Optional[Vec2]] = None,
+                  use_beziers: Sequence[bool] = None,
+                  modifiers: Sequence[Optional[Set[int]]] = None) -> List[int]:
+    """Adds many reactions to the given network at once, with a single undo entry.
+
+    Each argument other than net_index and ids is a column with one value per reaction, or None to
+    use the default of add_reaction() for all of them. A None within handle_positions, likewise,
+    means the default handle positions for that reaction. These are computed before the reactions
+    are inserted, fetching each participating node only once.
+
+    Returns:
+        The indices of the reactions that were added, in the order of ids.
+    """
+    count = len(ids)
+    reactants = _column(reactants, count, 'reactants', None)
+    products = _column(products, count, 'products', None)
+    fill_colors = _column(fill_colors, count, 'fill_colors', _to_color(get_theme('reaction_fill')))
+    line_thicknesses = _column(line_thicknesses, count, 'line_thicknesses',
+                               get_theme('reaction_line_thickness'))
+    rate_laws = _column(rate_laws, count, 'rate_laws', '')
+    handle_positions = _column(handle_positions, count, 'handle_positions', None)
+    center_positions = _column(center_positions, count, 'center_positions', None)
+    use_beziers = _column(use_beziers, count, 'use_beziers', True)
+    modifiers = _column(modifiers, count, 'modifiers', None)
+
+    # the nodes needed to compute the default handle positions
+    node_indices = set()
+    for sources, targets, handles in zip(reactants, products, handle_positions):
+        if handles is None:
+            node_indices.update(sources)
+            node_indices.update(targets)
+    nodes = {nodei: _controller.get_node_by_index(net_index, nodei) for nodei in node_indices}
+
+    reactions = list()
+    for id, sources, targets, fill_color, line_thickness, rate_law, handles, center_pos, \
+            use_bezier in zip(ids, reactants, products, fill_colors, line_thicknesses, rate_laws,
+                              handle_positions, center_positions, use_beziers):
+        if handles is None:
+            if len(sources) != 0 and len(targets) != 0:
+                s_nodes = [nodes[nodei] for nodei in sources]
+                t_nodes = [nodes[nodei] for nodei in targets]
+                real_center = center_pos if center_pos is not None else \
+                    data.compute_centroid([n.rect for n in s_nodes + t_nodes])
+                handles = _default_handle_positions(real_center, s_nodes, t_nodes)
+            else:
+                # the model rejects this reaction when it is added
+                handles = [Vec2() for _ in range(1 + len(sources) + len(targets))]
+        elif len(handles) != 1 + len(sources) + len(targets):
+            raise ValueError('The number of handles must equal to 1 + len(reactants) + '
+                             'len(products)')
+        reactions.append(Reaction(
+            id,
+            net_index,
+            sources=sources,
+            targets=targets,
+            fill_color=_to_wxcolour(fill_color),
+            line_thickness=line_thickness,
+            rate_law=rate_law,
+            handle_positions=handles,
+            center_pos=center_pos,
+            bezierCurves=use_bezier,
+        ))
+
+    return _controller.add_reactions_g(net_index, reactions, modifiers)
+
+
 def update_reaction(net_index: int, reaction_index: int, id: str = None,
                     fill_color: Color = None, thickness: float = None, ratelaw: str = None,
                     handle_positions: List[Vec2] = None,
@@ -1390,15 +1989,14 @@ def translate_network(net_index: int, offset: Vec2, check_bounds: bool = True) -
                       shift. Defaults to True, and this is recommended unless you have already
                       performed that check yourself.
     """
-    nodes = get_nodes(net_index)
+    node_indices, positions, sizes = _controller.get_node_geometry(net_index)
+    new_positions = positions + offset.as_tuple()
     comps = get_compartments(net_index)
     if check_bounds:
         bounds = get_network_bounds(net_index)
-        for node in nodes:
-            newpos = node.position + offset
-            if newpos.x < 0 or newpos.y < 0 or newpos.x + node.size.x >= bounds.x or \
-                    newpos.y + node.size.y >= bounds.y:
-                return False
+        if len(node_indices) != 0 and (new_positions.min() < 0 or
+                                       np.any(new_positions + sizes >= bounds.as_tuple())):
+            return False
         for comp in comps:
             newpos = comp.position + offset
             if newpos.x < 0 or newpos.y < 0 or newpos.x + comp.size.x >= bounds.x or \
@@ -1406,8 +2004,7 @@ def translate_network(net_index: int, offset: Vec2, check_bounds: bool = True) -
                 return False
 
     with group_action():
-        for node in nodes:
-            move_node(net_index, node.index, node.position + offset)
+        _controller.move_nodes(net_index, node_indices.tolist(), new_positions)
         for comp in comps:
             move_compartment(net_index, comp.index, comp.position + offset)
         for reaction in _controller.get_list_of_reactions(net_index):
@@ -46,24 +46,27 @@ class PluginManager:
         self.callbacks = dict()
         self.parent_window = parent_window
         self.controller = controller
-        bind_handler(DidAddNodeEvent, self.make_notify('on_did_add_node'))
-        bind_handler(DidMoveNodesEvent, self.make_notify('on_did_move_nodes'))
-        bind_handler(DidResizeNodesEvent, self.make_notify('on_did_resize_nodes'))
-        bind_handler(DidAddCompartmentEvent, self.make_notify('on_did_add_compartment'))
-        bind_handler(DidResizeCompartmentsEvent, self.make_notify('on_did_resize_compartments'))
-        bind_handler(DidAddReactionEvent, self.make_notify('on_did_add_reaction'))
-        bind_handler(DidUndoEvent, self.make_notify('on_did_undo'))
-        bind_handler(DidRedoEvent, self.make_notify('on_did_redo'))
-        bind_handler(DidDeleteEvent, self.make_notify('on_did_delete'))
-        bind_handler(DidCommitDragEvent, self.make_notify('on_did_commit_drag'))
+        # Plugins hear about the events of a group action or a drag frame once, merged (see
+        # batch_events()). The graphics context of DidPaintCanvasEvent must be used right away.
+        for evt_cls, handler_name in (
+                (DidAddNodeEvent, 'on_did_add_node'),
+                (DidMoveNodesEvent, 'on_did_move_nodes'),
+                (DidResizeNodesEvent, 'on_did_resize_nodes'),
+                (DidAddCompartmentEvent, 'on_did_add_compartment'),
+                (DidResizeCompartmentsEvent, 'on_did_resize_compartments'),
+                (DidAddReactionEvent, 'on_did_add_reaction'),
+                (DidUndoEvent, 'on_did_undo'),
+                (DidRedoEvent, 'on_did_redo'),
+                (DidDeleteEvent, 'on_did_delete'),
+                (DidCommitDragEvent, 'on_did_commit_drag'),
+                (SelectionDidUpdateEvent, 'on_selection_did_change'),
+                (DidMoveBezierHandleEvent, 'on_did_move_bezier_handle'),
+                (DidModifyNodesEvent, 'on_did_modify_nodes'),
+                (DidModifyReactionEvent, 'on_did_modify_reactions'),
+                (DidModifyCompartmentsEvent, 'on_did_modify_compartments'),
+                (DidChangeCompartmentOfNodesEvent, 'on_did_change_compartment_of_nodes')):
+            bind_handler(evt_cls, self.make_notify(handler_name), batched=True)
         bind_handler(DidPaintCanvasEvent, self.make_notify('on_did_paint_canvas'))
-        bind_handler(SelectionDidUpdateEvent, self.make_notify('on_selection_did_change'))
-        bind_handler(DidMoveBezierHandleEvent, self.make_notify('on_did_move_bezier_handle'))
-        bind_handler(DidModifyNodesEvent, self.make_notify('on_did_modify_nodes'))
-        bind_handler(DidModifyReactionEvent, self.make_notify('on_did_modify_reactions'))
-        bind_handler(DidModifyCompartmentsEvent, self.make_notify('on_did_modify_compartments'))
-        bind_handler(DidChangeCompartmentOfNodesEvent,
-                     self.make_notify('on_did_change_compartment_of_nodes'))
         self.logger = logging.getLogger('plugin-manager')
         self.error_callback = lambda _: None  # By default don't do anything
 
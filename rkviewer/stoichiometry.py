@@ -0,0 +1,240 @@
+"""Structural analysis of reaction networks: the stoichiometry matrix and its conservation laws.
+
+The conservation laws are computed with exact integer arithmetic on sparse rows, so that they are
+free of the rounding errors of SVD-based null spaces, and so that the work depends on the number of
+nonzero stoichiometries rather than on the size of the dense matrix.
+"""
+# pylint: disable=maybe-no-member
+from fractions import Fraction
+from functools import reduce
+import heapq
+from math import gcd
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .iodine import TNetworkArrays, getNetworkArrays
+
+
+class Stoichiometry:
+    '''The stoichiometry matrix of a network, with one row per species and one column per reaction.
+
+    Species are the nodes that are not aliases, in increasing index order; the stoichiometries of
+    alias nodes count towards their original nodes. The matrix is stored as CSR arrays; use
+    to_scipy() or to_dense() for other formats. The conservation laws are computed on first access
+    and kept with the object, which is replaced by get_stoichiometry() once the network changes.
+    '''
+    species_indices: np.ndarray  #: (M,) node indices of the species
+    species_ids: np.ndarray  #: (M,) IDs of the species, as objects
+    reaction_indices: np.ndarray  #: (R,) reaction indices
+    reaction_ids: np.ndarray  #: (R,) reaction IDs, as objects
+    matrix_ptr: np.ndarray  #: (M + 1,) CSR row pointers of the matrix
+    matrix_indices: np.ndarray  #: (nnz,) CSR column (reaction) indices of the matrix
+    matrix_data: np.ndarray  #: (nnz,) stoichiometries, negative for reactants
+
+    def __init__(self, arrays: TNetworkArrays):
+        self.arrays = arrays
+        is_species = arrays.originalIndices == -1
+        self.species_indices = arrays.nodeIndices[is_species]
+        self.species_ids = arrays.nodeIds[is_species]
+        self.reaction_indices = arrays.reactionIndices
+        self.reaction_ids = arrays.reactionIds
+        self._exact_laws: Optional[List[Dict[int, int]]] = None
+        self._conservation_laws: Optional[np.ndarray] = None
+        self._moiety_matrix: Optional[np.ndarray] = None
+
+        # species row of each node row
+        species_row = np.empty(len(arrays.nodeIndices), dtype=int)
+        species_row[is_species] = np.arange(len(self.species_indices))
+        species_row[~is_species] = np.searchsorted(self.species_indices,
+                                                   arrays.originalIndices[~is_species])
+
+        # the incidence as (species, reaction) keys, summing those of aliases and their originals
+        num_reactions = max(len(self.reaction_indices), 1)
+        reactions = np.repeat(np.arange(len(self.reaction_indices)), np.diff(arrays.incidencePtr))
+        keys = species_row[arrays.incidenceIndices] * num_reactions + reactions
+        order = np.argsort(keys, kind='stable')
+        keys, data = keys[order], arrays.incidenceData[order]
+        if len(keys):
+            keys, starts = np.unique(keys, return_index=True)
+            data = np.add.reduceat(data, starts)
+        nonzero = data != 0
+        keys, data = keys[nonzero], data[nonzero]
+
+        self.matrix_ptr = np.zeros(len(self.species_indices) + 1, dtype=int)
+        np.cumsum(np.bincount(keys // num_reactions, minlength=len(self.species_indices)),
+                  out=self.matrix_ptr[1:])
+        self.matrix_indices = keys % num_reactions
+        self.matrix_data = data
+        for array in (self.matrix_ptr, self.matrix_indices, self.matrix_data):
+            array.flags.writeable = False
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.species_indices), len(self.reaction_indices)
+
+    def to_dense(self) -> np.ndarray:
+        """Return the matrix as a dense array. Only use this for small networks."""
+        dense = np.zeros(self.shape)
+        dense[np.repeat(np.arange(self.shape[0]), np.diff(self.matrix_ptr)),
+              self.matrix_indices] = self.matrix_data
+        return dense
+
+    def to_scipy(self) -> Any:
+        """Return the matrix as a scipy.sparse.csr_matrix. This requires SciPy to be installed."""
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.matrix_data, self.matrix_indices, self.matrix_ptr),
+                          shape=self.shape)
+
+    @property
+    def conservation_laws(self) -> np.ndarray:
+        """(K, M) A basis of the conservation laws, i.e. of the vectors L with L N = 0.
+
+        Each row has coprime integer entries. Species that take part in no reaction are left out,
+        since each of them would only conserve itself.
+        """
+        if self._conservation_laws is None:
+            self._conservation_laws = self._to_dense_rows(self._get_exact_laws())
+        return self._conservation_laws
+
+    @property
+    def moiety_matrix(self) -> np.ndarray:
+        """(K, M) The conservation laws in reduced row echelon form, i.e. the conserved moieties.
+        """
+        if self._moiety_matrix is None:
+            self._moiety_matrix = self._to_dense_rows(_rref(self._get_exact_laws()))
+        return self._moiety_matrix
+
+    def _get_exact_laws(self) -> List[Dict[int, int]]:
+        if self._exact_laws is None:
+            rows = list()
+            for i in range(self.shape[0]):
+                start, end = self.matrix_ptr[i], self.matrix_ptr[i + 1]
+                rows.append({int(j): Fraction(v).limit_denominator()
+                             for j, v in zip(self.matrix_indices[start:end],
+                                             self.matrix_data[start:end])})
+            self._exact_laws = _left_null_space(rows)
+        return self._exact_laws
+
+    def _to_dense_rows(self, rows: List[Dict[int, Any]]) -> np.ndarray:
+        dense = np.zeros((len(rows), self.shape[0]))
+        for i, row in enumerate(rows):
+            for j, v in row.items():
+                dense[i, j] = float(v)
+        dense.flags.writeable = False
+        return dense
+
+
+def _combine(a: Dict[int, Any], x: Any, b: Dict[int, Any], y: Any) -> Dict[int, Any]:
+    """Return x * a + y * b, for sparse rows a and b, without the zero entries."""
+    out = {k: x * v for k, v in a.items()}
+    for k, v in b.items():
+        s = out.get(k, 0) + y * v
+        if s:
+            out[k] = s
+        else:
+            out.pop(k, None)
+    return out
+
+
+def _left_null_space(rows: List[Dict[int, Fraction]]) -> List[Dict[int, int]]:
+    """Return a basis of the left null space of the matrix with the given sparse rows.
+
+    Rows that are entirely zero are left out. This does fraction-free Gaussian elimination on the
+    rows augmented with the identity, with a pivot order that limits fill-in.
+    The rows that are eliminated to zero are the combinations of the original rows in the null
+    space.
+    """
+    stoich: Dict[int, Dict[int, int]] = dict()
+    combos: Dict[int, Dict[int, int]] = dict()
+    rows_of_col: Dict[int, set] = dict()
+    for i, row in enumerate(rows):
+        if not row:
+            continue
+        scale = reduce(lambda a, b: a * b // gcd(a, b), (v.denominator for v in row.values()), 1)
+        stoich[i] = {j: int(v * scale) for j, v in row.items()}
+        # the rows are scaled to integers, so the combinations have to be scaled the same way
+        combos[i] = {i: scale}
+        for j in row:
+            rows_of_col.setdefault(j, set()).add(i)
+
+    # Markowitz-style ordering: eliminate the columns with the fewest rows first, e.g. those of
+    # exchange reactions, which cause no fill-in at all. Entries go stale as the counts change.
+    heap = [(len(col_rows), col) for col, col_rows in rows_of_col.items()]
+    heapq.heapify(heap)
+
+    def update(col: int, i: int, add: bool):
+        col_rows = rows_of_col[col]
+        if add:
+            col_rows.add(i)
+        else:
+            col_rows.discard(i)
+        if col_rows:
+            heapq.heappush(heap, (len(col_rows), col))
+
+    while heap:
+        count, col = heapq.heappop(heap)
+        candidates = rows_of_col[col]
+        if count != len(candidates):
+            continue
+        pivot = min(candidates, key=lambda i: (len(stoich[i]), i))
+        for j in stoich[pivot]:
+            update(j, pivot, False)
+        p = stoich[pivot][col]
+        for i in list(candidates):
+            v = stoich[i][col]
+            new_stoich = _combine(stoich[i], p, stoich[pivot], -v)
+            new_combo = _combine(combos[i], p, combos[pivot], -v)
+            g = reduce(gcd, new_stoich.values(), reduce(gcd, new_combo.values(), 0))
+            if g > 1:
+                new_stoich = {j: s // g for j, s in new_stoich.items()}
+                new_combo = {j: c // g for j, c in new_combo.items()}
+            for j in stoich[i].keys() - new_stoich.keys():
+                update(j, i, False)
+            for j in new_stoich.keys() - stoich[i].keys():
+                update(j, i, True)
+            stoich[i], combos[i] = new_stoich, new_combo
+        del stoich[pivot], combos[pivot]
+
+    # every remaining row has been eliminated to zero
+    laws = list()
+    for i in sorted(combos):
+        law = combos[i]
+        if law[min(law)] < 0:
+            law = {j: -c for j, c in law.items()}
+        laws.append(law)
+    return laws
+
+
+def _rref(rows: List[Dict[int, int]]) -> List[Dict[int, Fraction]]:
+    """Return the reduced row echelon form of the matrix with the given sparse, independent rows,
+    computed exactly."""
+    remaining = [{j: Fraction(v) for j, v in row.items()} for row in rows]
+    done: List[Dict[int, Fraction]] = list()
+    for col in sorted(set().union(*remaining)):
+        candidates = [row for row in remaining if col in row]
+        if not candidates:
+            continue
+        pivot = min(candidates, key=len)
+        remaining.remove(pivot)
+        pivot = {j: v / pivot[col] for j, v in pivot.items()}
+        done = [_combine(row, 1, pivot, -row[col]) if col in row else row for row in done]
+        remaining = [_combine(row, 1, pivot, -row[col]) if col in row else row
+                     for row in remaining]
+        done.append(pivot)
+    return done
+
+
+# Stoichiometry of each network, by network index; see get_stoichiometry()
+_stoichiometries: Dict[int, Stoichiometry] = dict()
+
+
+def get_stoichiometry(neti: int) -> Stoichiometry:
+    """Return the stoichiometry of the given network. The result, including the conservation laws
+    once they are computed, is cached until the network changes.
+    """
+    arrays = getNetworkArrays(neti)
+    stoich = _stoichiometries.get(neti)
+    # getNetworkArrays() returns the same object for as long as the model does not change
+    if stoich is None or stoich.arrays is not arrays:
+        stoich = Stoichiometry(arrays)
+        _stoichiometries[neti] = stoich
+    return stoich
@@ -3,7 +3,7 @@
 import os
 from pathlib import Path
 from rkviewer.plugin.classes import CATEGORY_NAMES, PluginCategory
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import json
 
 # pylint: disable=maybe-no-member
@@ -85,10 +85,11 @@ class EditPanel(fnb.FlatNotebook):
 
         bind_handler(CanvasDidUpdateEvent, self.OnCanvasDidUpdate)
         bind_handler(SelectionDidUpdateEvent, self.OnSelectionDidUpdate)
-        bind_handler(DidMoveNodesEvent, self.OnNodesDidMove)
-        bind_handler(DidResizeNodesEvent, self.OnDidResizeNodes)
-        bind_handler(DidMoveCompartmentsEvent, self.OnCompartmentsDidMove)
-        bind_handler(DidResizeCompartmentsEvent, self.OnDidResizeCompartments)
+        # these only refresh the forms, so they only need to run once per drag frame
+        bind_handler(DidMoveNodesEvent, self.OnNodesDidMove, batched=True)
+        bind_handler(DidResizeNodesEvent, self.OnDidResizeNodes, batched=True)
+        bind_handler(DidMoveCompartmentsEvent, self.OnCompartmentsDidMove, batched=True)
+        bind_handler(DidResizeCompartmentsEvent, self.OnDidResizeCompartments, batched=True)
 
     def OnCanvasDidUpdate(self, evt):
         self.node_form.UpdateNodes(self.canvas.nodes)
@@ -506,6 +507,8 @@ class MainFrame(wx.Frame):
         load_theme_settings()
         self.appSettings = AppSettings()
         self.appSettings.load_appSettings()
+        controller.set_undo_history_limits(self.appSettings.undo_max_depth,
+                                           self.appSettings.undo_max_mb * 1024 * 1024)
 
         self.manager = manager
         status_fields = get_setting('status_fields')
@@ -759,6 +762,7 @@ class MainFrame(wx.Frame):
 
     def ReloadSettings(self):
         load_theme_settings()
+        self.main_panel.canvas.ReloadTheme()
         err = pop_settings_err()
         if err is None:
             # msg = NotificationMessage('Settings reloaded', 'Some changes may not be applied until the application is restarted.')
@@ -1032,3 +1036,13 @@ class RKView(IView):
         Note that RKView takes ownership of the list of nodes and may modify it.
         """
         self.canvas_panel.Reset(nodes, reactions, compartments)
+
+    def update_elements(self, nodes: List[Node], reactions: List[Reaction],
+                        compartments: List[Compartment], removed_nodes: Set[int],
+                        removed_reactions: Set[int], removed_compartments: Set[int]):
+        """Update the nodes, reactions and compartments that changed.
+
+        Note that RKView takes ownership of the lists given and may modify them.
+        """
+        self.canvas_panel.PatchElements(nodes, reactions, compartments, removed_nodes,
+                                        removed_reactions, removed_compartments)
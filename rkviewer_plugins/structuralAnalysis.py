@@ -61,6 +61,7 @@ class StructuralAnalysis(WindowedPlugin):
         """
         super().__init__()
         self.index_list=[]
+        self.species_indices=[]
 
 
     def create_window(self, dialog):
@@ -123,66 +124,6 @@ class StructuralAnalysis(WindowedPlugin):
         Get the network on canvas.
         Calculate the Stoichiometry Matrix and Conservation Matrix for the randon network.
         """
-        def nullspace(A, atol=1e-13, rtol=0):  
-            A = _np.atleast_2d(A)
-            u, s, vh = _np.linalg.svd(A)
-            tol = max(atol, rtol * s[0])
-            nnz = (s >= tol).sum()
-            ns = vh[nnz:].conj().T
-            return ns
-
-        #https://gist.github.com/sgsfak/77a1c08ac8a9b0af77393b24e44c9547
-        def rref(B, tol=1e-8, debug=False):
-          A = B.copy()
-          rows, cols = A.shape
-          r = 0
-          pivots_pos = []
-          row_exchanges = _np.arange(rows)
-          for c in range(cols):
-            if debug: print ("Now at row", r, "and col", c, "with matrix:"); print (A)
-        
-            ## Find the pivot row:
-            pivot = _np.argmax (_np.abs (A[r:rows,c])) + r
-            m = _np.abs(A[pivot, c])
-            if debug: print ("Found pivot", m, "in row", pivot)
-            if m <= tol:
-              ## Skip column c, making sure the approximately zero terms are
-              ## actually zero.
-              A[r:rows, c] = _np.zeros(rows-r)
-              if debug: print ("All elements at and below (", r, ",", c, ") are zero.. moving on..")
-            else:
-              ## keep track of bound variables
-              pivots_pos.append((r,c))
-        
-              if pivot != r:
-                ## Swap current row and pivot row
-                A[[pivot, r], c:cols] = A[[r, pivot], c:cols]
-                row_exchanges[[pivot,r]] = row_exchanges[[r,pivot]]
-                
-                if debug: print ("Swap row", r, "with row", pivot, "Now:"); print (A)
-        
-              ## Normalize pivot row
-              A[r, c:cols] = A[r, c:cols] / A[r, c];
-        
-              ## Eliminate the current column
-              v = A[r, c:cols]
-              ## Above (before row r):
-              if r > 0:
-                ridx_above = _np.arange(r)
-                A[ridx_above, c:cols] = A[ridx_above, c:cols] - _np.outer(v, A[ridx_above, c]).T
-                if debug: print ("Elimination above performed:"); print (A)
-              ## Below (after row r):
-              if r < rows-1:
-                ridx_below = _np.arange(r+1,rows)
-                A[ridx_below, c:cols] = A[ridx_below, c:cols] - _np.outer(v, A[ridx_below, c]).T
-                if debug: print ("Elimination below performed:"); print (A)
-              r += 1
-            ## Check if done
-            if r == rows:
-              break;
-          return (A, pivots_pos, row_exchanges)
-
-
         netIn = 0
         numNodes = api.node_count(netIn)
         
@@ -197,40 +138,20 @@ class StructuralAnalysis(WindowedPlugin):
             except:
                 self.default_color = api.Color(255, 204, 153) #random network node color
 
-            largest_node_index = 0
-            for i in range(numNodes):
-                if allNodes[i].index > largest_node_index:
-                    largest_node_index = allNodes[i].index
-            row = largest_node_index + 1
-            numReactions = api.reaction_count(netIn)
-            col = numReactions
-            self.st = _np.zeros((row, col))
-            allReactions = api.get_reactions(netIn)
-            for i in range(numReactions):
-                for j in range(len(allReactions[i].sources)):
-                    for m in range(row):
-                        if allReactions[i].sources[j] == m:
-                            self.st.itemset((m, i), -1)
-                for j in range(len(allReactions[i].targets)):
-                    for m in range(row):
-                        if allReactions[i].targets[j] == m:
-                            self.st.itemset((m,i), 1)
-
-
-            stt = _np.transpose (self.st)
-            m = _np.transpose (nullspace (stt))
-            moi_mat = rref(m)[0]
-
-            # set all the values of non-existing nodes to zero
-            for i in range(moi_mat.shape[0]):
-                for j in range(moi_mat.shape[1]):
-                    if _np.array_equal(self.st[j,:], _np.zeros(self.st.shape[1])):
-                        moi_mat.itemset((i,j), 0.)
+            # the stoichiometry matrix and the conservation laws are computed by the core, which
+            # caches them until the network changes
+            stoich = api.get_stoichiometry(netIn)
+            self.species_indices = stoich.species_indices
+            self.st = stoich.to_dense()
+            moi_mat = stoich.moiety_matrix
+
+            self._fit_grid(self.tab1.grid_st, self.st.shape[0], self.st.shape[1])
+            self._fit_grid(self.tab2.grid_moi, moi_mat.shape[0], moi_mat.shape[1])
 
             for i in range(self.st.shape[1]):
                 self.tab1.grid_st.SetColLabelValue(i, "J" + str(i))
             for i in range(self.st.shape[0]):
-                id = allNodes[i].id
+                id = stoich.species_ids[i]
                 self.tab1.grid_st.SetRowLabelValue(i, id)
             
             for row in range(self.st.shape[0]):
@@ -238,22 +159,22 @@ class StructuralAnalysis(WindowedPlugin):
                     self.tab1.grid_st.SetCellValue(row, col,"%d" % self.st.item(row,col))
 
             for i in range(moi_mat.shape[1]):
-                id = allNodes[i].id
+                id = stoich.species_ids[i]
                 self.tab2.grid_moi.SetColLabelValue(i, id)
 
-            CSUM_id = 0
-
             for i in range(moi_mat.shape[0]):
-                a = moi_mat[i,:]
-                a = [0. if abs(a_) < 0.005 else a_ for a_ in a] # some elements are very small
-                if _np.array_equal(a, _np.zeros(moi_mat.shape[1])): # delete the row if all the elements are zero
-                    CSUM_id = CSUM_id
-                else:
-                    self.tab2.grid_moi.SetRowLabelValue(CSUM_id, "CSUM" + str(CSUM_id))    
+                self.tab2.grid_moi.SetRowLabelValue(i, "CSUM" + str(i))
+                for j in range(moi_mat.shape[1]):
+                    self.tab2.grid_moi.SetCellValue(i, j, format (moi_mat[i,j], ".2f"))
 
-                    for j in range(moi_mat.shape[1]):
-                        self.tab2.grid_moi.SetCellValue(CSUM_id, j, format (a[j], ".2f")) 
-                    CSUM_id += 1 
+    def _fit_grid(self, grid, rows, cols):
+        """
+        Add rows and columns to the grid so that it can hold a matrix of the given shape.
+        """
+        if grid.GetNumberRows() < rows:
+            grid.AppendRows(rows - grid.GetNumberRows())
+        if grid.GetNumberCols() < cols:
+            grid.AppendCols(cols - grid.GetNumberCols())
 
 
     def printSelectedCells(self, top_left, bottom_right):
@@ -277,7 +198,7 @@ class StructuralAnalysis(WindowedPlugin):
             row, col = cell
             value = self.tab2.grid_moi.GetCellValue(row,col)
             if value != "0.00" and value != "+0.00" and value != "-0.00" and value !="":
-                self.index_list.append(int(col))
+                self.index_list.append(int(self.species_indices[col]))
 
 
     def color_callback(self, evt):
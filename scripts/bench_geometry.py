@@ -0,0 +1,104 @@
+"""Microbenchmark for the Vec2 and Rect value types.
+
+Compares the slotted classes in rkviewer.canvas.geometry against the equivalent __dict__-backed
+layout they replaced, both per operation (timeit) and per object (tracemalloc). Run from the
+repository root:
+
+    python scripts/bench_geometry.py
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rkviewer.canvas.geometry import Rect, Vec2  # noqa: E402
+
+
+class DictVec2:
+    """The previous Vec2 layout: instance __dict__ and a stateful iterator."""
+
+    def __init__(self, x=None, y=None):
+        self._i = 0
+        if x is None:
+            self._x = 0
+            self._y = 0
+        elif y is None:
+            self._x, self._y = x
+        else:
+            self._x = x
+            self._y = y
+
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    def __iter__(self):
+        self._i = 0
+        return self
+
+    def __next__(self):
+        if self._i == 0:
+            self._i += 1
+            return self.x
+        elif self._i == 1:
+            self._i += 1
+            return self.y
+        else:
+            raise StopIteration
+
+    def __add__(self, other):
+        return DictVec2(self.x + other.x, self.y + other.y)
+
+
+class DictRect:
+    def __init__(self, pos, size):
+        self.position = pos
+        self.size = size
+
+
+N_OBJECTS = 100_000
+N_OPS = 500_000
+
+
+def bytes_per_object(factory) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [factory(i) for i in range(N_OBJECTS)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return (after - before) / N_OBJECTS
+
+
+def ns_per_op(stmt: str, setup: str) -> float:
+    t = min(timeit.repeat(stmt, setup, globals=globals(), number=N_OPS, repeat=5))
+    return t / N_OPS * 1e9
+
+
+def row(name: str, old: float, new: float, unit: str):
+    print('{:<14}{:>12.1f}{:>12.1f}  {:<6}{:>8.0%}'.format(name, old, new, unit, 1 - new / old))
+
+
+def main():
+    print('{:<14}{:>12}{:>12}  {:<6}{:>8}'.format('', 'dict', 'slots', '', 'saved'))
+    row('Vec2 memory', bytes_per_object(lambda i: DictVec2(i, i)),
+        bytes_per_object(lambda i: Vec2(i, i)), 'B/obj')
+    row('Rect memory', bytes_per_object(lambda i: DictRect(DictVec2(i, i), DictVec2(1, 1))),
+        bytes_per_object(lambda i: Rect(Vec2(i, i), Vec2(1, 1))), 'B/obj')
+
+    for name, stmt in (('construct', 'V(1.5, 2.5)'),
+                       ('add', 'a + b'),
+                       ('unpack', 'x, y = a'),
+                       ('attr access', 'a.x + a.y')):
+        old = ns_per_op(stmt, 'V = DictVec2; a = V(1.5, 2.5); b = V(3.0, 4.0)')
+        new = ns_per_op(stmt, 'V = Vec2; a = V(1.5, 2.5); b = V(3.0, 4.0)')
+        row(name, old, new, 'ns/op')
+
+
+if __name__ == '__main__':
+    main()
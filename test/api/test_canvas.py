@@ -0,0 +1,18 @@
+from rkviewer.canvas.geometry import Vec2
+from rkviewer.plugin import api
+from test.api.common import DummyAppTest
+
+
+class TestCanvas(DummyAppTest):
+    def test_select_box_handles(self):
+        api.add_node(self.neti, 'a', position=Vec2(100, 100), size=Vec2(50, 30))
+        canvas = api.get_canvas()
+        select_box = canvas._select_box
+        canvas.sel_nodes_idx.set_item({0})
+        # the bottom-right resize handle, which is outside of the node
+        handle_pos = select_box._resize_handle_pos(4)
+        self.assertTrue(select_box.pos_inside(handle_pos))
+        self.assertIn(select_box, canvas._ElementsAt(handle_pos))
+        # the select box is only added once, however often the canvas is reset
+        api.add_node(self.neti, 'b')
+        self.assertEqual(1, list(canvas._widget_elements).count(select_box))
@@ -2,12 +2,16 @@
 from test.api.common import DummyAppTest
 from typing import List
 from rkviewer.canvas.data import Reaction
-from rkviewer.mvc import CompartmentIndexError, NetIndexError, NodeIndexError, ReactionIndexError
+from rkviewer.mvc import (CompartmentIndexError, NetIndexError, NodeIndexError, ReactionIndexError,
+                          StaleViewError)
 from rkviewer.plugin.api import Node, NodeData, Vec2
 from rkviewer.plugin import api
 from rkviewer import iodine
 import wx
 import time
+import numpy as np
+from unittest import mock
+from rkviewer.controller import Controller
 
 
 class TestNode(DummyAppTest):
@@ -65,6 +69,41 @@ class TestNode(DummyAppTest):
         with self.assertRaises(ValueError):
             api.update_node(self.neti, 0, position=csize - Vec2(1, 1))
 
+    def test_counts(self):
+        for i in range(3):
+            api.add_node(self.neti, id='n{}'.format(i))
+        api.add_reaction(self.neti, 'r', [0], [1])
+        api.add_compartment(self.neti, id='c')
+        # the counts must not create the nodes, reactions or compartments
+        with mock.patch.object(Controller, '_make_node', side_effect=AssertionError), \
+                mock.patch.object(Controller, '_make_reaction', side_effect=AssertionError), \
+                mock.patch.object(Controller, '_make_compartment', side_effect=AssertionError):
+            self.assertEqual(3, api.node_count(self.neti))
+            self.assertEqual(1, api.reaction_count(self.neti))
+            self.assertEqual(1, api.compartments_count(self.neti))
+        with self.assertRaises(NetIndexError):
+            api.node_count(-1)
+
+    def test_add_many(self):
+        indices = api.add_nodes(self.neti, ['a', 'b', 'c'],
+                                positions=np.array([[10, 20], [30, 40], [50, 60]]),
+                                concentrations=[1.0, 2.0, 3.0],
+                                node_names=['A', 'B', 'C'])
+        self.assertEqual([0, 1, 2], indices)
+        nodes = api.get_nodes(self.neti)
+        self.assertEqual(['a', 'b', 'c'], [n.id for n in nodes])
+        self.assertEqual([Vec2(10, 20), Vec2(30, 40), Vec2(50, 60)], [n.position for n in nodes])
+        self.assertEqual([1.0, 2.0, 3.0], [n.concentration for n in nodes])
+        self.assertEqual(['A', 'B', 'C'], [n.node_name for n in nodes])
+        # the defaults are the same as those of add_node()
+        api.add_node(self.neti, 'd')
+        single = api.get_node_by_index(self.neti, 3)
+        self.assertEqual(single.shape.items[0][0].fill_color, nodes[0].shape.items[0][0].fill_color)
+        self.assertEqual(single.size, nodes[0].size)
+
+        with self.assertRaises(ValueError):
+            api.add_nodes(self.neti, ['e', 'f'], sizes=[Vec2(10, 10)])
+
 
 class TestAlias(DummyAppTest):
     def test_add_alias(self):
@@ -111,3 +150,31 @@ class TestAlias(DummyAppTest):
 
     def test_shared_props(self):
         pass  #TODO
+
+
+class TestNetworkView(DummyAppTest):
+    def test_network_view(self):
+        api.add_node(self.neti, 'a', position=Vec2(10, 20))
+        api.add_node(self.neti, 'b')
+        api.add_reaction(self.neti, 'r', [0], [1])
+        view = api.get_network_view(self.neti)
+        self.assertFalse(view.is_stale)
+        self.assertEqual([0, 1], list(view.nodes))
+        node = view.nodes[0]
+        self.assertEqual('a', node.id)
+        self.assertEqual(Vec2(10, 20), node.position)
+        self.assertEqual(-1, node.original_index)
+        reaction = view.reactions[0]
+        self.assertEqual({0}, reaction.sources)
+        self.assertEqual({1}, reaction.targets)
+        self.assertEqual(1, reaction.get_reactant_stoich(0))
+        self.assertEqual(1, view.get_reaction_index('r'))
+
+        api.move_node(self.neti, 0, Vec2(30, 40))
+        self.assertTrue(view.is_stale)
+        self.assertNotEqual(view.generation, api.model_generation())
+        with self.assertRaises(StaleViewError):
+            node.position
+        with self.assertRaises(StaleViewError):
+            view.nodes
+        self.assertEqual(Vec2(30, 40), api.get_network_view(self.neti).nodes[0].position)
@@ -22,6 +22,54 @@ class TestReaction(DummyAppTest):
         self.assertEqual(0, reactions[0].sources[0])
         self.assertEqual(1, reactions[0].targets[0])
 
+    def test_add_many(self):
+        indices = api.add_reactions(self.neti, ['AB', 'BC'], [[0], [1]], [[1], [2]],
+                                    modifiers=[None, {0}])
+        self.assertEqual([0, 1], indices)
+        reactions = api.get_reactions(self.neti)
+        self.assertEqual([[0], [1]], [r.sources for r in reactions])
+        self.assertEqual([[1], [2]], [r.targets for r in reactions])
+        self.assertEqual([set(), {0}], [r.modifiers for r in reactions])
+        # the default handles are the same as those of add_reaction()
+        api.add_reaction(self.neti, 'AB2', [0], [1])
+        self.assertEqual(api.get_reaction_center_handle(self.neti, 2),
+                         api.get_reaction_center_handle(self.neti, 0))
+
+        with self.assertRaises(ValueError):
+            api.add_reactions(self.neti, ['CA'], [[2]], [[0]],
+                              handle_positions=[[Vec2(), Vec2()]])
+
+    def test_network_arrays(self):
+        api.add_reaction(self.neti, 'AB', [0], [1])
+        api.add_reaction(self.neti, 'BAC', [1], [0, 2])
+        api.set_reactant_stoich(self.neti, 1, 1, 2)
+        arrays = api.get_network_arrays(self.neti)
+        self.assertEqual([0, 1, 2], arrays.node_indices.tolist())
+        self.assertEqual(['Alice', 'Bob', 'Charlie'], arrays.node_ids.tolist())
+        self.assertEqual((3, 2), arrays.positions.shape)
+        self.assertEqual(['AB', 'BAC'], arrays.reaction_ids.tolist())
+        self.assertEqual([0, 2, 5], arrays.incidence_ptr.tolist())
+        self.assertEqual([0, 1, 0, 1, 2], arrays.incidence_indices.tolist())
+        self.assertEqual([-1, 1, 1, -2, 1], arrays.incidence_data.tolist())
+        # cached until the network changes
+        self.assertIs(arrays.incidence_data, api.get_network_arrays(self.neti).incidence_data)
+        api.delete_reaction(self.neti, 0)
+        self.assertEqual([0, 3], api.get_network_arrays(self.neti).incidence_ptr.tolist())
+
+    def test_stoichiometry(self):
+        # Alice + Bob -> Charlie, with an alias of Alice taking part in a second reaction
+        api.add_reaction(self.neti, 'AB_C', [0, 1], [2])
+        aliasi = api.add_alias(self.neti, 0)
+        api.add_reaction(self.neti, 'C_AB', [2], [aliasi, 1])
+        stoich = api.get_stoichiometry(self.neti)
+        self.assertEqual([0, 1, 2], stoich.species_indices.tolist())
+        self.assertEqual([[-1, 1], [-1, 1], [1, -1]], stoich.to_dense().tolist())
+        # Alice + Charlie and Bob + Charlie are conserved
+        self.assertEqual([[1, 0, 1], [0, 1, 1]], stoich.moiety_matrix.tolist())
+        self.assertIs(stoich, api.get_stoichiometry(self.neti))
+        api.delete_reaction(self.neti, 1)
+        self.assertIsNot(stoich, api.get_stoichiometry(self.neti))
+
     def test_delete_items(self):
         api.add_reaction(self.neti, 'AB', [0], [1])
 
@@ -0,0 +1,92 @@
+import unittest
+from rkviewer.canvas.geometry import Vec2
+from rkviewer.events import DidAddNodeEvent, DidModifyNodesEvent, DidMoveNodesEvent, batch_events, \
+    bind_handler, post_event, unbind_handler
+
+
+class TestKeyedHandlers(unittest.TestCase):
+    def setUp(self):
+        self.received = list()
+        self.handler_ids = list()
+
+    def tearDown(self):
+        for hid in self.handler_ids:
+            unbind_handler(hid)
+
+    def bind(self, name, keys=None):
+        self.handler_ids.append(bind_handler(DidMoveNodesEvent,
+                                             lambda evt: self.received.append(name), keys))
+
+    def test_dispatch(self):
+        self.bind('a', keys=[0, 1])
+        self.bind('b', keys={2})
+        self.bind('all')
+        post_event(DidMoveNodesEvent([1, 0], Vec2(1, 1), dragged=True))
+        # handlers bound with several of the keys are only called once
+        self.assertEqual(['all', 'a'], self.received)
+
+        self.received.clear()
+        post_event(DidMoveNodesEvent([2, 1], Vec2(1, 1), dragged=True))
+        self.assertEqual(['all', 'a', 'b'], self.received)
+
+        self.received.clear()
+        post_event(DidMoveNodesEvent([3], Vec2(1, 1), dragged=True))
+        self.assertEqual(['all'], self.received)
+
+    def test_unbind(self):
+        self.bind('a', keys=[0])
+        unbind_handler(self.handler_ids.pop())
+        post_event(DidMoveNodesEvent([0], Vec2(1, 1), dragged=True))
+        self.assertEqual([], self.received)
+
+
+class TestBatchedHandlers(unittest.TestCase):
+    def setUp(self):
+        self.received = list()
+        self.handler_ids = [
+            bind_handler(DidMoveNodesEvent, self.received.append, batched=True),
+            bind_handler(DidModifyNodesEvent, self.received.append, batched=True),
+        ]
+
+    def tearDown(self):
+        for hid in self.handler_ids:
+            unbind_handler(hid)
+
+    def test_merge(self):
+        immediate = list()
+        self.handler_ids.append(bind_handler(DidMoveNodesEvent, immediate.append))
+        with batch_events():
+            post_event(DidMoveNodesEvent([0, 1], Vec2(1, 2), dragged=True))
+            with batch_events():
+                post_event(DidMoveNodesEvent([0, 1], Vec2(3, 4), dragged=True))
+                post_event(DidModifyNodesEvent([2]))
+            post_event(DidModifyNodesEvent([3, 2]))
+            self.assertEqual([], self.received)
+            self.assertEqual(2, len(immediate))
+        self.assertEqual([DidMoveNodesEvent([0, 1], Vec2(4, 6), dragged=True),
+                          DidModifyNodesEvent([2, 3])], self.received)
+
+    def test_merge_offsets(self):
+        with batch_events():
+            post_event(DidMoveNodesEvent([0, 1], Vec2(1, 1), dragged=True))
+            post_event(DidMoveNodesEvent([1, 2], [Vec2(1, 0), Vec2(2, 2)], dragged=True))
+            # not merged, since it was not dragged
+            post_event(DidMoveNodesEvent([0], Vec2(5, 5), dragged=False))
+        self.assertEqual([DidMoveNodesEvent([0, 1, 2], [Vec2(1, 1), Vec2(2, 1), Vec2(2, 2)],
+                                            dragged=True),
+                          DidMoveNodesEvent([0], Vec2(5, 5), dragged=False)], self.received)
+
+    def test_merge_order(self):
+        self.handler_ids.append(bind_handler(DidAddNodeEvent, self.received.append, batched=True))
+        with batch_events():
+            post_event(DidMoveNodesEvent([0], Vec2(1, 1), dragged=True))
+            post_event(DidAddNodeEvent(5))
+            post_event(DidMoveNodesEvent([5], Vec2(2, 2), dragged=True))
+        # the second move is not merged into the first, since node 5 was added in between
+        self.assertEqual([DidMoveNodesEvent([0], Vec2(1, 1), dragged=True),
+                          DidAddNodeEvent(5),
+                          DidMoveNodesEvent([5], Vec2(2, 2), dragged=True)], self.received)
+
+    def test_unbatched(self):
+        post_event(DidModifyNodesEvent([1]))
+        self.assertEqual([DidModifyNodesEvent([1])], self.received)
@@ -0,0 +1,102 @@
+# pylint: disable=maybe-no-member
+import unittest
+from rkviewer import iodine
+from rkviewer.mvc import IDNotFoundError, IDRepeatError
+
+
+class TestIDIndex(unittest.TestCase):
+    def setUp(self):
+        iodine.reset()
+        iodine.newNetwork("net1")
+        self.neti = iodine.getNetworkIndex("net1")
+        iodine.startGroup()
+        self.nodei = iodine.addNode(self.neti, "A", 10, 10, 30, 20)
+        self.node2i = iodine.addNode(self.neti, "B", 100, 10, 30, 20)
+        iodine.createReaction(self.neti, "R", [self.nodei], [self.node2i])
+        self.compi = iodine.addCompartment(self.neti, "C", 0, 0, 500, 500)
+        iodine.endGroup()
+
+    def tearDown(self):
+        iodine.reset()
+
+    def testLookup(self):
+        self.assertEqual(self.node2i, iodine.getNodeIndex(self.neti, "B"))
+        self.assertEqual(0, iodine.getReactionIndex(self.neti, "R"))
+        with self.assertRaises(IDNotFoundError):
+            iodine.getNodeIndex(self.neti, "nope")
+        with self.assertRaises(IDRepeatError):
+            iodine.addNode(self.neti, "A", 10, 10, 30, 20)
+        with self.assertRaises(IDRepeatError):
+            iodine.createReaction(self.neti, "R", [self.node2i], [self.nodei])
+        with self.assertRaises(IDRepeatError):
+            iodine.addCompartment(self.neti, "C", 0, 0, 10, 10)
+        with self.assertRaises(IDRepeatError):
+            iodine.newNetwork("net1")
+
+    def testRename(self):
+        iodine.setNodeID(self.neti, self.nodei, "A2")
+        iodine.setReactionID(self.neti, 0, "R2")
+        iodine.setCompartmentID(self.neti, self.compi, "C2")
+        self.assertEqual(self.nodei, iodine.getNodeIndex(self.neti, "A2"))
+        self.assertEqual(0, iodine.getReactionIndex(self.neti, "R2"))
+        with self.assertRaises(IDNotFoundError):
+            iodine.getNodeIndex(self.neti, "A")
+        with self.assertRaises(IDRepeatError):
+            iodine.setCompartmentID(self.neti, iodine.addCompartment(self.neti, "D", 0, 0, 1, 1),
+                                    "C2")
+        # the old IDs are free again
+        iodine.addNode(self.neti, "A", 10, 10, 30, 20)
+        iodine.validateState()
+
+    def testUndoRedoAndDelete(self):
+        iodine.setNodeID(self.neti, self.nodei, "A2")
+        iodine.undo()
+        self.assertEqual(self.nodei, iodine.getNodeIndex(self.neti, "A"))
+        iodine.redo()
+        self.assertEqual(self.nodei, iodine.getNodeIndex(self.neti, "A2"))
+
+        iodine.startGroup()
+        iodine.deleteReaction(self.neti, 0)
+        iodine.deleteNode(self.neti, self.nodei)
+        iodine.deleteCompartment(self.neti, self.compi)
+        iodine.endGroup()
+        iodine.validateState()
+        with self.assertRaises(IDNotFoundError):
+            iodine.getReactionIndex(self.neti, "R")
+
+        iodine.undo()
+        iodine.validateState()
+        self.assertEqual(0, iodine.getReactionIndex(self.neti, "R"))
+
+    def testLoadNetwork(self):
+        dump = iodine.dumpNetwork(self.neti)
+        iodine.loadNetwork(dump)
+        self.assertEqual(0, iodine.getNetworkIndex("net1"))
+        self.assertEqual(self.node2i, iodine.getNodeIndex(0, "B"))
+        self.assertEqual(0, iodine.getReactionIndex(0, "R"))
+        iodine.validateState()
+
+    def testAliasAndModifierIndex(self):
+        node3i = iodine.addNode(self.neti, "M", 200, 10, 30, 20)
+        aliasi = iodine.addAliasNode(self.neti, node3i, 300, 10, 30, 20)
+        iodine.setReactionModifiers(self.neti, 0, {node3i, aliasi})
+        net = iodine._getNetwork(self.neti)
+        self.assertEqual({aliasi}, net.aliasMap[node3i])
+        self.assertEqual({0}, net.modifierMap[aliasi])
+
+        # deleting the alias hands its modifier role back to the original
+        iodine.deleteNode(self.neti, aliasi)
+        self.assertEqual({node3i}, iodine.getReactionModifiers(self.neti, 0))
+        iodine.validateState()
+
+        iodine.startGroup()
+        iodine.addAliasNode(self.neti, node3i, 300, 10, 30, 20)
+        iodine.deleteNode(self.neti, node3i)
+        iodine.endGroup()
+        self.assertEqual(set(), iodine.getReactionModifiers(self.neti, 0))
+        self.assertEqual([self.nodei, self.node2i], list(iodine.getListOfNodeIndices(self.neti)))
+        iodine.validateState()
+
+        iodine.undo()
+        self.assertEqual({node3i}, iodine.getReactionModifiers(self.neti, 0))
+        iodine.validateState()
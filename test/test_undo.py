@@ -0,0 +1,171 @@
+# pylint: disable=maybe-no-member
+import unittest
+from rkviewer import iodine
+from rkviewer.mvc import NodeIndexError, StackEmptyError
+
+
+class TestUndo(unittest.TestCase):
+    def setUp(self):
+        iodine.reset()
+        iodine.newNetwork("net1")
+        self.neti = iodine.getNetworkIndex("net1")
+        iodine.startGroup()
+        self.nodei = iodine.addNode(self.neti, "node0", 10, 10, 30, 20)
+        self.node2i = iodine.addNode(self.neti, "node1", 100, 10, 30, 20)
+        for nodei in (self.nodei, self.node2i):
+            iodine.setCompartmentOfNode(self.neti, nodei, -1)
+        iodine.endGroup()
+
+    def tearDown(self):
+        iodine.setUndoHistoryLimits(200, 256 * 1024 * 1024)
+        iodine.reset()
+
+    def doGroup(self, *ops):
+        iodine.startGroup()
+        for op in ops:
+            op()
+        iodine.endGroup()
+
+    def testUndoRedoSingleEdit(self):
+        before = iodine.dumpNetwork(self.neti)
+        iodine.setNodeCoordinate(self.neti, self.nodei, 200, 300)
+        after = iodine.dumpNetwork(self.neti)
+        self.assertEqual((200, 300, 30, 20), iodine.getNodeCoordinateAndSize(self.neti, self.nodei))
+
+        iodine.undo()
+        self.assertEqual(before, iodine.dumpNetwork(self.neti))
+        iodine.redo()
+        self.assertEqual(after, iodine.dumpNetwork(self.neti))
+
+    def testUndoGroup(self):
+        before = iodine.dumpNetwork(self.neti)
+        compi = iodine.addCompartment(self.neti, "comp", 0, 0, 500, 500)
+        self.doGroup(
+            lambda: iodine.createReaction(self.neti, "rxn", [self.nodei], [self.node2i]),
+            lambda: iodine.setReactionSrcNodeStoich(self.neti, 0, self.nodei, 3.0),
+            lambda: iodine.setCompartmentOfNode(self.neti, self.nodei, compi),
+            # does not push by itself, so it joins the group
+            lambda: iodine.setNodeFillColorRGB(self.neti, self.nodei, 1, 2, 3),
+        )
+        after = iodine.dumpNetwork(self.neti)
+
+        iodine.undo()
+        self.assertEqual(0, iodine.getNumberOfReactions(self.neti))
+        self.assertEqual(-1, iodine.getCompartmentOfNode(self.neti, self.nodei))
+        self.assertEqual([], iodine.getNodesInCompartment(self.neti, compi))
+        iodine.undo()
+        self.assertEqual(before, iodine.dumpNetwork(self.neti))
+
+        iodine.redo()
+        iodine.redo()
+        self.assertEqual(after, iodine.dumpNetwork(self.neti))
+        self.assertEqual({0}, iodine.getSrcReactions(self.neti, self.nodei))
+        self.assertEqual([self.nodei], iodine.getNodesInCompartment(self.neti, compi))
+
+    def testUndoDeletions(self):
+        self.doGroup(
+            lambda: iodine.createReaction(self.neti, "rxn", [self.nodei], [self.node2i]),
+            lambda: iodine.aliasForReaction(self.neti, 0, self.node2i, 50, 50, 10, 10),
+        )
+        before = iodine.dumpNetwork(self.neti)
+        self.doGroup(
+            lambda: iodine.deleteReaction(self.neti, 0),
+            lambda: iodine.deleteNode(self.neti, self.node2i),
+        )
+        self.assertEqual([self.nodei], list(iodine.getListOfNodeIndices(self.neti)))
+
+        iodine.undo()
+        self.assertEqual(before, iodine.dumpNetwork(self.neti))
+        self.assertEqual(set(), iodine.getSrcReactions(self.neti, self.node2i))
+        iodine.validateState()
+
+    def testUndoClearNetworks(self):
+        before = iodine.dumpNetwork(self.neti)
+        iodine.clearNetworks()
+        self.assertEqual([], iodine.getListOfNetworks())
+        iodine.undo()
+        self.assertEqual(before, iodine.dumpNetwork(self.neti))
+        iodine.newNetwork("net2")
+        self.assertEqual([0, 1], iodine.getListOfNetworks())
+
+    def testNewEditClearsRedo(self):
+        iodine.setNodeCoordinate(self.neti, self.nodei, 200, 300)
+        iodine.undo()
+        iodine.setNodeSize(self.neti, self.nodei, 5, 5)
+        with self.assertRaises(StackEmptyError):
+            iodine.redo()
+
+    def testHistoryDepthLimit(self):
+        iodine.setUndoHistoryLimits(3, 256 * 1024 * 1024)
+        for i in range(10):
+            iodine.setNodeCoordinate(self.neti, self.nodei, i, i)
+        self.assertEqual(3, iodine.getUndoHistorySize()[0])
+
+        for _ in range(3):
+            iodine.undo()
+        # the oldest moves were evicted
+        self.assertEqual((6, 6, 30, 20), iodine.getNodeCoordinateAndSize(self.neti, self.nodei))
+        with self.assertRaises(StackEmptyError):
+            iodine.undo()
+
+    def testHistoryByteLimit(self):
+        iodine.setNodeCoordinate(self.neti, self.nodei, 1, 1)
+        _, one_step = iodine.getUndoHistorySize()
+        iodine.setUndoHistoryLimits(200, 4 * one_step)
+        for i in range(10):
+            iodine.setNodeCoordinate(self.neti, self.nodei, i, i)
+        steps, nbytes = iodine.getUndoHistorySize()
+        self.assertLessEqual(nbytes, 4 * one_step)
+        self.assertGreater(steps, 0)
+
+    def testChangeRecords(self):
+        iodine.popChanges()
+        iodine.setNodeFillColorRGB(self.neti, self.nodei, 1, 2, 3)
+        changes = iodine.popChanges()[self.neti]
+        self.assertEqual({self.nodei}, changes.nodes.modified)
+        self.assertFalse(changes.reactions or changes.compartments or changes.replaced)
+
+        iodine.startGroup()
+        newi = iodine.addNode(self.neti, "node2", 10, 10, 30, 20)
+        iodine.deleteNode(self.neti, self.node2i)
+        iodine.endGroup()
+        changes = iodine.popChanges()[self.neti]
+        self.assertEqual(({newi}, {self.node2i}, set()),
+                         (changes.nodes.added, changes.nodes.removed, changes.nodes.modified))
+
+        # undo reports the same elements, the other way around
+        iodine.undo()
+        changes = iodine.popChanges()[self.neti]
+        self.assertEqual(({self.node2i}, {newi}), (changes.nodes.added, changes.nodes.removed))
+
+        # elements that come and go in between are not reported
+        tempi = iodine.addNode(self.neti, "temp", 10, 10, 30, 20)
+        iodine.deleteNode(self.neti, tempi)
+        self.assertEqual({}, iodine.popChanges())
+
+        iodine.clearNetwork(self.neti)
+        self.assertTrue(iodine.popChanges()[self.neti].replaced)
+
+    def testGeometryTable(self):
+        table = iodine.getNodeGeometryTable(self.neti)
+        self.assertEqual([self.nodei, self.node2i], table.indices.tolist())
+        self.assertEqual([[10, 10], [100, 10]], table.positions.tolist())
+        self.assertEqual([[30, 20], [30, 20]], table.sizes.tolist())
+
+        # a bulk move is a single undo step, and the table follows the nodes
+        iodine.setNodeCoordinates(self.neti, [self.node2i, self.nodei], [(5, 6), (7, 8)])
+        self.assertEqual([[7, 8], [5, 6]], iodine.getNodeGeometryTable(self.neti).positions.tolist())
+        iodine.undo()
+        self.assertEqual([[10, 10], [100, 10]],
+                         iodine.getNodeGeometryTable(self.neti).positions.tolist())
+
+        iodine.setNodeSize(self.neti, self.nodei, 1, 2)
+        newi = iodine.addNode(self.neti, "node2", 50, 60, 70, 80)
+        table = iodine.getNodeGeometryTable(self.neti)
+        self.assertEqual([self.nodei, self.node2i, newi], table.indices.tolist())
+        self.assertEqual([[1, 2], [30, 20], [70, 80]], table.sizes.tolist())
+
+        with self.assertRaises(NodeIndexError):
+            iodine.setNodeCoordinates(self.neti, [100], [(1, 1)])
+        with self.assertRaises(ValueError):
+            iodine.setNodeCoordinates(self.neti, [self.nodei], [(-1, 1)])
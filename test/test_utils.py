@@ -1,7 +1,11 @@
 import unittest
 import copy
+import numpy as np
 from rkviewer.canvas.geometry import Rect, Vec2, pt_in_rect, clamp_rect_pos, clamp_point, \
-    rects_overlap, get_bounding_rect
+    rects_overlap, get_bounding_rect, pt_on_line, pt_on_segments
+from rkviewer.canvas.spatial import SpatialGrid
+from rkviewer.canvas.data import CompositeShape, RectanglePrim, TextPrim, Transform
+from rkviewer.config import Color
 
 
 class TestRectUtils(unittest.TestCase):
@@ -104,3 +108,65 @@ class TestRectUtils(unittest.TestCase):
 
         rect2 = Rect(Vec2(84, 99.41431), Vec2(4, 0.003))
         self.assertFalse(rects_overlap(rect1, rect2))
+
+    def test_pt_on_segments(self):
+        starts = np.array([(0, 0), (10, 0), (5, 5)], dtype=float)
+        ends = np.array([(10, 0), (10, 10), (5, 5)], dtype=float)
+        for pos in (Vec2(5, 1), Vec2(11, 5), Vec2(5, 6), Vec2(-1, 0), Vec2(5, 3)):
+            expected = [pt_on_line(Vec2(0, 0), Vec2(10, 0), pos, 1.5),
+                        pt_on_line(Vec2(10, 0), Vec2(10, 10), pos, 1.5)]
+            self.assertEqual(expected, list(pt_on_segments(starts, ends, pos, 1.5)[:2]))
+        # a zero-length segment is a point
+        self.assertEqual([False, False, True], list(pt_on_segments(starts, ends, Vec2(5, 6), 1)))
+
+
+class TestVec2(unittest.TestCase):
+    def test_iteration(self):
+        v = Vec2(3, 4)
+        # each iterator is independent, so nested iteration over the same vector works
+        self.assertEqual([(3, 3), (3, 4), (4, 3), (4, 4)], [(a, b) for a in v for b in v])
+        self.assertEqual(Vec2(3, 4), Vec2(v))
+        self.assertEqual((3, 4), tuple(v))
+
+    def test_compact(self):
+        v = Vec2(1, 2)
+        self.assertFalse(hasattr(v, '__dict__'))
+        with self.assertRaises(AttributeError):
+            v.x = 5
+        with self.assertRaises(AttributeError):
+            v.z = 5
+        self.assertFalse(hasattr(Rect(v, v), '__dict__'))
+
+
+class TestSpatialGrid(unittest.TestCase):
+    def test_queries(self):
+        grid = SpatialGrid(cell_size=10, max_cells=16)
+        grid.insert('a', Rect(Vec2(0, 0), Vec2(5, 5)))
+        grid.insert('b', Rect(Vec2(25, 25), Vec2(10, 10)))
+        grid.insert('big', Rect(Vec2(0, 0), Vec2(100, 100)))
+        grid.insert('any', None)
+        self.assertEqual({'a', 'big', 'any'}, grid.query_point(Vec2(3, 3)))
+        self.assertEqual({'b', 'big', 'any'}, grid.query_point(Vec2(31, 28)))
+        self.assertEqual({'a', 'b', 'big', 'any'},
+                         grid.query_rect(Rect(Vec2(4, 4), Vec2(22, 22))))
+
+        grid.insert('a', Rect(Vec2(30, 30), Vec2(1, 1)))
+        grid.discard('b')
+        self.assertEqual({'a', 'big', 'any'}, grid.query_point(Vec2(31, 31)))
+        self.assertEqual({'big', 'any'}, grid.query_point(Vec2(3, 3)))
+        self.assertEqual(3, len(grid))
+
+
+class TestCompositeShape(unittest.TestCase):
+    def test_style_key(self):
+        def make(fill):
+            return CompositeShape([(RectanglePrim(fill_color=fill), Transform())],
+                                  (TextPrim(), Transform()), 'rectangle')
+        shape = make(Color(1, 2, 3))
+        self.assertEqual(shape.style_key(), copy.copy(shape).style_key())
+        self.assertEqual(hash(shape.style_key()), hash(make(Color(1, 2, 3)).style_key()))
+        self.assertNotEqual(shape.style_key(), make(Color(1, 2, 4)).style_key())
+        # the text does not change how the body looks
+        other = make(Color(1, 2, 3))
+        other.text_item[0].font_size = 40
+        self.assertEqual(shape.style_key(), other.style_key())